@@ -3,6 +3,10 @@ ASGI config for downward project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Besides Django itself, the application runs the entry autosave flush loop
+(journal.autosave) on the server's event loop: it starts with the first
+lifespan or HTTP event and writes any pending drafts on shutdown.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
@@ -13,4 +17,22 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'downward.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from journal.autosave import drafts  # noqa: E402  (needs the app registry)
+
+
+async def application(scope, receive, send):
+    if scope['type'] != 'lifespan':
+        drafts.start()
+        return await django_application(scope, receive, send)
+
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            drafts.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await drafts.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
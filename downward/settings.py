@@ -47,7 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'journal.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'journal.middleware.PrerenderedPageMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,8 +63,12 @@ ROOT_URLCONF = 'downward.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'journal.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
+        # With DEBUG off Django wraps these loaders in its cached loader, so
+        # every template is parsed once per process. ``manage.py
+        # compile_templates`` checks them all at deploy time and gunicorn's
+        # warmup fills the cache before traffic arrives.
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -78,14 +84,81 @@ TEMPLATES = [
 WSGI_APPLICATION = 'downward.wsgi.application'
 
 
+# Request performance instrumentation (journal.middleware)
+
+# Fraction of requests logged to journal.performance (e.g. 0.01); slow
+# requests are always logged
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', '0'))
+PERF_SLOW_REQUEST_MS = float(os.environ.get('PERF_SLOW_REQUEST_MS', '500'))
+# Staff always get the Server-Timing header; this sends it to everyone
+PERF_SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING', 'false').lower() == 'true'
+
+# Seconds the autosave endpoint holds drafts in memory before writing the
+# newest one per session (journal.autosave)
+AUTOSAVE_INTERVAL = float(os.environ.get('AUTOSAVE_INTERVAL', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'journal.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
 
+# DB_POOL picks how PostgreSQL connections are reused:
+#   pool        psycopg's connection pool, shared by the worker's threads
+#               (needs psycopg[pool]; the only choice that helps under ASGI)
+#   persistent  one connection per thread kept for DB_CONN_MAX_AGE seconds
+#   off         a new connection for every request
+# journal.dbpool publishes each worker's connection stats either way.
+DB_POOL = os.environ.get('DB_POOL', 'pool')
+
 if 'DATABASE_URL' in os.environ:
     DATABASES = {
-        'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
+        'default': dj_database_url.parse(
+            os.environ.get('DATABASE_URL'),
+            conn_max_age=(
+                int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+                if DB_POOL == 'persistent' else 0
+            ),
+            # Ping a reused connection before the request gets it, so a
+            # restarted or failed-over database costs a reconnect, not a 500
+            conn_health_checks=DB_POOL == 'persistent',
+        )
     }
+    if DB_POOL == 'pool' and DATABASES['default']['ENGINE'].endswith('postgresql'):
+        # Every web worker has its own pool, shared by its request threads
+        # (GUNICORN_THREADS under gthread, defaulting as in gunicorn.conf.py)
+        # and its autosave flush thread, so it holds one connection per
+        # thread plus one. gunicorn.conf.py starts no more workers than fit
+        # the database's connection limit.
+        web_threads = int(os.environ.get(
+            'GUNICORN_THREADS',
+            '4' if os.environ.get('GUNICORN_WORKER_CLASS', 'gthread') == 'gthread'
+            else '1',
+        ))
+        pool_max_size = int(os.environ.get('DB_POOL_MAX_SIZE', web_threads + 1))
+        # psycopg checks connections as they come back to the pool, so
+        # checkouts skip the extra round trip of a health check
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            'max_size': pool_max_size,
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
 else: 
     DATABASES = {
         'default': {
@@ -95,6 +168,46 @@ else:
     }
 
 
+# Caches, sessions and messages
+
+# Sessions and logged-in users are cached here when REDIS_URL is set (the
+# redis package is in requirements.txt), so every worker shares one cache.
+# Without it each process keeps its own LocMemCache, which cannot tell other
+# workers about a logout or a password change, so neither is cached then.
+SHARED_CACHE = 'REDIS_URL' in os.environ
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# With a shared cache, sessions are read from the cache and only written (to
+# both) when they change; the database copy survives cache restarts
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.cached_db' if SHARED_CACHE
+    else 'django.contrib.sessions.backends.db',
+)
+if not SHARED_CACHE and SESSION_ENGINE.endswith(('.cache', '.cached_db')):
+    raise ValueError(
+        f"SESSION_ENGINE {SESSION_ENGINE} needs a cache shared by every "
+        "worker. Please set the REDIS_URL environment variable."
+    )
+
+# Flash messages travel in a signed cookie instead of the session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# With a shared cache, journal.backends keeps the logged-in User cached for
+# USER_CACHE_TIMEOUT seconds; journal.signals drops it whenever the user is
+# saved or deleted. ModelBackend stays listed so sessions that logged in
+# through it keep working.
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+if SHARED_CACHE:
+    AUTHENTICATION_BACKENDS.insert(0, 'journal.backends.CachedModelBackend')
+USER_CACHE_TIMEOUT = int(os.environ.get('USER_CACHE_TIMEOUT', '300'))
+
 
 
 # Password validation
@@ -142,6 +255,19 @@ STATICFILES_DIRS = [
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Both collectstatic and ``manage.py build_assets`` (journal.assets) put a
+# 12 hex digit content hash in file names; those can be cached forever
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{12}\..+$'
+
+# Anonymous home, about, privacy and terms pages written by
+# ``manage.py prerender_pages`` and served by PrerenderedPageMiddleware
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+PRERENDER_MAX_AGE = int(os.environ.get('PRERENDER_MAX_AGE', '3600'))
+
+# Finished sessions older than this many days have their entries moved to
+# compressed cold storage by ``manage.py archive_sessions`` (journal.archive)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '365'))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
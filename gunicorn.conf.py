@@ -0,0 +1,127 @@
+"""
+Gunicorn settings for Downward, tuned from the environment.
+
+    WEB_CONCURRENCY              worker processes (default: 2 per CPU + 1,
+                                 but no more than fit DB_MAX_CONNECTIONS)
+    GUNICORN_WORKER_CLASS        gthread (default) or sync, serving WSGI; or
+                                 uvicorn.workers.UvicornWorker, serving ASGI
+    GUNICORN_THREADS             threads per gthread worker (default 4)
+    GUNICORN_PRELOAD             load Django once in the master and fork
+                                 (default true; shares memory between workers)
+    GUNICORN_MAX_REQUESTS        recycle a worker after this many requests
+                                 (default 1000, 0 to never)
+    GUNICORN_MAX_REQUESTS_JITTER random extra requests so workers don't all
+                                 restart together (default 100)
+    GUNICORN_TIMEOUT             seconds before a silent worker is killed
+    GUNICORN_KEEPALIVE           seconds to hold idle keep-alive connections
+    GUNICORN_WARMUP              run journal.warmup before serving (default true)
+
+Every worker resolves all URLs, compiles all templates and loads the descent
+type catalog before it accepts its first request.
+
+WSGI is the default because the app is sync throughout. Under ASGI Django
+reads a StreamingHttpResponse's sync iterator into memory in one go (so
+personal data exports lose their constant memory use), and every request
+hops to a thread for the sync-only middleware such as
+RequestTimingMiddleware. Autosave writes are coalesced either way: under
+ASGI on the event loop, under WSGI by a flush thread each worker starts
+once it is initialised and drains when it exits (journal.autosave).
+"""
+import multiprocessing
+import os
+import sys
+
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '4' if worker_class == 'gthread' else '1'))
+
+# With DB_POOL=pool each worker's pool holds a connection per thread plus
+# one for the autosave flush thread (downward/settings.py), so by default
+# only as many workers start as the database's connection limit allows,
+# less DB_SPARE_CONNECTIONS kept back for release commands and one-off dynos
+connection_budget = (
+    int(os.environ.get('DB_MAX_CONNECTIONS', '20'))
+    - int(os.environ.get('DB_SPARE_CONNECTIONS', '3'))
+)
+workers = multiprocessing.cpu_count() * 2 + 1
+if os.environ.get('DB_POOL', 'pool') == 'pool' and 'DATABASE_URL' in os.environ:
+    workers = min(workers, max(1, connection_budget // (threads + 1)))
+workers = int(os.environ.get('WEB_CONCURRENCY', workers))
+wsgi_app = (
+    'downward.asgi:application' if 'uvicorn' in worker_class
+    else 'downward.wsgi:application'
+)
+
+preload_app = _flag('GUNICORN_PRELOAD', 'true')
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = '-'
+errorlog = '-'
+
+warmup = _flag('GUNICORN_WARMUP', 'true')
+
+
+def _warm_up(log, who, database):
+    # Imported here: Django is only set up once the app has been loaded
+    from journal.warmup import warm_up
+
+    done = warm_up(database=database)
+    log.info(
+        '%s warmed up in %.0f ms: %d routes, %d templates failed to compile, '
+        '%s descent types',
+        who, done['ms'], done['routes'], done['template_errors'],
+        'skipped' if done['descent_types'] is None else done['descent_types'],
+    )
+
+
+def when_ready(server):
+    # Compiled URLs and templates built here are inherited by every forked
+    # worker; the master never touches the database
+    if warmup and preload_app:
+        _warm_up(server.log, 'Master', database=False)
+
+
+def check_pool(log, pool):
+    """Warn when a worker's connection pool cannot serve all its threads."""
+    if not isinstance(pool, dict):
+        return
+    max_size = pool.get('max_size', threads)
+    if max_size < threads:
+        log.warning(
+            'DB pool max_size %d is below the %d threads per worker; '
+            'requests will queue for a connection', max_size, threads,
+        )
+    if workers * max_size > connection_budget:
+        log.warning(
+            '%d workers with pools of %d connections can exceed the '
+            '%d connections available', workers, max_size, connection_budget,
+        )
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    check_pool(worker.log, settings.DATABASES['default'].get('OPTIONS', {}).get('pool'))
+    if warmup:
+        _warm_up(worker.log, f'Worker {worker.pid}', database=True)
+    if 'uvicorn' not in worker_class:
+        # downward.asgi runs the flush loop for ASGI workers
+        from journal.autosave import drafts
+
+        drafts.start_thread()
+
+
+def worker_exit(server, worker):
+    # A worker that failed to load the app has no drafts to write
+    autosave = sys.modules.get('journal.autosave')
+    if autosave is not None and 'uvicorn' not in worker_class:
+        autosave.drafts.stop_thread()
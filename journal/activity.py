@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+
+from django.db import transaction
+
+from .models import ActivityEvent, DescentSession
+from .pagination import paginate_keyset
+
+
+class ActivityFeed:
+    """
+    Bounded, process-local ring buffer in front of the ActivityEvent table.
+
+    Events written by this process are pushed in as soon as their transaction
+    commits; the buffer is re-read from the table's tail once it is older than
+    ``max_age`` seconds so events written by other workers show up too.
+    """
+
+    def __init__(self, size=100, max_age=30):
+        self.size = size
+        self.max_age = max_age
+        self._events = deque(maxlen=size)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.max_age
+        )
+
+    def reload(self):
+        events = list(
+            ActivityEvent.objects.order_by('-occurred_at', '-pk')[:self.size]
+        )
+        with self._lock:
+            self._events = deque(events, maxlen=self.size)
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self._loaded_at = None
+
+    def push(self, event):
+        with self._lock:
+            if self._loaded_at is not None:
+                self._events.appendleft(event)
+
+    def recent(self, limit=10, kinds=None):
+        """Return the newest ``limit`` events, optionally of certain kinds."""
+        if not self._is_fresh():
+            self.reload()
+        with self._lock:
+            buffered = list(self._events)
+        matches = [
+            event for event in buffered if kinds is None or event.kind in kinds
+        ][:limit]
+        if len(matches) < limit and len(buffered) == self.size:
+            # The buffer is full of other kinds; go to the table for the rest
+            queryset = ActivityEvent.objects.order_by('-occurred_at', '-pk')
+            if kinds is not None:
+                queryset = queryset.filter(kind__in=kinds)
+            matches = list(queryset[:limit])
+        return matches
+
+
+feed = ActivityFeed()
+
+
+def _loaded(instance, name):
+    """The related object ``name`` if ``instance`` already has it loaded."""
+    field = instance._meta.get_field(name)
+    return field.get_cached_value(instance) if field.is_cached(instance) else None
+
+
+def record(kind, session, entry=None):
+    """
+    Append an event for ``session`` (and ``entry``) to the activity log.
+
+    The username and descent type name are taken from the related objects
+    the caller already loaded; only when one is missing are both read, in a
+    single query.
+    """
+    user = _loaded(session, 'user')
+    descent_type = _loaded(session, 'descent_type')
+    if user is None or descent_type is None:
+        username, descent_type_name = DescentSession.objects.filter(
+            pk=session.pk
+        ).values_list('user__username', 'descent_type__name').get()
+    else:
+        username, descent_type_name = user.username, descent_type.name
+    event = ActivityEvent.objects.create(
+        kind=kind,
+        user_id=session.user_id,
+        username=username,
+        session_id=session.pk,
+        entry_id=entry.pk if entry else None,
+        descent_type_name=descent_type_name,
+    )
+    transaction.on_commit(lambda: feed.push(event))
+    return event
+
+
+def forget_user(user_id):
+    """
+    Remove a deleted account's events, which carry a copy of its username,
+    from the log and from this process's feed.
+    """
+    ActivityEvent.objects.filter(user_id=user_id).delete()
+    transaction.on_commit(feed.clear)
+
+
+def history_page(cursor=None, page_size=50):
+    """Page back through the full activity log, newest first."""
+    return paginate_keyset(
+        ActivityEvent.objects.all(), 'occurred_at', cursor, page_size
+    )
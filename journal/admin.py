@@ -1,5 +1,10 @@
 from django.contrib import admin
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.db.models.functions import Coalesce
+
+from . import search
 from .models import DescentType, DescentSession, Entry
+from .pagination import EstimatedCountPaginator
 
 # Register your models here.
 @admin.register(DescentType)
@@ -24,38 +29,64 @@ class DescentTypeAdmin(admin.ModelAdmin):
 class DescentSessionAdmin(admin.ModelAdmin):
     list_display = ('user', 'descent_type','status', 'started_at', 'duration')
     list_filter = ('status', 'descent_type', 'started_at')
+    list_select_related = ('user', 'descent_type')
     search_fields = ('user__username', 'notes')
     ordering = ('-started_at',)
+    date_hierarchy = 'started_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     fieldsets = (
         (None, {
             'fields': ('user', 'descent_type', 'status', 'notes')
         }),
         ('Timestamps', {
-            'fields': ('started_at', 'completed_at', 'abandoned_at'),
+            'fields': (
+                'started_at', 'completed_at', 'abandoned_at', 'archived_at',
+            ),
+            'classes': ('collapse',)
+        }),
+        ('Entry Summary', {
+            'fields': (
+                'entry_count', 'last_entry_at', 'latest_entry',
+                'emotion_sum', 'emotion_min', 'emotion_max',
+            ),
             'classes': ('collapse',)
         })
     )
-    readonly_fields = ('started_at', 'completed_at', 'abandoned_at')
+    readonly_fields = (
+        'started_at', 'completed_at', 'abandoned_at', 'archived_at',
+        'entry_count', 'last_entry_at', 'latest_entry',
+        'emotion_sum', 'emotion_min', 'emotion_max',
+    )
 
-    def duration(self, obj):
-        return obj.duration
-    duration.short_description = 'Duration'
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            elapsed=ExpressionWrapper(
+                Coalesce('completed_at', 'abandoned_at') - F('started_at'),
+                output_field=DurationField(),
+            )
+        )
 
+    # Open sessions sort as the shortest, whichever way the column is sorted
+    @admin.display(
+        description='Duration', ordering=F('elapsed').asc(nulls_first=True)
+    )
     def duration(self, obj):
-        """Calculate the duration of the descent session"""
-        if obj.completed_at:
-            return obj.completed_at - obj.started_at
-        elif obj.abandoned_at:
-            return obj.abandoned_at - obj.started_at
-        return timezone.timedelta()
-    duration.short_description = 'Duration'
+        """Time from start to completion or abandonment; empty while open"""
+        return obj.elapsed
 
 @admin.register(Entry)
 class EntryAdmin(admin.ModelAdmin):
     list_display = ('session', 'timestamp', 'emotion_level')
     list_filter = ('emotion_level', 'timestamp')
+    list_select_related = ('session__user', 'session__descent_type')
     search_fields = ('content', 'reflection')
     ordering = ('-timestamp',)
+    date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     fieldsets = (
         (None, {
             'fields': ('session', 'content', 'reflection', 'emotion_level')
@@ -67,4 +98,10 @@ class EntryAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('timestamp',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Match through the full-text index instead of ILIKE scans."""
+        if not search_term:
+            return queryset, False
+        return search.filter_entries(queryset, search_term), False
+
 
@@ -6,5 +6,4 @@ class JournalConfig(AppConfig):
     name = 'journal'
 
     def ready(self):
-        # import journal.signals
-        pass
\ No newline at end of file
+        import journal.signals  # noqa: F401
\ No newline at end of file
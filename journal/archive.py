@@ -0,0 +1,196 @@
+"""
+Cold storage for old, finished sessions.
+
+``archive_sessions`` moves the entries of completed and abandoned sessions
+out of the Entry table into one ArchivedSession row per session, holding
+them as zlib-compressed JSON, and stamps the session's ``archived_at``. The
+session row itself stays where it is: it is small, and its summary columns
+keep history pages, insights, counters and user summaries working without
+reading a single entry. Archived entries are left out of search.
+
+Reads go through ``session_entries``, which unpacks the archive for an
+archived session. ``restore`` moves the entries back, keeping their ids and
+timestamps, when an edit or a new entry for the session is submitted.
+"""
+import json
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import summaries
+from .models import ArchivedSession, DescentSession, Entry
+
+
+FORMAT_VERSION = 1
+
+# Statuses of sessions that can no longer change, and so may be archived
+FINISHED_STATUSES = ('COMPLETED', 'ABANDONED')
+
+ENTRY_FIELDS = ('id', 'timestamp', 'emotion_level', 'content', 'reflection')
+
+def pack(entries):
+    """Compress a list of entry dicts (see ENTRY_FIELDS) into an archive blob."""
+    document = {
+        'version': FORMAT_VERSION,
+        'entries': [
+            dict(entry, timestamp=entry['timestamp'].isoformat())
+            for entry in entries
+        ],
+    }
+    return zlib.compress(
+        json.dumps(document, separators=(',', ':')).encode(), 9
+    )
+
+
+def unpack(data):
+    """The entry dicts stored in an archive blob, in the order written."""
+    document = json.loads(zlib.decompress(bytes(data)))
+    return [
+        dict(entry, timestamp=parse_datetime(entry['timestamp']))
+        for entry in document['entries']
+    ]
+
+
+def archive_after():
+    return timedelta(days=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365))
+
+
+def candidates(cutoff=None):
+    """Finished sessions started before ``cutoff`` that are not yet archived."""
+    if cutoff is None:
+        cutoff = timezone.now() - archive_after()
+    return DescentSession.objects.filter(
+        status__in=FINISHED_STATUSES,
+        archived_at__isnull=True,
+        started_at__lt=cutoff,
+    )
+
+
+def archive_sessions(session_ids):
+    """
+    Move the entries of the given sessions into the archive, in one
+    transaction. Sessions that are unfinished or already archived are
+    skipped. Returns ``(sessions, entries)`` archived.
+    """
+    with transaction.atomic():
+        session_ids = list(
+            DescentSession.objects.select_for_update()
+            .filter(
+                pk__in=session_ids,
+                status__in=FINISHED_STATUSES,
+                archived_at__isnull=True,
+            )
+            .values_list('pk', flat=True)
+        )
+        if not session_ids:
+            return 0, 0
+        by_session = defaultdict(list)
+        rows = (
+            Entry.objects.filter(session_id__in=session_ids)
+            .order_by('session_id', 'timestamp', 'pk')
+            .values('session_id', *ENTRY_FIELDS)
+        )
+        for row in rows:
+            by_session[row.pop('session_id')].append(row)
+
+        ArchivedSession.objects.bulk_create([
+            ArchivedSession(
+                session_id=session_id,
+                entry_count=len(by_session[session_id]),
+                data=pack(by_session[session_id]),
+            )
+            for session_id in session_ids
+        ])
+        # The entries still count towards every total; they are only
+        # stored elsewhere
+        Entry.objects.filter(
+            session_id__in=session_ids
+        ).delete_without_bookkeeping()
+        DescentSession.objects.filter(pk__in=session_ids).update(
+            archived_at=timezone.now(), latest_entry=None
+        )
+    return len(session_ids), sum(len(rows) for rows in by_session.values())
+
+
+def restore(session):
+    """
+    Move an archived session's entries back into the Entry table with their
+    original ids and timestamps. Returns whether there was anything to do.
+    """
+    if session.archived_at is None:
+        return False
+    with transaction.atomic():
+        archived = (
+            ArchivedSession.objects.select_for_update()
+            .filter(session_id=session.pk)
+            .first()
+        )
+        if archived is not None:
+            # bulk_create skips the signals: the entries never stopped
+            # counting towards counters, rollups and user summaries
+            Entry.objects.bulk_create([
+                Entry(session_id=session.pk, **fields)
+                for fields in unpack(archived.data)
+            ])
+            archived.delete()
+        DescentSession.objects.filter(pk=session.pk).update(archived_at=None)
+        # Points latest_entry back at the restored entries
+        summaries.refresh_sessions([session.pk])
+    session.refresh_from_db(fields=('archived_at', *DescentSession.SUMMARY_FIELDS))
+    return True
+
+
+def session_entries(session):
+    """
+    The entries of ``session`` in the order written: a queryset, or unsaved
+    Entry instances read from the archive when the session is archived.
+    """
+    if session.archived_at is None:
+        return Entry.objects.filter(session=session).order_by('timestamp')
+    archived = ArchivedSession.objects.filter(session_id=session.pk).first()
+    if archived is None:
+        return []
+    return [
+        Entry(session=session, **fields) for fields in unpack(archived.data)
+    ]
+
+
+def daily_rows(sessions, start=None, end=None):
+    """
+    Aggregate the archived entries of ``sessions`` into rollup rows shaped
+    like ``rollups.daily_rows``, optionally only those written in
+    ``[start, end)``.
+    """
+    totals = {}
+    archives = ArchivedSession.objects.filter(
+        session__in=sessions
+    ).values_list('session__user_id', 'session__descent_type_id', 'data')
+    for user_id, descent_type_id, data in archives.iterator(chunk_size=100):
+        for entry in unpack(data):
+            timestamp = entry['timestamp']
+            if (start and timestamp < start) or (end and timestamp >= end):
+                continue
+            key = (user_id, descent_type_id, timezone.localdate(timestamp))
+            level = entry['emotion_level']
+            row = totals.get(key)
+            if row is None:
+                totals[key] = {
+                    'session__user_id': user_id,
+                    'session__descent_type_id': descent_type_id,
+                    'day': key[2],
+                    'entry_count': 1,
+                    'emotion_sum': level,
+                    'emotion_min': level,
+                    'emotion_max': level,
+                }
+            else:
+                row['entry_count'] += 1
+                row['emotion_sum'] += level
+                row['emotion_min'] = min(row['emotion_min'], level)
+                row['emotion_max'] = max(row['emotion_max'], level)
+    return list(totals.values())
@@ -0,0 +1,222 @@
+"""
+Write coalescing for entry drafts.
+
+The autosave endpoint hands every update to ``drafts``, which keeps only
+the newest one per (user, session) and writes whatever is pending to the
+EntryDraft table every ``AUTOSAVE_INTERVAL`` seconds, in one transaction.
+A user typing for a minute sends dozens of updates but costs a dozen
+writes at most. A ``final`` update (the tab is being hidden or closed) is
+written straight away.
+
+Under ASGI the flush loop runs on the server's event loop, started by
+``downward.asgi``. Under WSGI gunicorn.conf.py starts it in a thread of
+each worker (``start_thread``) and writes what is left when the worker
+exits. When nothing started it (the test client, runserver) every update
+is written through immediately, so no draft waits on a loop that will
+never come back.
+"""
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import ACTIVE_STATUSES, DescentSession, EntryDraft
+
+
+logger = logging.getLogger('journal.performance')
+
+RECEIVED_KEY = 'journal:autosave:received'
+WRITTEN_KEY = 'journal:autosave:written'
+
+
+def write_drafts(drafts):
+    """
+    Save ``{(user_id, session_id): fields}`` to EntryDraft and return how
+    many rows were written. Drafts for sessions that have since been
+    finished or deleted are dropped, as are edits older than the stored one.
+    """
+    session_ids = {session_id for _, session_id in drafts}
+    live = set(
+        DescentSession.objects.filter(
+            pk__in=session_ids, status__in=ACTIVE_STATUSES
+        ).values_list('user_id', 'pk')
+    )
+    written = 0
+    with transaction.atomic():
+        for key, fields in drafts.items():
+            if key not in live:
+                continue
+            user_id, session_id = key
+            updated = EntryDraft.objects.filter(
+                user_id=user_id,
+                session_id=session_id,
+                revision__lt=fields['revision'],
+            ).update(updated_at=timezone.now(), **fields)
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        EntryDraft.objects.create(
+                            user_id=user_id, session_id=session_id, **fields
+                        )
+                except IntegrityError:
+                    # A newer revision is already stored
+                    continue
+            written += 1
+    return written
+
+
+def record_stats(received, written):
+    """Add to the cross-worker totals reported by ``stats()``."""
+    for key, amount in ((RECEIVED_KEY, received), (WRITTEN_KEY, written)):
+        if amount:
+            cache.add(key, 0, None)
+            cache.incr(key, amount)
+
+
+def stats():
+    """Updates received, rows written and writes saved, across all workers."""
+    received = cache.get(RECEIVED_KEY, 0)
+    written = cache.get(WRITTEN_KEY, 0)
+    return {
+        'received': received,
+        'written': written,
+        'coalesced': max(received - written, 0),
+    }
+
+
+class DraftCoalescer:
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._pending = {}
+        self._received = 0
+        self._lock = threading.Lock()
+        self._task = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self):
+        if self._thread is not None:
+            return self._thread.is_alive()
+        return self._task is not None and not self._task.done()
+
+    def _interval(self):
+        if self.interval is None:
+            return getattr(settings, 'AUTOSAVE_INTERVAL', 5)
+        return self.interval
+
+    def start(self):
+        """Start flushing on the running event loop."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def start_thread(self):
+        """Start flushing from a daemon thread, for WSGI workers."""
+        if not self.running:
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._run_thread, name='autosave-flush', daemon=True
+            )
+            self._thread.start()
+
+    def stop_thread(self):
+        """Stop the flush thread and write whatever is still pending."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        self._write(*self._take())
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval())
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Autosave flush failed')
+
+    def _run_thread(self):
+        while not self._stopping.wait(self._interval()):
+            try:
+                self._write(*self._take())
+            except Exception:
+                logger.exception('Autosave flush failed')
+            finally:
+                # Hand the connection back between flushes
+                connection.close()
+
+    def is_pending(self, user_id, session_id):
+        with self._lock:
+            return (user_id, session_id) in self._pending
+
+    async def update(self, user_id, session_id, fields, final=False):
+        """
+        Queue ``fields`` as the draft for (user, session), replacing any
+        update still waiting. Returns True once it has been written.
+        """
+        key = (user_id, session_id)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None or pending['revision'] < fields['revision']:
+                self._pending[key] = fields
+            self._received += 1
+        if final or not self.running:
+            await self.flush([key])
+            return True
+        return False
+
+    def discard(self, user_id, session_id):
+        """Forget the pending draft for (user, session) without writing it."""
+        with self._lock:
+            self._pending.pop((user_id, session_id), None)
+
+    async def flush(self, keys=None):
+        """Write the pending drafts (only ``keys``, if given)."""
+        return await sync_to_async(self._write)(*self._take(keys))
+
+    def _take(self, keys=None):
+        with self._lock:
+            if keys is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {
+                    key: self._pending.pop(key)
+                    for key in keys if key in self._pending
+                }
+            received, self._received = self._received, 0
+        return batch, received
+
+    @staticmethod
+    def _write(batch, received):
+        written = write_drafts(batch) if batch else 0
+        record_stats(received, written)
+        if batch:
+            logger.debug(
+                'Autosaved %d drafts from %d updates', written, received
+            )
+        return written
+
+
+drafts = DraftCoalescer()
+
+
+def discard_draft(user_id, session_id):
+    """Drop the draft for a session whose entry has just been submitted."""
+    drafts.discard(user_id, session_id)
+    EntryDraft.objects.filter(user_id=user_id, session_id=session_id).delete()
@@ -0,0 +1,48 @@
+"""
+Authentication backend that keeps the logged-in User in the cache.
+
+AuthenticationMiddleware otherwise loads the user from the database on
+every request. Entries are dropped by journal.signals whenever a User is
+saved or deleted, so a password change, a deactivation or a new login is
+seen on the very next request. That only holds when every worker shares the
+cache, so settings list this backend only when REDIS_URL is set.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from django.db import transaction
+
+
+def user_cache_key(user_id):
+    return f'journal:auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    """Drop the cached user now and again once the transaction commits."""
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    # A request reading the old row before the commit may have cached it
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(
+            request, username=username, password=password, **kwargs
+        )
+        if user is None and password is not None:
+            # ModelBackend is listed after this backend only for sessions
+            # that logged in through it; stop it hashing the password again
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+        return user if self.user_can_authenticate(user) else None
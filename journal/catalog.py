@@ -0,0 +1,95 @@
+"""
+Process-local cache of the active DescentType catalog.
+
+Every worker keeps its own copy, tagged with a version number kept in a
+Counter row. Saving or deleting a DescentType bumps the number in the same
+transaction and drops the local copy straight away; other workers compare
+their copy's version with the stored one at most every ``max_age`` seconds
+and reload when it has moved. Reads in between cost no queries.
+"""
+import copy
+import threading
+import time
+
+from django.db.models import F
+
+from .models import Counter, DescentType
+
+
+VERSION_COUNTER = 'descent_type_catalog'
+
+
+def stored_version():
+    return Counter.objects.filter(name=VERSION_COUNTER).values_list(
+        'value', flat=True
+    ).first() or 0
+
+
+class DescentTypeCatalog:
+    def __init__(self, max_age=5):
+        self.max_age = max_age
+        self._version = None
+        self._checked_at = None
+        self._types = ()
+        self._by_pk = {}
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at < self.max_age
+        )
+
+    def _load(self):
+        with self._lock:
+            if self._is_fresh():
+                return self._types, self._by_pk
+        version = stored_version()
+        with self._lock:
+            if version == self._version:
+                self._checked_at = time.monotonic()
+                return self._types, self._by_pk
+        types = tuple(DescentType.objects.filter(is_active=True).order_by('name'))
+        by_pk = {descent_type.pk: descent_type for descent_type in types}
+        with self._lock:
+            self._types, self._by_pk, self._version = types, by_pk, version
+            self._checked_at = time.monotonic()
+        return types, by_pk
+
+    def active(self):
+        """Active descent types ordered by name. Treat them as read-only."""
+        return self._load()[0]
+
+    def get(self, pk):
+        """A copy of the active descent type ``pk``, or None."""
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        descent_type = self._load()[1].get(pk)
+        return copy.copy(descent_type) if descent_type is not None else None
+
+    def clear(self):
+        """Forget this process's copy; the next read reloads it."""
+        with self._lock:
+            self._version = None
+            self._checked_at = None
+            self._types = ()
+            self._by_pk = {}
+
+    def publish(self):
+        """
+        Bump the stored version, as part of the current transaction, so
+        every worker reloads.
+        """
+        updated = Counter.objects.filter(name=VERSION_COUNTER).update(
+            value=F('value') + 1
+        )
+        if not updated:
+            Counter.objects.get_or_create(
+                name=VERSION_COUNTER, defaults={'value': 1}
+            )
+        self.clear()
+
+
+descent_types = DescentTypeCatalog()
@@ -0,0 +1,136 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    ACTIVE_STATUSES, ArchivedSession, Counter, DescentSession, DescentType, Entry,
+)
+
+
+STATS_CACHE_KEY = 'journal:dashboard-stats'
+STATS_CACHE_TIMEOUT = 300
+
+# Counter name -> the exact count it mirrors, used for reconciliation
+COUNTED = {
+    'total_users': lambda: User.objects.count(),
+    'total_sessions': lambda: DescentSession.objects.count(),
+    'active_sessions': lambda: DescentSession.objects.filter(
+        status__in=ACTIVE_STATUSES
+    ).count(),
+    # Archived entries still count; they are only stored elsewhere
+    'total_entries': lambda: Entry.objects.count() + (
+        ArchivedSession.objects.aggregate(total=Sum('entry_count'))['total'] or 0
+    ),
+    'total_descent_types': lambda: DescentType.objects.count(),
+}
+
+# Counters written by every entry insert and delete are spread over this
+# many rows, so concurrent writers rarely wait on the same row lock. Shard
+# 0 keeps the plain name; the others are stored as "name:N".
+SHARDS = {'total_entries': 8}
+
+
+def shard_names(name):
+    return [name] + [f'{name}:{n}' for n in range(1, SHARDS.get(name, 1))]
+
+
+def _invalidate_stats():
+    cache.delete(STATS_CACHE_KEY)
+
+
+def adjust(name, delta):
+    """Add ``delta`` to a counter as part of the current transaction."""
+    if not delta:
+        return
+    # Fall back to shard 0 if the chosen shard row has not been created yet
+    for shard in dict.fromkeys((random.choice(shard_names(name)), name)):
+        updated = Counter.objects.filter(name=shard).update(
+            value=F('value') + delta, updated_at=timezone.now()
+        )
+        if updated:
+            break
+    if not updated:
+        # First write since the counters were created: seed it exactly
+        reconcile([name])
+    transaction.on_commit(_invalidate_stats)
+
+
+def session_removal_deltas(sessions):
+    """
+    Counter deltas for deleting ``sessions`` along with their entries, read
+    in one query before a cascade takes them away.
+    """
+    totals = sessions.aggregate(
+        sessions=Count('pk'),
+        active=Count('pk', filter=Q(status__in=ACTIVE_STATUSES)),
+        entries=Sum('entry_count'),
+    )
+    return {
+        'total_sessions': -totals['sessions'],
+        'active_sessions': -totals['active'],
+        'total_entries': -(totals['entries'] or 0),
+    }
+
+
+def read_stats():
+    """Every dashboard statistic, summed from the counters table."""
+    stats = dict.fromkeys(COUNTED, 0)
+    names = [shard for name in COUNTED for shard in shard_names(name)]
+    rows = Counter.objects.filter(name__in=names).values_list('name', 'value')
+    for shard, value in rows:
+        stats[shard.partition(':')[0]] += value
+    return stats
+
+
+def get_dashboard_stats():
+    """
+    Return every dashboard statistic, read from the counters table through
+    the cache. Shared by the dashboard view and its template tags.
+
+    Without a shared cache (``SHARED_CACHE``) each worker would keep its own
+    copy that only its own writes invalidate, so the counters are read
+    directly instead; it is one small indexed query.
+    """
+    if not getattr(settings, 'SHARED_CACHE', False):
+        return read_stats()
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = read_stats()
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def reconcile(names=None):
+    """
+    Reset counters to exact counts. Returns ``{name: (old, new)}`` for every
+    counter whose stored value had drifted.
+    """
+    drifted = {}
+    with transaction.atomic():
+        for name in names or COUNTED:
+            actual = COUNTED[name]()
+            shards = {
+                counter.name: counter
+                for counter in Counter.objects.select_for_update().filter(
+                    name__in=shard_names(name)
+                )
+            }
+            stored = sum(counter.value for counter in shards.values())
+            if name not in shards or stored != actual:
+                drifted[name] = (stored if shards else None, actual)
+            # The exact count goes in shard 0, the rest start again from 0
+            for shard in shard_names(name):
+                value = actual if shard == name else 0
+                counter = shards.get(shard)
+                if counter is None:
+                    Counter.objects.create(name=shard, value=value)
+                elif counter.value != value:
+                    counter.value = value
+                    counter.save()
+        transaction.on_commit(_invalidate_stats)
+    return drifted
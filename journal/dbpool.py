@@ -0,0 +1,148 @@
+"""
+Per-worker database connection statistics.
+
+Every worker counts the connections it checks out for requests, how many
+of those had to wait for a free pooled connection, and how many new
+connections it had to open. When DB_POOL is ``pool`` the figures come from
+psycopg's pool; otherwise RequestTimingMiddleware counts the requests that
+ran a query and ``connection_created`` (wired up in journal.signals) the
+connections opened.
+
+Every ``PUBLISH_INTERVAL`` seconds the worker writes its figures to one of
+``MAX_WORKERS`` slots in the shared cache, claimed with an atomic
+``cache.add``; ``collect()`` reads every slot for the dashboard and the
+``db_pool_stats`` command. Without a shared cache (``SHARED_CACHE``) other
+processes can't see the figures, so ``collect()`` only reports this one.
+"""
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+PUBLISH_INTERVAL = 10
+
+# Slots expire when their worker stops publishing
+SLOT_TIMEOUT = PUBLISH_INTERVAL * 6
+
+MAX_WORKERS = 256
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def slot_key(slot):
+    return f'journal:dbpool:slot:{slot}'
+
+
+def shared():
+    return getattr(settings, 'SHARED_CACHE', False)
+
+
+class ConnectionStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.connects = 0
+        self.started = time.time()
+        self._published_at = 0
+        self._slot = None
+        self._lock = threading.Lock()
+
+    def checked_out(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def connected(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self):
+        """This worker's figures as a plain dict."""
+        pool = getattr(connections['default'], 'pool', None)
+        stats = {
+            'worker': worker_id(),
+            'mode': getattr(settings, 'DB_POOL', 'off'),
+            'vendor': connections['default'].vendor,
+            'uptime': round(time.time() - self.started),
+            'updated_at': time.time(),
+        }
+        if pool is not None:
+            pool_stats = pool.get_stats()
+            stats.update({
+                'checkouts': pool_stats.get('requests_num', 0),
+                'waits': pool_stats.get('requests_queued', 0),
+                'wait_ms': pool_stats.get('requests_wait_ms', 0),
+                'timeouts': pool_stats.get('requests_errors', 0),
+                'reconnects': pool_stats.get('connections_num', 0),
+                'lost': pool_stats.get('connections_lost', 0)
+                + pool_stats.get('returns_bad', 0),
+                'size': pool_stats.get('pool_size', 0),
+                'available': pool_stats.get('pool_available', 0),
+            })
+        else:
+            # Without a pool nothing ever waits; every connection opened
+            # beyond the first per thread is a reconnect
+            with self._lock:
+                stats.update({
+                    'checkouts': self.checkouts,
+                    'waits': 0,
+                    'wait_ms': 0,
+                    'timeouts': 0,
+                    'reconnects': self.connects,
+                    'lost': 0,
+                    'size': None,
+                    'available': None,
+                })
+        return stats
+
+    def publish(self, force=False):
+        """Write the snapshot to the cache, at most every PUBLISH_INTERVAL."""
+        if not shared():
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._published_at < PUBLISH_INTERVAL:
+                return
+            self._published_at = now
+        stats = self.snapshot()
+        slot = self._slot
+        if slot is not None:
+            current = cache.get(slot_key(slot))
+            if current is not None and current['worker'] == stats['worker']:
+                cache.set(slot_key(slot), stats, SLOT_TIMEOUT)
+                return
+            if current is None and cache.add(slot_key(slot), stats, SLOT_TIMEOUT):
+                return
+        # First publish, or the slot expired and another worker took it
+        for slot in range(MAX_WORKERS):
+            if cache.add(slot_key(slot), stats, SLOT_TIMEOUT):
+                self._slot = slot
+                return
+        self._slot = None
+
+
+stats = ConnectionStats()
+
+
+def collect():
+    """
+    The latest figures of every worker that published recently, busiest
+    first. Workers that stopped publishing drop out of the list.
+    """
+    if shared():
+        found = cache.get_many([slot_key(slot) for slot in range(MAX_WORKERS)])
+        live = list(found.values())
+    else:
+        live = [stats.snapshot()]
+    return sorted(live, key=lambda row: row['checkouts'], reverse=True)
+
+
+def totals(rows):
+    """Sum the counters of ``collect()`` rows."""
+    fields = ('checkouts', 'waits', 'wait_ms', 'timeouts', 'reconnects', 'lost')
+    return {field: sum(row[field] for row in rows) for field in fields}
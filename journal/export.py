@@ -0,0 +1,185 @@
+"""
+Streaming personal data export.
+
+Sessions and entries are read through ``iterator(chunk_size=...)`` (server
+side cursors on PostgreSQL) and merged in order, so an export holds at most
+one chunk of each in memory however long the user's history is. Entries
+of archived sessions are unpacked from the archive as their session comes
+up. Every
+format is produced as an iterator of chunks suitable for
+``StreamingHttpResponse`` or for writing straight to a file.
+"""
+import csv
+import io
+import json
+import zipfile
+
+from django.utils import timezone
+
+from . import archive
+from .models import ArchivedSession, DescentSession, Entry
+
+
+CHUNK_SIZE = 2000
+
+SESSION_FIELDS = [
+    'id', 'descent_type', 'status', 'started_at', 'completed_at',
+    'abandoned_at', 'notes',
+]
+ENTRY_FIELDS = [
+    'id', 'session_id', 'timestamp', 'emotion_level', 'content', 'reflection',
+]
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'csv': ('text/csv', 'csv'),
+    'zip': ('application/zip', 'zip'),
+}
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def iter_records(user, chunk_size=CHUNK_SIZE):
+    """
+    Yield ``('session', row)`` and ``('entry', row)`` pairs for ``user``,
+    each session immediately followed by its entries in the order written.
+    """
+    sessions = (
+        DescentSession.objects.filter(user=user)
+        .order_by('pk')
+        .values(
+            'id', 'descent_type__name', 'status', 'started_at',
+            'completed_at', 'abandoned_at', 'notes',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    entries = (
+        Entry.objects.filter(session__user=user)
+        .order_by('session_id', 'timestamp', 'pk')
+        .values(*ENTRY_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    archives = (
+        ArchivedSession.objects.filter(session__user=user)
+        .order_by('session_id')
+        .values_list('session_id', 'data')
+        .iterator(chunk_size=100)
+    )
+
+    entry = next(entries, None)
+    archived = next(archives, None)
+    for session in sessions:
+        yield 'session', {
+            'id': session['id'],
+            'descent_type': session['descent_type__name'],
+            'status': session['status'],
+            'started_at': _isoformat(session['started_at']),
+            'completed_at': _isoformat(session['completed_at']),
+            'abandoned_at': _isoformat(session['abandoned_at']),
+            'notes': session['notes'],
+        }
+        if archived is not None and archived[0] == session['id']:
+            for fields in archive.unpack(archived[1]):
+                row = dict(
+                    fields,
+                    session_id=session['id'],
+                    timestamp=_isoformat(fields['timestamp']),
+                )
+                yield 'entry', {name: row[name] for name in ENTRY_FIELDS}
+            archived = next(archives, None)
+        while entry is not None and entry['session_id'] == session['id']:
+            yield 'entry', dict(entry, timestamp=_isoformat(entry['timestamp']))
+            entry = next(entries, None)
+
+
+def jsonl_chunks(user):
+    """One JSON object per line, tagged with its ``type``."""
+    for kind, row in iter_records(user):
+        yield json.dumps({'type': kind, **row}) + '\n'
+
+
+class _Echo:
+    """Pseudo-buffer handing csv.writer output straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(user):
+    """
+    One row per entry carrying its session's columns; sessions without
+    entries get a single row with the entry columns left blank.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(
+        [f'session_{name}' for name in SESSION_FIELDS]
+        + [f'entry_{name}' for name in ENTRY_FIELDS if name != 'session_id']
+    )
+    entry_columns = [name for name in ENTRY_FIELDS if name != 'session_id']
+    session = None
+    has_entries = False
+
+    for kind, row in iter_records(user):
+        if kind == 'session':
+            if session is not None and not has_entries:
+                yield writer.writerow(session + [''] * len(entry_columns))
+            session = [row[name] for name in SESSION_FIELDS]
+            has_entries = False
+        else:
+            has_entries = True
+            yield writer.writerow(session + [row[name] for name in entry_columns])
+
+    if session is not None and not has_entries:
+        yield writer.writerow(session + [''] * len(entry_columns))
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink collecting what zipfile writes to it."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_chunks(user):
+    """A zip archive holding both the JSON Lines and the CSV export."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in (
+            ('journal.jsonl', jsonl_chunks(user)),
+            ('journal.csv', csv_chunks(user)),
+        ):
+            info = zipfile.ZipInfo(name, date_time=timezone.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk.encode())
+                    data = buffer.drain()
+                    if data:
+                        yield data
+    yield buffer.drain()
+
+
+def export_chunks(user, export_format):
+    """Chunks of ``user``'s export in ``export_format`` (see FORMATS)."""
+    if export_format == 'jsonl':
+        return (chunk.encode() for chunk in jsonl_chunks(user))
+    if export_format == 'csv':
+        return (chunk.encode() for chunk in csv_chunks(user))
+    if export_format == 'zip':
+        return zip_chunks(user)
+    raise ValueError(f'Unknown export format: {export_format}')
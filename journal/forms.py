@@ -1,6 +1,7 @@
 from django import forms
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 from django.utils.translation import gettext_lazy as _
+from . import catalog
 from .models import DescentType, DescentSession, Entry
 
 
@@ -55,15 +56,61 @@ class DescentTypeForm(forms.ModelForm):
                 raise forms.ValidationError(_('Name must be at least 3 characters long'))
             return name.strip()
         
+class CatalogChoiceIterator(forms.models.ModelChoiceIterator):
+    """Choices from the cached descent type catalog instead of a queryset."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for descent_type in catalog.descent_types.active():
+            yield self.choice(descent_type)
+
+    def __len__(self):
+        return len(catalog.descent_types.active()) + (
+            1 if self.field.empty_label is not None else 0
+        )
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(
+            catalog.descent_types.active()
+        )
+
+
+class ActiveDescentTypeField(forms.ModelChoiceField):
+    """Active descent types, rendered and validated without a query."""
+    iterator = CatalogChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            queryset=DescentType.objects.filter(is_active=True), **kwargs
+        )
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        descent_type = catalog.descent_types.get(value)
+        if descent_type is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice'
+            )
+        return descent_type
+
+
 class DescentSessionForm(BaseForm):
+    descent_type = ActiveDescentTypeField(
+        widget=forms.Select(attrs={
+            'class': 'form-select',
+            'aria_label': 'Select descent type',
+        }),
+        error_messages={
+            'required': 'Please select a descent type',
+        },
+    )
+
     class Meta:
         model = DescentSession
         fields = ['descent_type', 'notes']
         widgets = {
-            'descent_type': forms.Select(attrs={
-                'class': 'form-select',
-                'aria_label': 'Select descent type',
-            }), 
             'notes': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 3,
@@ -71,20 +118,10 @@ class DescentSessionForm(BaseForm):
                 'area-label': 'Session notes',
             }),
         }
-        error_messages = {
-            'descent_type': {
-                'required': 'Please select a descent type',
-            },
-        }
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-        # Filter active descent types
-        self.fields['descent_type'].queryset = DescentType.objects.filter(
-            is_active=True
-        ).order_by('name')
-
         # Add form control class to all fields
         for field_name, field in self.fields.items():
             if 'class' not in field.widget.attrs:
@@ -146,3 +183,72 @@ class EntryForm(BaseForm):
         if len(content) < 10:
             raise forms.ValidationError(_('Please provide more details (at least 10 characters)'))
         return content
+
+
+class PreloadedEntryField(forms.ModelChoiceField):
+    """Hidden entry id resolved from already-loaded entries, without a query."""
+
+    def __init__(self, entries, **kwargs):
+        self.entries = entries
+        super().__init__(queryset=Entry.objects.none(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.entries[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice'
+            )
+
+
+class BaseEntryFormSet(forms.BaseModelFormSet):
+    """Edits every entry of a session in one validated, bulk-saved batch."""
+    fields_to_update = ['content', 'emotion_level', 'reflection']
+
+    def get_queryset(self):
+        # An archived session's entries are unsaved instances read from its
+        # archive, keeping their ids (see archive.session_entries)
+        if isinstance(self.queryset, list):
+            return self.queryset
+        return super().get_queryset()
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        # The default id field runs a SELECT per form to validate itself
+        if not hasattr(self, '_entries_by_pk'):
+            self._entries_by_pk = {
+                entry.pk: entry for entry in self.get_queryset()
+            }
+        pk_name = self.model._meta.pk.name
+        default = form.fields[pk_name]
+        form.fields[pk_name] = PreloadedEntryField(
+            self._entries_by_pk,
+            required=False,
+            widget=default.widget,
+            initial=default.initial,
+        )
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        # Older entries may predate EntryForm's rules (continue_descent takes
+        # any content); only the entries being edited are held to them
+        if i < self.initial_form_count():
+            form.empty_permitted = True
+        return form
+
+    def changed_entries(self):
+        """Entries whose submitted values differ from what was loaded."""
+        return [
+            form.instance for form in self.initial_forms
+            if form.instance.pk is not None and form.has_changed()
+        ]
+
+
+EntryFormSet = forms.modelformset_factory(
+    Entry,
+    form=EntryForm,
+    formset=BaseEntryFormSet,
+    extra=0,
+)
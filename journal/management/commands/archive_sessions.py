@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from journal import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the entries of completed and abandoned sessions older than '
+        'ARCHIVE_AFTER_DAYS into compressed cold storage, a batch of '
+        'sessions per transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Archive sessions started more than this many days ago '
+                 '(default: ARCHIVE_AFTER_DAYS).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of sessions archived per transaction.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Seconds to sleep between batches.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many sessions would be archived.',
+        )
+
+    def handle(self, *args, **options):
+        age = (
+            timedelta(days=options['days']) if options['days'] is not None
+            else archive.archive_after()
+        )
+        sessions = archive.candidates(timezone.now() - age).order_by('pk')
+        if options['dry_run']:
+            self.stdout.write(f'{sessions.count()} sessions would be archived.')
+            return
+
+        batch_size = max(1, options['batch_size'])
+        last_pk = 0
+        totals = [0, 0]
+        while True:
+            batch = list(
+                sessions.filter(pk__gt=last_pk)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            archived = archive.archive_sessions(batch)
+            totals = [total + count for total, count in zip(totals, archived)]
+            last_pk = batch[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f'Archived {totals[0]} sessions (up to pk {last_pk})'
+                )
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {totals[0]} sessions and {totals[1]} entries.'
+        ))
@@ -0,0 +1,93 @@
+import copy
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from journal import timing, views
+from journal.management.commands.bench_views import get_user, percentile
+
+
+# (template, view rendering it)
+PAGES = [
+    ('journal/journal_history.html', views.journal_history),
+    ('journal/admin_dashboard.html', views.admin_dashboard),
+]
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def template_settings(cached):
+    """settings.TEMPLATES with the cached loader, or with plain loaders."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    for backend in templates:
+        backend['APP_DIRS'] = False
+        backend['OPTIONS']['loaders'] = (
+            [('django.template.loaders.cached.Loader', PLAIN_LOADERS)]
+            if cached else PLAIN_LOADERS
+        )
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Render journal_history.html and admin_dashboard.html through their '
+        'views with plain template loaders (every render re-reads and '
+        're-parses the template and its includes) and with the cached loader, '
+        'and compare the time spent rendering.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Username to render as (default: the user with most sessions).',
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        user = get_user(options['user'])
+        iterations = max(2, options['iterations'])
+        factory = RequestFactory()
+
+        self.stdout.write(
+            f"{'template':<32} {'loader':<8} {'render p50':>10} "
+            f"{'render p95':>10} {'total p50':>10} {'speedup':>8}"
+        )
+        for name, view in PAGES:
+            results = {}
+            for cached in (False, True):
+                with override_settings(TEMPLATES=template_settings(cached)):
+                    # One untimed render, as a warmed-up worker would have done
+                    self.render(factory, user, view)
+                    runs = [
+                        self.render(factory, user, view) for _ in range(iterations)
+                    ]
+                template_ms = sorted(run[0] for run in runs)
+                total_ms = sorted(run[1] for run in runs)
+                results[cached] = statistics.median(template_ms)
+                speedup = (
+                    f'{results[False] / results[True]:.2f}x'
+                    if cached and results[True] else ''
+                )
+                self.stdout.write(
+                    f"{name:<32} {'cached' if cached else 'plain':<8} "
+                    f"{results[cached]:>10.3f} "
+                    f"{percentile(template_ms, 0.95):>10.3f} "
+                    f"{statistics.median(total_ms):>10.3f} {speedup:>8}"
+                )
+
+    def render(self, factory, user, view):
+        """Run ``view``; returns (template ms, total ms)."""
+        request = factory.get('/')
+        request.user = user
+        timings, token = timing.start()
+        try:
+            view(request)
+        finally:
+            timing.stop(token)
+        return timings.template_time * 1000, timings.elapsed() * 1000
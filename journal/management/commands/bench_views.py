@@ -0,0 +1,208 @@
+import json
+import re
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from journal.models import DescentType, Entry
+
+
+NAMESPACES = ('journal', 'accounts')
+
+
+def iter_routes(namespaces=NAMESPACES):
+    """Yield ``(namespace, pattern)`` for every named route in ``namespaces``."""
+    for resolver in get_resolver().url_patterns:
+        if isinstance(resolver, URLResolver) and resolver.namespace in namespaces:
+            for pattern in resolver.url_patterns:
+                if isinstance(pattern, URLPattern) and pattern.name:
+                    yield resolver.namespace, pattern
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def get_user(username=None):
+    """The user called ``username``, or else the one with most sessions."""
+    if username:
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'User "{username}" does not exist.')
+    user = (
+        User.objects.annotate(sessions=Count('descentsession'))
+        .order_by('-sessions', 'pk')
+        .first()
+    )
+    if user is None:
+        raise CommandError('No users to benchmark as; run seed_load first.')
+    return user
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive every journal and accounts route through the test client and '
+        'report latency percentiles, query counts and allocated memory. '
+        'Each request runs in a transaction that is rolled back, so routes '
+        'that write (or delete) leave the data untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Username to browse as (default: the user with most sessions).',
+        )
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--filter', help='Only benchmark routes whose name matches this regex.',
+        )
+        parser.add_argument(
+            '--json', metavar='PATH',
+            help='Also write the results as JSON to PATH ("-" for stdout).',
+        )
+
+    def handle(self, *args, **options):
+        user = get_user(options['user'])
+        fixtures = self.get_fixtures(user)
+        iterations = max(2, options['iterations'])
+        client = Client(raise_request_exception=False)
+
+        results = []
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for namespace, pattern in iter_routes():
+                name = f'{namespace}:{pattern.name}'
+                if options['filter'] and not re.search(options['filter'], name):
+                    continue
+                url = self.route_url(name, pattern, fixtures)
+                if url is None:
+                    self.stderr.write(f'Skipping {name}: no data to fill its URL.')
+                    continue
+                results.append(self.bench(
+                    client, user, name, url, iterations, options['warmup']
+                ))
+
+        if options['json'] != '-':
+            self.write_table(results)
+        if options['json']:
+            report = {
+                'generated_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'user': user.username,
+                'iterations': iterations,
+                'views': results,
+            }
+            if options['json'] == '-':
+                self.stdout.write(json.dumps(report, indent=2))
+            else:
+                with open(options['json'], 'w') as output:
+                    json.dump(report, output, indent=2)
+
+    def get_fixtures(self, user):
+        """Pick the user's busiest session and one of its entries for URLs."""
+        entry = (
+            Entry.objects.filter(session__user=user)
+            .order_by('-session__entry_count', '-timestamp')
+            .first()
+        )
+        return {
+            'session': entry.session_id if entry else None,
+            'entry': entry.pk if entry else None,
+            'descent_type': DescentType.objects.values_list(
+                'pk', flat=True
+            ).first(),
+        }
+
+    def route_url(self, name, pattern, fixtures):
+        kwargs = {}
+        for argument in pattern.pattern.converters:
+            if argument == 'entry_id':
+                value = fixtures['entry']
+            elif 'descent-type' in str(pattern.pattern):
+                value = fixtures['descent_type']
+            else:
+                value = fixtures['session']
+            if value is None:
+                return None
+            kwargs[argument] = value
+        return reverse(name, kwargs=kwargs)
+
+    def request(self, client, user, url, trace_memory=False):
+        """
+        GET ``url`` as ``user``; returns (seconds, queries, status, peak
+        bytes allocated or None unless ``trace_memory``).
+        """
+        peak = None
+        with transaction.atomic():
+            # The last session row was rolled back (though it may still be
+            # cached), so start from a fresh one
+            client.cookies.clear()
+            client.force_login(user)
+            if trace_memory:
+                tracemalloc.start()
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    if response.streaming:
+                        for chunk in response.streaming_content:
+                            pass
+                    elapsed = time.perf_counter() - started
+                if trace_memory:
+                    peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                if trace_memory:
+                    tracemalloc.stop()
+            transaction.set_rollback(True)
+        return elapsed, len(queries), response.status_code, peak
+
+    def bench(self, client, user, name, url, iterations, warmup):
+        for _ in range(warmup):
+            self.request(client, user, url)
+
+        timings = []
+        query_counts = []
+        for _ in range(iterations):
+            elapsed, queries, status, _ = self.request(client, user, url)
+            timings.append(elapsed * 1000)
+            query_counts.append(queries)
+
+        # Tracing slows everything down, so memory gets a pass of its own
+        peak = self.request(client, user, url, trace_memory=True)[3]
+
+        timings.sort()
+        return {
+            'name': name,
+            'url': url,
+            'status': status,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': max(query_counts),
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def write_table(self, results):
+        self.stdout.write(
+            f"{'view':<32} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} "
+            f"{'p99 ms':>9} {'queries':>7} {'peak KiB':>9}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['name']:<32} {row['status']:>6} {row['p50_ms']:>9.2f} "
+                f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+                f"{row['queries']:>7} {row['peak_kib']:>9.1f}"
+            )
@@ -0,0 +1,60 @@
+import json
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from whitenoise.compress import Compressor
+
+from journal import assets
+
+
+class Command(BaseCommand):
+    help = (
+        'Concatenate and minify the site CSS and JS into fingerprinted '
+        'bundles with gzip and brotli variants under STATIC_ROOT/bundles, '
+        'for base.html to load. Run it after collectstatic.'
+    )
+
+    def handle(self, *args, **options):
+        output_dir = os.path.join(settings.STATIC_ROOT, assets.OUTPUT_DIR)
+        os.makedirs(output_dir, exist_ok=True)
+        compressor = Compressor(quiet=True)
+        manifest = {}
+
+        for name, sources in assets.BUNDLES.items():
+            minify = assets.MINIFIERS[os.path.splitext(name)[1]]
+            parts = []
+            original = 0
+            for source in sources:
+                path = finders.find(source)
+                if path is None:
+                    raise CommandError(f'{name}: static file {source} not found.')
+                with open(path, encoding='utf-8') as source_file:
+                    text = source_file.read()
+                original += len(text.encode())
+                parts.append(text)
+            content = minify('\n'.join(parts)).encode()
+
+            built = assets.hashed_name(name, content)
+            path = os.path.join(settings.STATIC_ROOT, built)
+            with open(path, 'wb') as output:
+                output.write(content)
+            variants = compressor.compress(path)
+            manifest[name] = built
+
+            sizes = ', '.join(
+                f'{os.path.splitext(variant)[1][1:]} {os.path.getsize(variant)}'
+                for variant in variants
+            )
+            self.stdout.write(
+                f'{built}: {len(sources)} files, {original} -> {len(content)} bytes'
+                + (f' ({sizes})' if sizes else '')
+            )
+
+        # Stale bundles from earlier builds are left in place, so pages
+        # cached with the old names keep working until they expire
+        with open(assets.manifest_path(), 'w') as output:
+            json.dump(manifest, output, indent=2)
+        assets.reset_manifest()
+        self.stdout.write(self.style.SUCCESS(f'Built {len(manifest)} bundles.'))
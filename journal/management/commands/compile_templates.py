@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Template, TemplateSyntaxError, engines
+from django.template.base import Origin
+
+from journal.warmup import iter_template_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile every template under templates/ and the project apps\' '
+        'templates/ directories, failing on the first deploy step that '
+        'would otherwise ship a syntax error.'
+    )
+
+    def handle(self, *args, **options):
+        failures = []
+        compiled = 0
+        for backend in engines.all():
+            engine = backend.engine
+            for name, path in iter_template_names():
+                # Parse each file itself, so a template shadowed by another
+                # of the same name is still checked
+                origin = Origin(str(path), template_name=name)
+                try:
+                    Template(path.read_text(encoding='utf-8'), origin, name, engine)
+                    # Fill the cached loader too, for whatever runs next
+                    engine.get_template(name)
+                except TemplateSyntaxError as error:
+                    failures.append(f'{path}: {error}')
+                    continue
+                compiled += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Compiled {name}')
+
+        if failures:
+            raise CommandError(
+                f'{len(failures)} templates failed to compile:\n'
+                + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(f'Compiled {compiled} templates.'))
@@ -0,0 +1,61 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from journal import dbpool
+
+
+class Command(BaseCommand):
+    help = (
+        'Show the database connection figures each web worker last '
+        'published: checkouts, waits for a pooled connection and reconnects.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true', help='Print the figures as JSON.',
+        )
+
+    def handle(self, *args, **options):
+        if not dbpool.shared():
+            self.stderr.write(self.style.WARNING(
+                'Workers only share their figures through a shared cache '
+                '(set REDIS_URL); showing this process alone.'
+            ))
+        rows = dbpool.collect()
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'workers': rows, 'totals': dbpool.totals(rows)}, indent=2
+            ))
+            return
+        if not rows:
+            self.stdout.write(
+                'No worker has published connection stats yet. Workers '
+                'publish after serving a request, through the shared cache.'
+            )
+            return
+
+        self.stdout.write(
+            f"{'worker':<28} {'mode':<10} {'checkouts':>9} {'waits':>6} "
+            f"{'wait ms':>8} {'timeouts':>8} {'reconnects':>10} {'lost':>5} "
+            f"{'pool':>7} {'age s':>6}"
+        )
+        now = time.time()
+        for row in rows:
+            pool = (
+                f"{row['available']}/{row['size']}"
+                if row['size'] is not None else '-'
+            )
+            self.stdout.write(
+                f"{row['worker']:<28} {row['mode']:<10} {row['checkouts']:>9} "
+                f"{row['waits']:>6} {row['wait_ms']:>8} {row['timeouts']:>8} "
+                f"{row['reconnects']:>10} {row['lost']:>5} {pool:>7} "
+                f"{round(now - row['updated_at']):>6}"
+            )
+        total = dbpool.totals(rows)
+        self.stdout.write(
+            f"{'total':<28} {'':<10} {total['checkouts']:>9} {total['waits']:>6} "
+            f"{total['wait_ms']:>8} {total['timeouts']:>8} "
+            f"{total['reconnects']:>10} {total['lost']:>5}"
+        )
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from journal import export
+
+
+class Command(BaseCommand):
+    help = "Stream a user's complete journal export to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Username or id of the user to export.')
+        parser.add_argument(
+            '--format', choices=sorted(export.FORMATS), default='jsonl',
+            help='Export format (default: jsonl).',
+        )
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='File to write to, or - for stdout (default).',
+        )
+
+    def handle(self, *args, **options):
+        lookup = options['user']
+        try:
+            if lookup.isdigit():
+                user = User.objects.get(pk=lookup)
+            else:
+                user = User.objects.get(username=lookup)
+        except User.DoesNotExist:
+            raise CommandError(f'User "{lookup}" does not exist.')
+
+        chunks = export.export_chunks(user, options['format'])
+        if options['output'] == '-':
+            if options['format'] == 'zip':
+                raise CommandError('Zip exports must be written with --output.')
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+            return
+
+        written = 0
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {user.username} to {options["output"]} ({written} bytes).'
+        ))
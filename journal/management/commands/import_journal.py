@@ -0,0 +1,323 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from journal import counters, rollups, summaries
+from journal.models import (
+    ACTIVE_STATUSES, Counter, DescentSession, DescentType, Entry,
+)
+
+
+SESSION_STATUSES = {value for value, label in DescentSession.STATUS_CHOICES}
+
+
+def import_marker(checkpoint_path):
+    """
+    Name of the Counter row holding the last line an import committed. It
+    is written in the same transaction as each batch, so it says which
+    checkpoint records belong to committed batches.
+    """
+    digest = hashlib.sha1(os.path.abspath(checkpoint_path).encode()).hexdigest()
+    return f'import:{digest[:16]}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import sessions and entries from a JSON Lines journal export '
+        '(see export_journal) into an existing user.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON Lines file to import.')
+        parser.add_argument('user', help='Username or id to import into.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows inserted per transaction (default: 5000).',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <path>.checkpoint).',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continue from the checkpoint left by an interrupted import.',
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help="Don't use PostgreSQL COPY for entries, even when available.",
+        )
+
+    def handle(self, *args, **options):
+        self.user = self.get_user(options['user'])
+        self.batch_size = max(1, options['batch_size'])
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        self.checkpoint_path = (
+            options['checkpoint'] or f"{options['path']}.checkpoint"
+        )
+        self.marker = import_marker(self.checkpoint_path)
+        self.verbosity = options['verbosity']
+
+        state = self.load_checkpoint(options['resume'])
+        self.session_ids = {int(old): new for old, new in state['sessions'].items()}
+        self.line_number = state['line']
+        self.stats = {'sessions': 0, 'entries': 0, 'invalid': 0, 'types_created': 0}
+        self.descent_types = dict(DescentType.objects.values_list('name', 'pk'))
+        self.pending_sessions = []
+        self.pending_entries = []
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], encoding='utf-8') as source:
+                for number, line in enumerate(source, start=1):
+                    if number <= state['line']:
+                        continue
+                    self.line_number = number
+                    self.read_line(line)
+                    if (
+                        len(self.pending_entries) >= self.batch_size
+                        or len(self.pending_sessions) >= self.batch_size
+                    ):
+                        self.flush()
+            self.flush()
+        except FileNotFoundError:
+            raise CommandError(f"No such file: {options['path']}")
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        Counter.objects.filter(name=self.marker).delete()
+        self.report(time.monotonic() - started)
+
+    def get_user(self, lookup):
+        try:
+            if lookup.isdigit():
+                return User.objects.get(pk=lookup)
+            return User.objects.get(username=lookup)
+        except User.DoesNotExist:
+            raise CommandError(f'User "{lookup}" does not exist.')
+
+    def load_checkpoint(self, resume):
+        """
+        The line to continue after and the sessions imported so far, from
+        the checkpoint: one JSON record appended per batch. Records are
+        written before their batch commits, so any past the line in the
+        import marker belong to a rolled back batch and are cut off.
+        """
+        state = {'line': 0, 'sessions': {}}
+        if not os.path.exists(self.checkpoint_path):
+            Counter.objects.filter(name=self.marker).delete()
+            return state
+        if not resume:
+            raise CommandError(
+                f'Checkpoint {self.checkpoint_path} exists from an earlier '
+                'import; pass --resume to continue it or delete it to start over.'
+            )
+        committed = Counter.objects.filter(name=self.marker).values_list(
+            'value', flat=True
+        ).first() or 0
+        trusted = 0
+        with open(self.checkpoint_path, 'rb') as checkpoint:
+            for line in checkpoint:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record['line'] > committed:
+                    break
+                state['line'] = record['line']
+                state['sessions'].update(record['sessions'])
+                trusted += len(line)
+        os.truncate(self.checkpoint_path, trusted)
+        return state
+
+    def save_checkpoint(self, sessions):
+        """Append this batch's record; called inside the batch's transaction."""
+        record = {
+            'line': self.line_number,
+            'sessions': {
+                str(source_id): session.pk
+                for source_id, descent_type, session in sessions
+            },
+        }
+        with open(self.checkpoint_path, 'a') as checkpoint:
+            checkpoint.write(json.dumps(record) + '\n')
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        Counter.objects.update_or_create(
+            name=self.marker, defaults={'value': self.line_number}
+        )
+
+    def invalid(self, reason):
+        self.stats['invalid'] += 1
+        if self.verbosity > 1:
+            self.stderr.write(f'Line {self.line_number}: {reason}')
+
+    def read_line(self, line):
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return self.invalid('not valid JSON')
+        if record.get('type') == 'session':
+            self.read_session(record)
+        elif record.get('type') == 'entry':
+            self.read_entry(record)
+        else:
+            self.invalid('unknown record type')
+
+    def read_session(self, record):
+        started_at = parse_datetime(record.get('started_at') or '')
+        if record.get('id') is None or started_at is None:
+            return self.invalid('session needs an id and started_at')
+        status = record.get('status')
+        if status not in SESSION_STATUSES:
+            status = 'STARTED'
+        descent_type = (record.get('descent_type') or 'Imported').strip()[:100]
+        self.pending_sessions.append((record['id'], descent_type, DescentSession(
+            user=self.user,
+            status=status,
+            started_at=started_at,
+            completed_at=parse_datetime(record.get('completed_at') or ''),
+            abandoned_at=parse_datetime(record.get('abandoned_at') or ''),
+            notes=record.get('notes') or '',
+        )))
+
+    def descent_type_id(self, name):
+        """
+        The id of the descent type called ``name``, creating an inactive one
+        if there is none. Called from ``flush``, so a created type commits
+        or rolls back with the batch that needs it.
+        """
+        if name not in self.descent_types:
+            descent_type, created = DescentType.objects.get_or_create(
+                name=name,
+                defaults={
+                    'description': 'Created while importing a journal.',
+                    'is_active': False,
+                },
+            )
+            self.descent_types[name] = descent_type.pk
+            self.stats['types_created'] += created
+        return self.descent_types[name]
+
+    def read_entry(self, record):
+        timestamp = parse_datetime(record.get('timestamp') or '')
+        if timestamp is None:
+            return self.invalid('entry needs a timestamp')
+        entry = Entry(
+            timestamp=timestamp,
+            content=record.get('content') or '',
+            emotion_level=record.get('emotion_level'),
+            reflection=record.get('reflection') or '',
+        )
+        # Only what the model requires: exports hold entries written before
+        # EntryForm's rules, which must still import
+        try:
+            entry.clean_fields(exclude=['session'])
+        except ValidationError as error:
+            return self.invalid(
+                '; '.join(f'{field}: {" ".join(errors)}'
+                          for field, errors in error.message_dict.items())
+            )
+        self.pending_entries.append((record.get('session_id'), entry))
+
+    def flush(self):
+        if not self.pending_sessions and not self.pending_entries:
+            return
+        with transaction.atomic():
+            sessions = self.insert_sessions()
+            entries = self.insert_entries()
+            summaries.refresh_sessions({entry.session_id for entry in entries})
+            rollups.refresh_entries(entries)
+            summaries.refresh_users([self.user.pk])
+            counters.adjust('total_sessions', len(sessions))
+            counters.adjust('active_sessions', sum(
+                session.status in ACTIVE_STATUSES for session in sessions
+            ))
+            counters.adjust('total_entries', len(entries))
+            self.save_checkpoint(self.pending_sessions)
+        self.pending_sessions = []
+        self.pending_entries = []
+        if self.verbosity > 1:
+            self.stdout.write(
+                f"Line {self.line_number}: {self.stats['sessions']} sessions, "
+                f"{self.stats['entries']} entries imported"
+            )
+
+    def insert_sessions(self):
+        sessions = []
+        for source_id, descent_type, session in self.pending_sessions:
+            session.descent_type_id = self.descent_type_id(descent_type)
+            sessions.append(session)
+        DescentSession.objects.bulk_create(sessions, batch_size=1000)
+        for source_id, descent_type, session in self.pending_sessions:
+            self.session_ids[source_id] = session.pk
+        self.stats['sessions'] += len(sessions)
+        return sessions
+
+    def insert_entries(self):
+        entries = []
+        for source_session, entry in self.pending_entries:
+            if source_session not in self.session_ids:
+                self.invalid(f'entry for unknown session {source_session}')
+                continue
+            entry.session_id = self.session_ids[source_session]
+            entries.append(entry)
+
+        if self.use_copy:
+            self.copy_entries(entries)
+        else:
+            Entry.objects.bulk_create(entries, batch_size=1000)
+        self.stats['entries'] += len(entries)
+        return entries
+
+    def copy_entries(self, entries):
+        """Stream entries into PostgreSQL with COPY instead of INSERTs."""
+        columns = ['session_id', 'timestamp', 'emotion_level', 'content', 'reflection']
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for entry in entries:
+            writer.writerow([
+                entry.session_id, entry.timestamp.isoformat(),
+                entry.emotion_level, entry.content, entry.reflection,
+            ])
+        buffer.seek(0)
+        sql = (
+            f'COPY {Entry._meta.db_table} ({", ".join(columns)}) '
+            'FROM STDIN WITH (FORMAT csv)'
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):
+                raw.copy_expert(sql, buffer)
+            else:
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def report(self, elapsed):
+        rows = self.stats['sessions'] + self.stats['entries']
+        rate = rows / elapsed if elapsed else float(rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['sessions']} sessions and "
+            f"{self.stats['entries']} entries in {elapsed:.1f}s "
+            f"({rate:,.0f} rows/s"
+            f"{', via COPY' if self.use_copy else ''})."
+        ))
+        if self.stats['types_created']:
+            self.stdout.write(
+                f"Created {self.stats['types_created']} inactive descent types."
+            )
+        if self.stats['invalid']:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {self.stats['invalid']} invalid rows "
+                '(run with -v 2 for details).'
+            ))
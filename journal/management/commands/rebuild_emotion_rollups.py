@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from journal.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recreate the daily emotion rollups behind the insights page.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rollup rows written per INSERT.',
+        )
+        parser.add_argument(
+            '--user', type=int,
+            help='Only rebuild the rollups of this user id.',
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild(
+            user_ids=[options['user']] if options['user'] else None,
+            batch_size=max(1, options['batch_size']),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} emotion rollups.'))
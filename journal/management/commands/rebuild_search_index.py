@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from journal import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over journal entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Entries reindexed per transaction on PostgreSQL.',
+        )
+
+    def handle(self, *args, **options):
+        total = search.rebuild(batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f'Reindexed {total} entries.'))
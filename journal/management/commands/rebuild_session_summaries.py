@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from journal.models import DescentSession
+from journal.summaries import refresh_sessions, refresh_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the denormalized entry summary of every descent session, '
+        'then the session and entry totals of every user.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of sessions updated per transaction.',
+        )
+        parser.add_argument(
+            '--user', type=int,
+            help='Only rebuild the sessions of this user id.',
+        )
+
+    def handle(self, *args, **options):
+        sessions = DescentSession.objects.order_by('pk')
+        if options['user']:
+            sessions = sessions.filter(user_id=options['user'])
+
+        batch_size = max(1, options['batch_size'])
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                sessions.filter(pk__gt=last_pk)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                total += refresh_sessions(batch)
+            last_pk = batch[-1]
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Rebuilt {total} sessions (up to pk {last_pk})')
+
+        with transaction.atomic():
+            users = refresh_users([options['user']] if options['user'] else None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {total} session summaries and {users} user summaries.'
+        ))
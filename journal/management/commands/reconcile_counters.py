@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from journal.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Reset the incrementally maintained dashboard counters to exact counts.'
+
+    def handle(self, *args, **options):
+        drifted = reconcile()
+        for name, (old, new) in sorted(drifted.items()):
+            self.stdout.write(f'{name}: {old} -> {new}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled counters ({len(drifted)} corrected).'
+        ))
@@ -0,0 +1,193 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from journal import catalog, counters, rollups, summaries
+from journal.models import DescentSession, DescentType, Entry
+
+
+USERNAME_PREFIX = 'load-user-'
+PASSWORD = 'loadtest123'
+
+WORDS = (
+    'morning tired anxious calm heavy light breath walk rain window quiet '
+    'work family memory dream fear hope letting go sitting with it noticed '
+    'again slowly body tension chest shoulders sleep coffee friend call '
+    'silence music grief anger relief gratitude small steps today'
+).split()
+
+# Roughly how sessions end; the rest are still active
+STATUS_WEIGHTS = {
+    'COMPLETED': 60,
+    'ABANDONED': 25,
+    'IN_PROGRESS': 10,
+    'STARTED': 5,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic users, descent types, sessions and entries with '
+        f'production-like distributions. Users log in with "{PASSWORD}".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--descent-types', type=int, default=10)
+        parser.add_argument(
+            '--sessions', type=float, default=20,
+            help='Mean sessions per user; counts are long-tailed (default: 20).',
+        )
+        parser.add_argument(
+            '--entries', type=float, default=8,
+            help='Mean entries per session (default: 8).',
+        )
+        parser.add_argument(
+            '--days', type=int, default=730,
+            help='Spread sessions over this many days of history (default: 730).',
+        )
+        parser.add_argument('--seed', type=int, help='Random seed for repeatable data.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = max(1, options['batch_size'])
+        self.verbosity = options['verbosity']
+        self.baselines = {}
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        descent_types = self.create_descent_types(options['descent_types'])
+        users = self.create_users(options['users'])
+
+        totals = {'sessions': 0, 'entries': 0}
+        pending = []
+        for user in users:
+            pending.extend(self.build_sessions(
+                user, descent_types, options['sessions'], options['days']
+            ))
+            if len(pending) >= self.batch_size:
+                self.write(pending, options['entries'], totals)
+                pending = []
+        self.write(pending, options['entries'], totals)
+
+        rollups.rebuild(user_ids=[user.pk for user in users])
+        summaries.refresh_users([user.pk for user in users])
+        counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(descent_types)} descent types, "
+            f"{totals['sessions']} sessions and {totals['entries']} entries "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
+
+    def create_descent_types(self, count):
+        existing = DescentType.objects.count()
+        type_choices = [value for value, label in DescentType.TYPE_CHOICES]
+        DescentType.objects.bulk_create([
+            DescentType(
+                name=f'Load Descent {existing + number}',
+                description=self.sentence(12),
+                type=self.random.choice(type_choices),
+                is_active=self.random.random() < 0.9,
+            )
+            for number in range(count)
+        ])
+        # bulk_create skips the signals that tell workers to reload
+        catalog.descent_types.publish()
+        return list(DescentType.objects.values_list('pk', flat=True))
+
+    def create_users(self, count):
+        existing = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        # Hashing is deliberately slow, so every seeded user shares one hash
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create([
+            User(
+                username=f'{USERNAME_PREFIX}{existing + number}',
+                email=f'{USERNAME_PREFIX}{existing + number}@example.com',
+                password=password,
+            )
+            for number in range(count)
+        ], batch_size=self.batch_size)
+        return users
+
+    def sentence(self, mean_words):
+        length = max(3, int(self.random.gauss(mean_words, mean_words / 3)))
+        return ' '.join(self.random.choices(WORDS, k=length)).capitalize() + '.'
+
+    def build_sessions(self, user, descent_types, mean_sessions, days):
+        # A few heavy users and a long tail of light ones
+        count = int(self.random.paretovariate(2.0) * mean_sessions / 2)
+        # Each user favours a handful of descent types
+        favourites = self.random.sample(descent_types, min(3, len(descent_types)))
+        self.baselines[user.pk] = self.random.uniform(3, 7)
+        sessions = []
+        for _ in range(count):
+            status = self.random.choices(
+                list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values())
+            )[0]
+            started_at = self.now - timedelta(
+                seconds=self.random.uniform(0, days * 86400)
+            )
+            session = DescentSession(
+                user=user,
+                descent_type_id=self.random.choice(
+                    favourites if self.random.random() < 0.8 else descent_types
+                ),
+                status=status,
+                started_at=started_at,
+                notes=self.sentence(8) if self.random.random() < 0.3 else '',
+            )
+            sessions.append(session)
+        return sessions
+
+    def build_entries(self, session, mean_entries):
+        count = min(int(self.random.expovariate(1 / mean_entries)), 200)
+        if session.status == 'STARTED':
+            count = 0
+        entries = []
+        timestamp = session.started_at
+        level = self.baselines[session.user_id]
+        for _ in range(count):
+            timestamp += timedelta(minutes=self.random.uniform(2, 90))
+            if timestamp > self.now:
+                break
+            # Emotion drifts from the user's baseline rather than jumping
+            level = min(10, max(1, self.random.gauss(level, 1.2)))
+            entries.append(Entry(
+                session=session,
+                timestamp=timestamp,
+                emotion_level=round(level),
+                content=self.sentence(40),
+                reflection=self.sentence(15) if self.random.random() < 0.4 else '',
+            ))
+        finished_at = timestamp + timedelta(minutes=self.random.uniform(1, 30))
+        if session.status == 'COMPLETED':
+            session.completed_at = finished_at
+        elif session.status == 'ABANDONED':
+            session.abandoned_at = finished_at
+        return entries
+
+    def write(self, sessions, mean_entries, totals):
+        if not sessions:
+            return
+        entries = []
+        for session in sessions:
+            entries.extend(self.build_entries(session, mean_entries))
+
+        with transaction.atomic():
+            DescentSession.objects.bulk_create(sessions, batch_size=1000)
+            Entry.objects.bulk_create(entries, batch_size=1000)
+            summaries.refresh_sessions([session.pk for session in sessions])
+
+        totals['sessions'] += len(sessions)
+        totals['entries'] += len(entries)
+        if self.verbosity > 1:
+            self.stdout.write(
+                f"{totals['sessions']} sessions, {totals['entries']} entries"
+            )
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.utils.cache import patch_vary_headers
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import dbpool, timing
+
+
+logger = logging.getLogger('journal.performance')
+
+
+class RequestTimingMiddleware:
+    """
+    Measure database, template and total time for every request.
+
+    The figures go out as a ``Server-Timing`` header to staff (or everyone
+    with ``PERF_SERVER_TIMING``) and, for a sample of
+    requests (``PERF_SAMPLE_RATE``) plus every request slower than
+    ``PERF_SLOW_REQUEST_MS``, as a JSON log line on ``journal.performance``.
+    Slow requests also log the user id and their slowest queries. Place it
+    first in MIDDLEWARE so the time spent in other middleware is counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.0)
+        self.slow_ms = getattr(settings, 'PERF_SLOW_REQUEST_MS', 500)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', False)
+
+    def __call__(self, request):
+        timings, token = timing.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            timing.stop(token)
+
+        total_ms = timings.elapsed() * 1000
+        if timings.query_count:
+            # Only requests that touched the database held a connection
+            dbpool.stats.checked_out()
+        if self.server_timing or self.is_staff(request):
+            response['Server-Timing'] = self.server_timing_header(timings, total_ms)
+
+        slow = total_ms >= self.slow_ms
+        if slow or random.random() < self.sample_rate:
+            self.log(request, response, timings, total_ms, slow)
+        return response
+
+    def is_staff(self, request):
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def server_timing_header(self, timings, total_ms):
+        return ', '.join([
+            f'db;dur={timings.db_time * 1000:.1f};desc="{timings.query_count} queries"',
+            f'tpl;dur={timings.template_time * 1000:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+    def log(self, request, response, timings, total_ms, slow):
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(timings.db_time * 1000, 1),
+            'queries': timings.query_count,
+            'template_ms': round(timings.template_time * 1000, 1),
+            'slow': slow,
+        }
+        if slow:
+            user = getattr(request, 'user', None)
+            record['user_id'] = user.pk if user is not None else None
+            record['top_queries'] = timings.top_queries()
+        logger.log(
+            logging.WARNING if slow else logging.INFO, json.dumps(record)
+        )
+
+
+class PrerenderedPageMiddleware(WhiteNoise):
+    """
+    Serve pages written by ``manage.py prerender_pages`` straight from
+    PRERENDER_ROOT, with ETags, compression and ``PRERENDER_MAX_AGE`` cache
+    headers, before sessions, auth or any view run.
+
+    Only requests carrying no session or messages cookie get the file; a
+    visitor who is logged in (or has a message waiting) falls through to
+    the live view. Place it right after SecurityMiddleware; the pages skip
+    the middleware below it, so they get XFrameOptionsMiddleware's header
+    here.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.xframe_options = XFrameOptionsMiddleware(get_response)
+        super().__init__(
+            application=None,
+            autorefresh=settings.DEBUG,
+            max_age=getattr(settings, 'PRERENDER_MAX_AGE', 3600),
+            index_file=True,
+        )
+        self.root = getattr(settings, 'PRERENDER_ROOT', None)
+        self.state_cookies = {
+            settings.SESSION_COOKIE_NAME,
+            getattr(settings, 'MESSAGE_COOKIE_NAME', 'messages'),
+        }
+        if self.root and os.path.isdir(self.root):
+            self.add_files(self.root)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and not (
+            self.state_cookies & request.COOKIES.keys()
+        ):
+            if self.autorefresh:
+                page = self.find_file(request.path_info)
+            else:
+                page = self.files.get(request.path_info)
+            if page is not None:
+                response = WhiteNoiseMiddleware.serve(page, request)
+                # Logging in sets a cookie, so caches must not hand the
+                # anonymous page to the logged-in visitor
+                patch_vary_headers(response, ('Cookie',))
+                return self.xframe_options.process_response(request, response)
+        return self.get_response(request)
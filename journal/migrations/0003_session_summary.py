@@ -0,0 +1,89 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_summaries(apps, schema_editor):
+    DescentSession = apps.get_model('journal', 'DescentSession')
+    Entry = apps.get_model('journal', 'Entry')
+
+    def aggregate(expression):
+        return Subquery(
+            Entry.objects.filter(session=OuterRef('pk'))
+            .order_by()
+            .values('session')
+            .annotate(value=expression)
+            .values('value')[:1]
+        )
+
+    latest = Entry.objects.filter(session=OuterRef('pk')).order_by(
+        '-timestamp', '-pk'
+    )
+    expressions = {
+        'entry_count': Coalesce(aggregate(Count('pk')), Value(0)),
+        'emotion_sum': Coalesce(aggregate(Sum('emotion_level')), Value(0)),
+        'emotion_min': aggregate(Min('emotion_level')),
+        'emotion_max': aggregate(Max('emotion_level')),
+        'last_entry_at': Subquery(latest.values('timestamp')[:1]),
+        'latest_entry': Subquery(latest.values('pk')[:1]),
+    }
+
+    last_pk = 0
+    while True:
+        batch = list(
+            DescentSession.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:1000]
+        )
+        if not batch:
+            break
+        # Each batch commits on its own (the migration is not atomic), so
+        # locks and WAL never build up across the whole table
+        with transaction.atomic():
+            DescentSession.objects.filter(pk__in=batch).update(**expressions)
+        last_pk = batch[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('journal', '0002_descenttype_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='descentsession',
+            name='emotion_max',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='descentsession',
+            name='emotion_min',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='descentsession',
+            name='emotion_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='descentsession',
+            name='entry_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='descentsession',
+            name='last_entry_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='descentsession',
+            name='latest_entry',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='journal.entry'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
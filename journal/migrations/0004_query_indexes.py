@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+from journal.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction on PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ('journal', '0003_session_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='descentsession',
+            index=models.Index(fields=['user', '-started_at', '-id'], name='session_user_started_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='descentsession',
+            index=models.Index(fields=['-started_at'], name='session_started_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='descentsession',
+            index=models.Index(condition=models.Q(('status__in', ('STARTED', 'IN_PROGRESS'))), fields=['status'], name='session_active_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='entry',
+            index=models.Index(fields=['session', 'timestamp'], name='entry_session_ts_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='entry',
+            index=models.Index(fields=['-timestamp'], name='entry_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Counter = apps.get_model('journal', 'Counter')
+    DescentSession = apps.get_model('journal', 'DescentSession')
+    DescentType = apps.get_model('journal', 'DescentType')
+    Entry = apps.get_model('journal', 'Entry')
+    counts = {
+        'total_users': User.objects.count(),
+        'total_sessions': DescentSession.objects.count(),
+        'active_sessions': DescentSession.objects.filter(
+            status__in=('STARTED', 'IN_PROGRESS')
+        ).count(),
+        'total_entries': Entry.objects.count(),
+        'total_descent_types': DescentType.objects.count(),
+    }
+    for name, value in counts.items():
+        Counter.objects.update_or_create(name=name, defaults={'value': value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0004_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
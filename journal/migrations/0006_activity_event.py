@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_recent_activity(apps, schema_editor):
+    """Start the log with the most recent existing sessions and entries."""
+    ActivityEvent = apps.get_model('journal', 'ActivityEvent')
+    DescentSession = apps.get_model('journal', 'DescentSession')
+    Entry = apps.get_model('journal', 'Entry')
+
+    events = [
+        ActivityEvent(
+            kind='SESSION_STARTED',
+            occurred_at=session.started_at,
+            user_id=session.user_id,
+            username=session.user.username,
+            session_id=session.pk,
+            descent_type_name=session.descent_type.name,
+        )
+        for session in DescentSession.objects.select_related(
+            'user', 'descent_type'
+        ).order_by('-started_at')[:100]
+    ]
+    events += [
+        ActivityEvent(
+            kind='ENTRY_ADDED',
+            occurred_at=entry.timestamp,
+            user_id=entry.session.user_id,
+            username=entry.session.user.username,
+            session_id=entry.session_id,
+            entry_id=entry.pk,
+            descent_type_name=entry.session.descent_type.name,
+        )
+        for entry in Entry.objects.select_related(
+            'session__user', 'session__descent_type'
+        ).order_by('-timestamp')[:100]
+    ]
+    events.sort(key=lambda event: event.occurred_at)
+    ActivityEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0005_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SESSION_STARTED', 'Session started'), ('SESSION_COMPLETED', 'Session completed'), ('SESSION_ABANDONED', 'Session abandoned'), ('ENTRY_ADDED', 'Entry added')], max_length=30)),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('username', models.CharField(max_length=150)),
+                ('session_id', models.BigIntegerField(blank=True, null=True)),
+                ('entry_id', models.BigIntegerField(blank=True, null=True)),
+                ('descent_type_name', models.CharField(blank=True, max_length=100)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-occurred_at', '-id'], name='activity_occurred_idx')],
+            },
+        ),
+        migrations.RunPython(seed_recent_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:46
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from journal.search, so
+# later changes to that module cannot change what this migration did.
+POSTGRES_SCHEMA = [
+    """
+    CREATE OR REPLACE FUNCTION journal_entry_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.content, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.reflection, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    DROP TRIGGER IF EXISTS journal_entry_search_vector ON journal_entry
+    """,
+    """
+    CREATE TRIGGER journal_entry_search_vector
+    BEFORE INSERT OR UPDATE ON journal_entry
+    FOR EACH ROW EXECUTE FUNCTION journal_entry_search_vector()
+    """,
+]
+
+POSTGRES_INDEX = """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS entry_search_idx
+    ON journal_entry USING gin (search_vector)
+"""
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS journal_entry_fts USING fts5(
+        content, reflection,
+        content='journal_entry', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_entry_fts_insert
+    AFTER INSERT ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(rowid, content, reflection)
+        VALUES (new.id, new.content, new.reflection);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_entry_fts_delete
+    AFTER DELETE ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(journal_entry_fts, rowid, content, reflection)
+        VALUES ('delete', old.id, old.content, old.reflection);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_entry_fts_update
+    AFTER UPDATE OF content, reflection ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(journal_entry_fts, rowid, content, reflection)
+        VALUES ('delete', old.id, old.content, old.reflection);
+        INSERT INTO journal_entry_fts(rowid, content, reflection)
+        VALUES (new.id, new.content, new.reflection);
+    END
+    """,
+]
+
+
+def install_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for statement in SQLITE_SCHEMA:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO journal_entry_fts(journal_entry_fts) VALUES ('rebuild')"
+            )
+        return
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for statement in POSTGRES_SCHEMA:
+            cursor.execute(statement)
+        # Fill in existing rows through the trigger, a batch per transaction
+        last_pk = 0
+        while True:
+            cursor.execute(
+                'SELECT id FROM journal_entry WHERE id > %s ORDER BY id LIMIT 1000',
+                [last_pk],
+            )
+            batch = [row[0] for row in cursor.fetchall()]
+            if not batch:
+                break
+            cursor.execute(
+                'UPDATE journal_entry SET content = content WHERE id = ANY(%s)',
+                [batch],
+            )
+            last_pk = batch[-1]
+        cursor.execute(POSTGRES_INDEX)
+
+
+def remove_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS journal_entry_fts_{suffix}')
+            cursor.execute('DROP TABLE IF EXISTS journal_entry_fts')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS entry_search_idx')
+            cursor.execute(
+                'DROP TRIGGER IF EXISTS journal_entry_search_vector ON journal_entry'
+            )
+            cursor.execute('DROP FUNCTION IF EXISTS journal_entry_search_vector()')
+
+
+class Migration(migrations.Migration):
+    # The GIN index is built with CREATE INDEX CONCURRENTLY on PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ('journal', '0006_activity_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_index, remove_search_index),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    EmotionRollup = apps.get_model('journal', 'EmotionRollup')
+    Entry = apps.get_model('journal', 'Entry')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    rows = (
+        Entry.objects.annotate(day=TruncDate('timestamp'))
+        .values('session__user_id', 'session__descent_type_id', 'day')
+        .annotate(
+            entry_count=Count('pk'),
+            emotion_sum=Sum('emotion_level'),
+            emotion_min=Min('emotion_level'),
+            emotion_max=Max('emotion_level'),
+        )
+        .order_by()
+    )
+    # A batch of users per transaction (the migration is not atomic), so
+    # locks and WAL never build up across the whole table
+    last_pk = 0
+    while True:
+        users = list(
+            User.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:1000]
+        )
+        if not users:
+            break
+        with transaction.atomic():
+            EmotionRollup.objects.bulk_create(
+                [
+                    EmotionRollup(
+                        user_id=row.pop('session__user_id'),
+                        descent_type_id=row.pop('session__descent_type_id'),
+                        **row,
+                    )
+                    for row in rows.filter(session__user_id__in=users)
+                ],
+                batch_size=1000,
+            )
+        last_pk = users[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('journal', '0007_entry_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmotionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('emotion_sum', models.IntegerField(default=0)),
+                ('emotion_min', models.IntegerField()),
+                ('emotion_max', models.IntegerField()),
+                ('descent_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='journal.descenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='rollup_user_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'descent_type', 'day'), name='rollup_user_type_day_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_user_summaries(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserSummary = apps.get_model('journal', 'UserSummary')
+
+    users = User.objects.annotate(
+        session_count=Count('descentsession'),
+        entry_count=Coalesce(Sum('descentsession__entry_count'), 0),
+        last_session_at=Max(Coalesce(
+            'descentsession__last_entry_at', 'descentsession__started_at'
+        )),
+    ).values_list(
+        'pk', 'date_joined', 'session_count', 'entry_count', 'last_session_at'
+    ).order_by()
+    # A batch of users per transaction (the migration is not atomic), so
+    # locks and WAL never build up across the whole table
+    last_pk = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk).order_by('pk')[:1000])
+        if not batch:
+            break
+        with transaction.atomic():
+            UserSummary.objects.bulk_create([
+                UserSummary(
+                    user_id=pk,
+                    session_count=session_count,
+                    entry_count=entry_count,
+                    last_active_at=max(date_joined, last_session_at or date_joined),
+                )
+                for pk, date_joined, session_count, entry_count, last_session_at
+                in batch
+            ])
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('journal', '0009_entry_draft'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('last_active_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session_count', 'user'], name='usersummary_sessions_idx'), models.Index(fields=['entry_count', 'user'], name='usersummary_entries_idx'), models.Index(fields=['last_active_at', 'user'], name='usersummary_active_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_user_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0011_archived_session'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='descentsession',
+            name='latest_entry',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='journal.entry'),
+        ),
+    ]
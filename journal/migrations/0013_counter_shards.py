@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:10
+
+from django.db import migrations
+from django.db.models import F, Sum
+
+# Mirrors journal.counters.SHARDS at the time of writing
+SHARDS = {'total_entries': 8}
+
+
+def create_shards(apps, schema_editor):
+    Counter = apps.get_model('journal', 'Counter')
+    for name, count in SHARDS.items():
+        for n in range(1, count):
+            Counter.objects.get_or_create(name=f'{name}:{n}', defaults={'value': 0})
+
+
+def fold_shards(apps, schema_editor):
+    Counter = apps.get_model('journal', 'Counter')
+    for name in SHARDS:
+        shards = Counter.objects.filter(name__startswith=f'{name}:')
+        total = shards.aggregate(total=Sum('value'))['total'] or 0
+        Counter.objects.filter(name=name).update(value=F('value') + total)
+        shards.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0012_latest_entry_do_nothing'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_shards, fold_shards),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:20
+
+from django.db import migrations
+
+
+def trigger_sql(event):
+    return [
+        'DROP TRIGGER IF EXISTS journal_entry_search_vector ON journal_entry',
+        f"""
+        CREATE TRIGGER journal_entry_search_vector
+        BEFORE INSERT OR {event} ON journal_entry
+        FOR EACH ROW EXECUTE FUNCTION journal_entry_search_vector()
+        """,
+    ]
+
+
+def recreate_trigger(event):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for statement in trigger_sql(event):
+                cursor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    # Only recompute the tsvector when the text it is built from changes
+
+    dependencies = [
+        ('journal', '0013_counter_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            recreate_trigger('UPDATE OF content, reflection'),
+            recreate_trigger('UPDATE'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0014_search_trigger_columns'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='descentsession',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='entry',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
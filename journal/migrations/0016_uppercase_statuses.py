@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:30
+
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import Replace, Upper
+
+STATUSES = ('STARTED', 'IN_PROGRESS', 'COMPLETED', 'ABANDONED')
+ACTIVE_STATUSES = ('STARTED', 'IN_PROGRESS')
+
+
+def uppercase_statuses(apps, schema_editor):
+    """
+    start_descent and edit_session stored the choice labels ('Started',
+    'Completed') instead of their values; rewrite them as the values.
+    """
+    Counter = apps.get_model('journal', 'Counter')
+    DescentSession = apps.get_model('journal', 'DescentSession')
+    DescentSession.objects.exclude(status__in=STATUSES).update(
+        status=Replace(Upper('status'), Value(' '), Value('_'))
+    )
+    # Sessions stored as 'Started' were left out of the active count
+    Counter.objects.filter(name='active_sessions').update(
+        value=DescentSession.objects.filter(status__in=ACTIVE_STATUSES).count()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0015_timestamp_defaults'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_statuses, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,90 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.dispatch import Signal
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+
+# Statuses of sessions that are still being worked on
+ACTIVE_STATUSES = ('STARTED', 'IN_PROGRESS')
+
+# Sent with the ``instances`` removed by a delete that starts at a session
+# or entry, once they are gone, so journal.signals can settle counters and
+# summaries. Deletes cascading down from a parent are settled by the
+# parent's receivers. post_delete receivers would make Django load every
+# row of a cascade instead of removing them with one DELETE per batch.
+sessions_deleted = Signal()
+entries_deleted = Signal()
+
+class LoadedValuesMixin:
+    """Remember the values a row was loaded with so writes can see changes."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class DeleteBookkeepingQuerySet(models.QuerySet):
+    """
+    QuerySet whose delete() sends the model's ``deleted_signal`` with the
+    rows it removed, loaded with only ``bookkeeping_fields``.
+    """
+    bookkeeping_fields = ()
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            instances = list(self.only(*self.bookkeeping_fields))
+            deleted = self.delete_without_bookkeeping()
+            if instances:
+                self.model.deleted_signal.send(
+                    sender=self.model, instances=instances
+                )
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def delete_without_bookkeeping(self):
+        """Delete the rows, for callers that settle the bookkeeping themselves."""
+        return super().delete()
+
+    delete_without_bookkeeping.alters_data = True
+    delete_without_bookkeeping.queryset_only = True
+
+
+class DeleteBookkeepingMixin:
+    """Send ``deleted_signal`` after deleting a single instance."""
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            deleted = super().delete(*args, **kwargs)
+            self.deleted_signal.send(sender=type(self), instances=[self])
+        return deleted
+
+
+class SessionQuerySet(DeleteBookkeepingQuerySet):
+    bookkeeping_fields = (
+        'user', 'descent_type', 'status', 'started_at', 'entry_count',
+        'last_entry_at',
+    )
+
+
+class EntryQuerySet(DeleteBookkeepingQuerySet):
+    bookkeeping_fields = ('session', 'timestamp')
+
+
+class EntryManager(models.Manager.from_queryset(EntryQuerySet)):
+    """
+    Leaves ``search_vector`` out of every query unless asked for; only the
+    database reads it, and it can be larger than the entry itself.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 # Create your models here.
 class DescentType(models.Model):
     TYPE_CHOICES = [
@@ -26,7 +109,7 @@ class DescentType(models.Model):
         verbose_name_plural = 'Descent Types'
         ordering = ['name']
     
-class DescentSession(models.Model):
+class DescentSession(DeleteBookkeepingMixin, LoadedValuesMixin, models.Model):
     STATUS_CHOICES = [
         ('STARTED', 'Started'),
         ('IN_PROGRESS', 'In Progress'),
@@ -37,11 +120,61 @@ class DescentSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     descent_type = models.ForeignKey(DescentType, on_delete=models.CASCADE)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='STARTED')
-    started_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so imports and restores can write historical times
+    started_at = models.DateTimeField(default=timezone.now, editable=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     abandoned_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True)
 
+    # Summary of the session's entries, maintained by journal.summaries so
+    # list pages never have to touch the Entry table.
+    entry_count = models.PositiveIntegerField(default=0, editable=False)
+    last_entry_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # DO_NOTHING so entries can be deleted in bulk; whatever deletes the
+    # latest entry recomputes this in the same transaction
+    latest_entry = models.ForeignKey(
+        'Entry',
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+    )
+    emotion_sum = models.IntegerField(default=0, editable=False)
+    emotion_min = models.IntegerField(null=True, blank=True, editable=False)
+    emotion_max = models.IntegerField(null=True, blank=True, editable=False)
+
+    # Set while the session's entries are held in ArchivedSession rather
+    # than the Entry table (see journal.archive)
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SessionQuerySet.as_manager()
+    deleted_signal = sessions_deleted
+
+    SUMMARY_FIELDS = (
+        'entry_count', 'last_entry_at', 'latest_entry',
+        'emotion_sum', 'emotion_min', 'emotion_max',
+    )
+    # Columns only ever written with queryset updates
+    MANAGED_FIELDS = SUMMARY_FIELDS + ('archived_at',)
+
+    def save(self, *args, **kwargs):
+        # Summary columns are written with F() updates by journal.summaries
+        # and archived_at by journal.archive; a plain save() must never
+        # overwrite them with stale in-memory values.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MANAGED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_emotion(self):
+        if not self.entry_count:
+            return None
+        return self.emotion_sum / self.entry_count
+
     @property
     def duration(self):
         if self.completed_at:
@@ -52,14 +185,211 @@ class DescentSession(models.Model):
 
     def __str__(self):
         return f"{self.user.username}'s {self.descent_type.name} descent"
+
+    class Meta:
+        indexes = [
+            # journal_history: a user's sessions, newest first, keyset paged
+            models.Index(
+                fields=['user', '-started_at', '-id'],
+                name='session_user_started_idx',
+            ),
+            # Recent activity and staff listings across all users
+            models.Index(fields=['-started_at'], name='session_started_idx'),
+            # Active session counts only ever look at unfinished sessions
+            models.Index(
+                fields=['status'],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name='session_active_idx',
+            ),
+        ]
     
-class Entry(models.Model):
+class Entry(DeleteBookkeepingMixin, LoadedValuesMixin, models.Model):
     session = models.ForeignKey(DescentSession, on_delete=models.CASCADE, related_name='entries')
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     emotion_level = models.IntegerField(default=5) # 1-10 scale
     reflection = models.TextField(blank=True)
+    # Maintained and GIN-indexed by the database on PostgreSQL; SQLite uses
+    # an FTS5 shadow table instead. See journal.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = EntryManager()
+    deleted_signal = entries_deleted
 
     def __str__(self):
         return f"Entry for {self.session}"
-    
+
+    class Meta:
+        indexes = [
+            # A session's entries in the order they were written
+            models.Index(
+                fields=['session', 'timestamp'], name='entry_session_ts_idx'
+            ),
+            # Most recent entries across all sessions
+            models.Index(fields=['-timestamp'], name='entry_timestamp_idx'),
+        ]
+
+
+class Counter(models.Model):
+    """A running total maintained incrementally by journal.counters."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+
+class UserSummary(models.Model):
+    """
+    Per-user totals kept up to date by journal.summaries, so the staff user
+    list can sort and page through them with an index instead of grouping
+    every session and entry.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='summary'
+    )
+    session_count = models.PositiveIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+    # When the user joined, started a session or wrote an entry, whichever
+    # came last
+    last_active_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Summary for {self.user_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['session_count', 'user'], name='usersummary_sessions_idx'
+            ),
+            models.Index(
+                fields=['entry_count', 'user'], name='usersummary_entries_idx'
+            ),
+            models.Index(
+                fields=['last_active_at', 'user'], name='usersummary_active_idx'
+            ),
+        ]
+
+class ActivityEvent(models.Model):
+    """
+    Append-only log of user activity. Display fields are copied in at write
+    time so the dashboard feed never has to join back to users or sessions.
+    """
+    SESSION_STARTED = 'SESSION_STARTED'
+    SESSION_COMPLETED = 'SESSION_COMPLETED'
+    SESSION_ABANDONED = 'SESSION_ABANDONED'
+    ENTRY_ADDED = 'ENTRY_ADDED'
+    KIND_CHOICES = [
+        (SESSION_STARTED, 'Session started'),
+        (SESSION_COMPLETED, 'Session completed'),
+        (SESSION_ABANDONED, 'Session abandoned'),
+        (ENTRY_ADDED, 'Entry added'),
+    ]
+    SESSION_KINDS = (SESSION_STARTED, SESSION_COMPLETED, SESSION_ABANDONED)
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+',
+    )
+    username = models.CharField(max_length=150)
+    session_id = models.BigIntegerField(null=True, blank=True)
+    entry_id = models.BigIntegerField(null=True, blank=True)
+    descent_type_name = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return f"{self.username}: {self.get_kind_display()}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-occurred_at', '-id'], name='activity_occurred_idx'
+            ),
+        ]
+
+
+class EmotionRollup(models.Model):
+    """
+    One user's entries for one descent type on one day, reduced to the
+    count, sum and range of their emotion levels. Maintained incrementally
+    by journal.rollups so insights never have to scan the Entry table.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    descent_type = models.ForeignKey(
+        DescentType, on_delete=models.CASCADE, related_name='+'
+    )
+    day = models.DateField()
+    entry_count = models.PositiveIntegerField(default=0)
+    emotion_sum = models.IntegerField(default=0)
+    emotion_min = models.IntegerField()
+    emotion_max = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.user_id} / {self.descent_type_id} on {self.day}"
+
+    @property
+    def average_emotion(self):
+        if not self.entry_count:
+            return None
+        return self.emotion_sum / self.entry_count
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'descent_type', 'day'],
+                name='rollup_user_type_day_uniq',
+            ),
+        ]
+        indexes = [
+            # A user's history across all descent types, in date order
+            models.Index(fields=['user', 'day'], name='rollup_user_day_idx'),
+        ]
+
+
+class EntryDraft(models.Model):
+    """
+    The entry a user is still typing into an in-progress session, saved by
+    the autosave endpoint (see journal.autosave) so a lost tab loses at
+    most a few seconds of writing. Deleted once the entry is submitted.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    session = models.ForeignKey(
+        DescentSession, on_delete=models.CASCADE, related_name='+'
+    )
+    content = models.TextField(blank=True)
+    reflection = models.TextField(blank=True)
+    emotion_level = models.IntegerField(null=True, blank=True)
+    # Client-side clock of the edit this row holds; an older edit arriving
+    # late from another worker never overwrites a newer one
+    revision = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Draft for {self.session_id} by {self.user_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'session'], name='draft_user_session_uniq'
+            ),
+        ]
+
+
+class ArchivedSession(models.Model):
+    """
+    The entries of an old, finished session, moved out of the Entry table by
+    journal.archive and stored as one zlib-compressed JSON document.
+    """
+    session = models.OneToOneField(
+        DescentSession, on_delete=models.CASCADE, primary_key=True,
+        related_name='archive',
+    )
+    entry_count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archive of session {self.session_id}"
@@ -0,0 +1,44 @@
+"""Custom migration operations used by journal's migrations."""
+from django.db import NotSupportedError
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    Add an index without blocking writes where the database allows it.
+
+    On PostgreSQL the index is built with ``CREATE INDEX CONCURRENTLY`` (so
+    the migration containing it must set ``atomic = False``); other backends
+    fall back to a regular ``CREATE INDEX``.
+    """
+
+    def describe(self):
+        return 'Concurrently create index %s on field(s) %s of model %s' % (
+            self.index.name,
+            ', '.join(self.index.fields),
+            self.model_name,
+        )
+
+    def _concurrently(self, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return {}
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                'AddIndexConcurrently cannot run inside a transaction; set '
+                'atomic = False on the migration.'
+            )
+        return {'concurrently': True}
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(
+                model, self.index, **self._concurrently(schema_editor)
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model, self.index, **self._concurrently(schema_editor)
+            )
@@ -0,0 +1,167 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Below this many rows (by the planner's estimate) an exact COUNT is cheap
+# enough to run
+ESTIMATE_THRESHOLD = 10000
+
+
+class KeysetPage:
+    """A single page of a keyset (cursor) paginated queryset."""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(value, pk):
+    """
+    Encode the (value, pk) pair of the last row on a page. Datetimes are
+    stored as ISO strings, integers and strings with an ``i:`` or ``s:``
+    prefix so they decode to the same type.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, int):
+        value = f'i:{value}'
+    else:
+        value = f's:{value}'
+    raw = f'{value}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into a (value, pk) pair, or None if invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        if value.startswith('i:'):
+            value = int(value[2:])
+        elif value.startswith('s:'):
+            value = value[2:]
+        else:
+            value = datetime.fromisoformat(value)
+        return value, int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def clamp_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a requested page size, keeping it within sane bounds."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def _field_value(row, field):
+    for name in field.split('__'):
+        row = getattr(row, name)
+    return row
+
+
+def paginate_keyset(queryset, field, cursor=None, page_size=DEFAULT_PAGE_SIZE,
+                    descending=True):
+    """
+    Return one page of ``queryset`` ordered by ``field``, newest (largest)
+    first unless ``descending`` is False.
+
+    Rows are ordered by ``(field, pk)`` and each page continues strictly
+    after the last row of the previous one, so rows inserted while a user is
+    paging never shift or duplicate entries on later pages. ``field`` may
+    follow relations (``user__username``).
+    """
+    sign, after = ('-', 'lt') if descending else ('', 'gt')
+    queryset = queryset.order_by(f'{sign}{field}', f'{sign}pk')
+    position = decode_cursor(cursor)
+    if position is not None:
+        value, pk = position
+        try:
+            queryset = queryset.filter(
+                Q(**{f'{field}__{after}': value})
+                | Q(**{field: value, f'pk__{after}': pk})
+            )
+        except (TypeError, ValueError, ValidationError):
+            # A cursor from a different ordering; start from the top
+            pass
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(_field_value(last, field), last.pk)
+    return KeysetPage(rows, next_cursor)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large tables on PostgreSQL. Rather than COUNT(*) every
+    row, it takes the table's row estimate from pg_class when the queryset
+    is unfiltered, and the planner's estimate from EXPLAIN when it is
+    filtered, once a COUNT capped at ESTIMATE_THRESHOLD confirms it. Small
+    results, and other databases, are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+        try:
+            estimate = self._estimate(queryset, connection)
+        except DatabaseError:
+            estimate = None
+        if estimate is None or estimate < ESTIMATE_THRESHOLD:
+            return super().count
+        if queryset.query.where:
+            # The planner's guess for a filtered query, full-text search
+            # especially, can be far off. A COUNT capped at the threshold
+            # says whether it is safe to use.
+            counted = queryset.order_by()[:ESTIMATE_THRESHOLD].count()
+            if counted < ESTIMATE_THRESHOLD:
+                return counted
+        return estimate
+
+    @staticmethod
+    def _estimate(queryset, connection):
+        if not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 until the table has been analyzed
+            if row and row[0] >= 0:
+                return int(row[0])
+            return None
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
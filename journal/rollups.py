@@ -0,0 +1,272 @@
+"""
+Daily per-user, per-descent-type emotion rollups.
+
+New entries are folded into their day's row with a single UPDATE (or an
+INSERT for the first entry of the day). Edits and deletes, which can move a
+minimum or maximum, recompute the affected days from the Entry table
+instead. Days are taken in the current time zone, matching ``TruncDate``.
+Recomputes fold in the entries of archived sessions (see journal.archive).
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Max, Min, Sum, Value
+from django.db.models.functions import (
+    Cast, Greatest, Least, TruncDate, TruncDay, TruncMonth, TruncWeek,
+)
+from django.utils import timezone
+
+from . import archive
+from .models import DescentSession, EmotionRollup, Entry
+
+
+ROLLUP_FIELDS = ['entry_count', 'emotion_sum', 'emotion_min', 'emotion_max']
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _day(timestamp):
+    return timezone.localdate(timestamp)
+
+
+def _day_bounds(first_day, last_day):
+    """Aware datetimes spanning ``first_day`` to the end of ``last_day``."""
+    return (
+        timezone.make_aware(datetime.combine(first_day, time.min)),
+        timezone.make_aware(
+            datetime.combine(last_day + timedelta(days=1), time.min)
+        ),
+    )
+
+
+def daily_rows(entries):
+    """Aggregate an Entry queryset into rollup values per user, type and day."""
+    return (
+        entries.annotate(day=TruncDate('timestamp'))
+        .values('session__user_id', 'session__descent_type_id', 'day')
+        .annotate(
+            entry_count=Count('pk'),
+            emotion_sum=Sum('emotion_level'),
+            emotion_min=Min('emotion_level'),
+            emotion_max=Max('emotion_level'),
+        )
+        .order_by()
+    )
+
+
+def _with_archived(rows, archived_rows):
+    """Fold rows aggregated from the archive into rows from the Entry table."""
+    def key(row):
+        return row['session__user_id'], row['session__descent_type_id'], row['day']
+
+    archived = {key(row): row for row in archived_rows}
+    for row in rows:
+        other = archived.pop(key(row), None)
+        if other is not None:
+            row = dict(
+                row,
+                entry_count=row['entry_count'] + other['entry_count'],
+                emotion_sum=row['emotion_sum'] + other['emotion_sum'],
+                emotion_min=min(row['emotion_min'], other['emotion_min']),
+                emotion_max=max(row['emotion_max'], other['emotion_max']),
+            )
+        yield row
+    yield from archived.values()
+
+
+def _rollups(rows):
+    return [
+        EmotionRollup(
+            user_id=row['session__user_id'],
+            descent_type_id=row['session__descent_type_id'],
+            day=row['day'],
+            **{name: row[name] for name in ROLLUP_FIELDS},
+        )
+        for row in rows
+    ]
+
+
+def refresh(user_id, descent_type_id, first_day, last_day):
+    """Recompute one user's rollups for a descent type over a range of days."""
+    start, end = _day_bounds(first_day, last_day)
+    rows = daily_rows(Entry.objects.filter(
+        session__user_id=user_id,
+        session__descent_type_id=descent_type_id,
+        timestamp__gte=start,
+        timestamp__lt=end,
+    ))
+    archived_rows = archive.daily_rows(
+        DescentSession.objects.filter(
+            user_id=user_id,
+            descent_type_id=descent_type_id,
+            archived_at__isnull=False,
+            last_entry_at__gte=start,
+        ),
+        start,
+        end,
+    )
+    rollups = _rollups(_with_archived(rows, archived_rows))
+    EmotionRollup.objects.filter(
+        user_id=user_id,
+        descent_type_id=descent_type_id,
+        day__range=(first_day, last_day),
+    ).exclude(day__in=[rollup.day for rollup in rollups]).delete()
+    if rollups:
+        EmotionRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['user', 'descent_type', 'day'],
+            update_fields=ROLLUP_FIELDS,
+        )
+
+
+def refresh_entries(entries, session_ids=()):
+    """
+    Recompute the days touched by ``entries``, including entries written
+    with ``bulk_create``/``bulk_update`` which bypass the signals. Entries
+    are attributed to their current session and to any in ``session_ids``
+    (sessions they were moved out of).
+    """
+    days_by_session = defaultdict(set)
+    for entry in entries:
+        day = _day(entry.timestamp)
+        days_by_session[entry.session_id].add(day)
+        for session_id in session_ids:
+            days_by_session[session_id].add(day)
+
+    days_by_key = defaultdict(set)
+    sessions = DescentSession.objects.filter(
+        pk__in=days_by_session
+    ).values_list('pk', 'user_id', 'descent_type_id')
+    for session_id, user_id, descent_type_id in sessions:
+        days_by_key[user_id, descent_type_id] |= days_by_session[session_id]
+    for (user_id, descent_type_id), days in days_by_key.items():
+        refresh(user_id, descent_type_id, min(days), max(days))
+
+
+def record_entry_added(entry):
+    """Fold a newly created entry into its day's rollup."""
+    key = {
+        'user_id': entry.session.user_id,
+        'descent_type_id': entry.session.descent_type_id,
+        'day': _day(entry.timestamp),
+    }
+    level = Value(entry.emotion_level)
+    changes = {
+        'entry_count': F('entry_count') + 1,
+        'emotion_sum': F('emotion_sum') + level,
+        'emotion_min': Least(F('emotion_min'), level),
+        'emotion_max': Greatest(F('emotion_max'), level),
+    }
+    if EmotionRollup.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            EmotionRollup.objects.create(
+                entry_count=1,
+                emotion_sum=entry.emotion_level,
+                emotion_min=entry.emotion_level,
+                emotion_max=entry.emotion_level,
+                **key,
+            )
+    except IntegrityError:
+        # Another writer created the row first; add to theirs
+        EmotionRollup.objects.filter(**key).update(**changes)
+
+
+def record_entries_changed(entries):
+    """Recompute the rollups of entries whose emotion level or session moved."""
+    moved = []
+    previous_sessions = set()
+    for entry in entries:
+        loaded = getattr(entry, '_loaded_values', {})
+        previous_session = loaded.get('session_id', entry.session_id)
+        if (
+            previous_session != entry.session_id
+            or loaded.get('emotion_level') != entry.emotion_level
+        ):
+            moved.append(entry)
+            if previous_session != entry.session_id:
+                previous_sessions.add(previous_session)
+    if moved:
+        refresh_entries(moved, previous_sessions)
+
+
+def record_entry_changed(entry):
+    record_entries_changed([entry])
+
+
+def record_entry_removed(entry):
+    refresh_entries([entry])
+
+
+def _session_days(session):
+    first = _day(session.started_at)
+    last = _day(session.last_entry_at) if session.last_entry_at else first
+    return min(first, last), max(first, last)
+
+
+def record_session_retyped(session, previous_descent_type_id):
+    """Move a session's entries between descent types after it is edited."""
+    first_day, last_day = _session_days(session)
+    for descent_type_id in (previous_descent_type_id, session.descent_type_id):
+        refresh(session.user_id, descent_type_id, first_day, last_day)
+
+
+def record_session_removed(session):
+    """Drop a deleted session's entries, which have already gone, from rollups."""
+    if session.entry_count:
+        refresh(session.user_id, session.descent_type_id, *_session_days(session))
+
+
+def rebuild(user_ids=None, batch_size=1000):
+    """
+    Recreate rollups from the Entry table and archived sessions; returns
+    the rows written.
+    """
+    rollups = EmotionRollup.objects.all()
+    entries = Entry.objects.all()
+    archived = DescentSession.objects.filter(archived_at__isnull=False)
+    if user_ids is not None:
+        rollups = rollups.filter(user_id__in=user_ids)
+        entries = entries.filter(session__user_id__in=user_ids)
+        archived = archived.filter(user_id__in=user_ids)
+
+    with transaction.atomic():
+        rollups.delete()
+        created = EmotionRollup.objects.bulk_create(
+            _rollups(_with_archived(
+                daily_rows(entries).iterator(chunk_size=batch_size),
+                archive.daily_rows(archived),
+            )),
+            batch_size=batch_size,
+        )
+    return len(created)
+
+
+def _totals(rollups):
+    return rollups.annotate(
+        entries=Sum('entry_count'),
+        average=Cast(Sum('emotion_sum'), FloatField()) / Sum('entry_count'),
+        lowest=Min('emotion_min'),
+        highest=Max('emotion_max'),
+    )
+
+
+def trend(rollups, period='week'):
+    """Emotion totals per day, week or month (see PERIODS), oldest first."""
+    return _totals(
+        rollups.annotate(period=PERIODS[period]('day')).values('period')
+    ).order_by('period')
+
+
+def by_descent_type(rollups):
+    """Emotion totals for each descent type in ``rollups``."""
+    return _totals(
+        rollups.values('descent_type_id', 'descent_type__name')
+    ).order_by('descent_type__name')
@@ -0,0 +1,251 @@
+"""
+Full-text search over journal entries.
+
+PostgreSQL keeps a weighted ``tsvector`` in ``Entry.search_vector`` (content
+weighted above reflection), filled in by a trigger and covered by a GIN
+index; the trigger only fires when those two columns are written.
+SQLite, used in development and tests, mirrors the same two columns into an
+FTS5 external-content table kept in sync by triggers. Both are installed by
+migrations 0007 and 0014; ``install_sqlite_index`` is also re-run after
+every migrate because SQLite drops triggers whenever Django rebuilds the
+entry table. ``Entry.objects`` defers ``search_vector``, so ordinary reads
+never fetch it.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank,
+)
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Entry
+
+
+SEARCH_CONFIG = 'english'
+PAGE_SIZE = 20
+
+# Unprintable markers wrapped around matches by the database; swapped for
+# <mark> tags only after the surrounding text has been HTML-escaped.
+MATCH_START = '\x02'
+MATCH_STOP = '\x03'
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS journal_entry_fts USING fts5(
+        content, reflection,
+        content='journal_entry', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_entry_fts_insert
+    AFTER INSERT ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(rowid, content, reflection)
+        VALUES (new.id, new.content, new.reflection);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_entry_fts_delete
+    AFTER DELETE ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(journal_entry_fts, rowid, content, reflection)
+        VALUES ('delete', old.id, old.content, old.reflection);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS journal_entry_fts_update
+    AFTER UPDATE OF content, reflection ON journal_entry BEGIN
+        INSERT INTO journal_entry_fts(journal_entry_fts, rowid, content, reflection)
+        VALUES ('delete', old.id, old.content, old.reflection);
+        INSERT INTO journal_entry_fts(rowid, content, reflection)
+        VALUES (new.id, new.content, new.reflection);
+    END
+    """,
+]
+
+
+class SearchHit:
+    """An entry matching a search, with its rank and highlighted snippets."""
+
+    def __init__(self, entry, rank, content, reflection):
+        self.entry = entry
+        self.rank = rank
+        self.content = _highlight(content)
+        self.reflection = _highlight(reflection)
+
+
+class SearchResults:
+    def __init__(self, query, hits, page, has_next):
+        self.query = query
+        self.hits = hits
+        self.page = page
+        self.has_next = has_next
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    def __iter__(self):
+        return iter(self.hits)
+
+    def __len__(self):
+        return len(self.hits)
+
+
+def _highlight(snippet):
+    if not snippet:
+        return ''
+    return mark_safe(
+        escape(snippet)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_STOP, '</mark>')
+    )
+
+
+def _fts5_query(query):
+    """Turn free text into an FTS5 query matching every word, safely quoted."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def install_sqlite_index(using=connection):
+    """Create the FTS5 table and triggers, building the index if it is new."""
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'journal_entry_fts'"
+        )
+        exists = cursor.fetchone() is not None
+        for statement in SQLITE_SCHEMA:
+            cursor.execute(statement)
+        if not exists:
+            cursor.execute(
+                "INSERT INTO journal_entry_fts(journal_entry_fts) VALUES ('rebuild')"
+            )
+
+
+def rebuild(batch_size=1000):
+    """Rebuild the search index from scratch; returns the rows reindexed."""
+    if connection.vendor == 'sqlite':
+        install_sqlite_index()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO journal_entry_fts(journal_entry_fts) VALUES ('rebuild')"
+            )
+        return Entry.objects.count()
+
+    # Touching the indexed columns fires the trigger, in short transactions
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            Entry.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return total
+        total += Entry.objects.filter(pk__in=batch).update(content=F('content'))
+        last_pk = batch[-1]
+
+
+def filter_entries(queryset, query):
+    """Restrict an Entry queryset to rows matching ``query`` via the index."""
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=search_query)
+    match = _fts5_query(query)
+    if not match:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        'SELECT rowid FROM journal_entry_fts WHERE journal_entry_fts MATCH %s',
+        [match],
+    ))
+
+
+def search_entries(user, query, page=1, page_size=PAGE_SIZE):
+    """Return one page of ``user``'s entries ranked by relevance to ``query``."""
+    query = (query or '').strip()
+    page = max(1, page)
+    if not query:
+        return SearchResults(query, [], page, False)
+
+    offset = (page - 1) * page_size
+    if connection.vendor == 'postgresql':
+        rows = _search_postgres(user, query, offset, page_size + 1)
+    else:
+        rows = _search_sqlite(user, query, offset, page_size + 1)
+
+    has_next = len(rows) > page_size
+    return SearchResults(query, rows[:page_size], page, has_next)
+
+
+def _search_postgres(user, query, offset, limit):
+    search_query = SearchQuery(
+        query, config=SEARCH_CONFIG, search_type='websearch'
+    )
+    headline = {
+        'config': SEARCH_CONFIG,
+        'start_sel': MATCH_START,
+        'stop_sel': MATCH_STOP,
+        'max_words': 35,
+        'min_words': 15,
+    }
+    entries = (
+        Entry.objects.filter(session__user=user, search_vector=search_query)
+        .select_related('session__descent_type')
+        .annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            content_snippet=SearchHeadline('content', search_query, **headline),
+            reflection_snippet=SearchHeadline(
+                'reflection', search_query, **headline
+            ),
+        )
+        .order_by('-rank', '-timestamp')[offset:offset + limit]
+    )
+    return [
+        SearchHit(
+            entry, entry.rank, entry.content_snippet, entry.reflection_snippet
+        )
+        for entry in entries
+    ]
+
+
+def _search_sqlite(user, query, offset, limit):
+    match = _fts5_query(query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT e.id,
+                   bm25(journal_entry_fts, 1.0, 0.5) AS rank,
+                   snippet(journal_entry_fts, 0, %s, %s, '...', 32),
+                   snippet(journal_entry_fts, 1, %s, %s, '...', 16)
+            FROM journal_entry_fts
+            JOIN journal_entry e ON e.id = journal_entry_fts.rowid
+            JOIN journal_descentsession s ON s.id = e.session_id
+            WHERE journal_entry_fts MATCH %s AND s.user_id = %s
+            ORDER BY rank, e.timestamp DESC
+            LIMIT %s OFFSET %s
+            """,
+            [
+                MATCH_START, MATCH_STOP, MATCH_START, MATCH_STOP,
+                match, user.pk, limit, offset,
+            ],
+        )
+        rows = cursor.fetchall()
+
+    entries = Entry.objects.select_related('session__descent_type').in_bulk(
+        [row[0] for row in rows]
+    )
+    return [
+        # bm25() scores better matches lower; flip it so higher ranks first
+        SearchHit(entries[pk], -rank, content, reflection)
+        for pk, rank, content, reflection in rows
+        if pk in entries
+    ]
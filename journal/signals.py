@@ -1,5 +1,185 @@
-from django.db.models.signals import post_migrate
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db import connections
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_delete,
+)
 from django.dispatch import receiver
-from django.apps import apps
 
+from . import (
+    activity, backends, catalog, counters, dbpool, rollups, search, summaries,
+)
+from .models import (
+    ACTIVE_STATUSES, ActivityEvent, DescentSession, DescentType, Entry,
+    UserSummary, entries_deleted, sessions_deleted,
+)
 
+
+# Session statuses that end a descent, and the event each one is logged as
+FINISHED_EVENTS = {
+    'COMPLETED': ActivityEvent.SESSION_COMPLETED,
+    'ABANDONED': ActivityEvent.SESSION_ABANDONED,
+}
+
+
+def _remember_loaded_values(instance, *field_names):
+    """Reset the snapshot used to detect changes on the next save."""
+    instance._loaded_values = {
+        name: getattr(instance, name) for name in field_names
+    }
+
+
+def _remember_cascade(instance, sessions):
+    instance._removal_deltas = counters.session_removal_deltas(sessions)
+
+
+def _apply_cascade(instance):
+    for name, delta in getattr(instance, '_removal_deltas', {}).items():
+        counters.adjust(name, delta)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust('total_users', 1)
+        UserSummary.objects.create(
+            user=instance, last_active_at=instance.date_joined
+        )
+    backends.forget_user(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    _remember_cascade(instance, DescentSession.objects.filter(user=instance))
+    # Before the foreign key is cleared, while the events can still be found
+    activity.forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    counters.adjust('total_users', -1)
+    backends.forget_user(instance.pk)
+    # Rollups go with the user through their foreign key
+    _apply_cascade(instance)
+
+
+def _descent_types_changed():
+    # Other workers reload once the new version commits with the change
+    catalog.descent_types.publish()
+
+
+@receiver(post_save, sender=DescentType)
+def descent_type_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust('total_descent_types', 1)
+    _descent_types_changed()
+
+
+@receiver(pre_delete, sender=DescentType)
+def descent_type_deleting(sender, instance, **kwargs):
+    sessions = DescentSession.objects.filter(descent_type=instance)
+    _remember_cascade(instance, sessions)
+    instance._affected_users = set(
+        sessions.order_by().values_list('user_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=DescentType)
+def descent_type_deleted(sender, instance, **kwargs):
+    counters.adjust('total_descent_types', -1)
+    _apply_cascade(instance)
+    summaries.refresh_users(getattr(instance, '_affected_users', ()))
+    _descent_types_changed()
+
+
+@receiver(post_save, sender=DescentSession)
+def session_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    is_active = instance.status in ACTIVE_STATUSES
+    if created:
+        counters.adjust('total_sessions', 1)
+        counters.adjust('active_sessions', int(is_active))
+        summaries.record_session_added(instance)
+        activity.record(ActivityEvent.SESSION_STARTED, instance)
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        previous_status = loaded.get('status', instance.status)
+        was_active = previous_status in ACTIVE_STATUSES
+        counters.adjust('active_sessions', int(is_active) - int(was_active))
+        if instance.status != previous_status:
+            kind = FINISHED_EVENTS.get(instance.status)
+            if kind:
+                activity.record(kind, instance)
+        previous_type = loaded.get('descent_type_id', instance.descent_type_id)
+        if instance.descent_type_id != previous_type:
+            rollups.record_session_retyped(instance, previous_type)
+    _remember_loaded_values(instance, 'status', 'descent_type_id')
+
+
+@receiver(sessions_deleted)
+def sessions_removed(sender, instances, **kwargs):
+    counters.adjust('total_sessions', -len(instances))
+    counters.adjust('active_sessions', -sum(
+        session.status in ACTIVE_STATUSES for session in instances
+    ))
+    # The sessions' entries went with them without touching the counters
+    counters.adjust('total_entries', -sum(
+        session.entry_count for session in instances
+    ))
+    for session in instances:
+        rollups.record_session_removed(session)
+    summaries.refresh_users({session.user_id for session in instances})
+
+
+@receiver(post_save, sender=Entry)
+def entry_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.adjust('total_entries', 1)
+        summaries.record_entry_added(instance)
+        summaries.record_user_entry_added(instance, instance.session.user_id)
+        rollups.record_entry_added(instance)
+        activity.record(ActivityEvent.ENTRY_ADDED, instance.session, instance)
+    else:
+        summaries.record_entry_changed(instance)
+        rollups.record_entry_changed(instance)
+    _remember_loaded_values(instance, 'session_id', 'emotion_level')
+
+
+@receiver(entries_deleted)
+def entries_removed(sender, instances, **kwargs):
+    counters.adjust('total_entries', -len(instances))
+    session_ids = {entry.session_id for entry in instances}
+    summaries.refresh_sessions(session_ids)
+    summaries.refresh_users(
+        DescentSession.objects.filter(pk__in=session_ids)
+        .values_list('user_id', flat=True)
+    )
+    rollups.refresh_entries(instances)
+
+
+@receiver(post_migrate)
+def restore_sqlite_search_index(sender, using='default', **kwargs):
+    # SQLite drops the FTS triggers whenever a migration rebuilds the entry
+    # table, so put them back (a no-op if they are still there).
+    if sender.name != 'journal':
+        return
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and 'journal_entry' in (
+        connection.introspection.table_names()
+    ):
+        search.install_sqlite_index(connection)
+
+
+@receiver(connection_created)
+def database_connected(sender, connection, **kwargs):
+    if connection.alias == 'default':
+        dbpool.stats.connected()
+
+
+@receiver(request_finished)
+def request_finished_stats(sender, **kwargs):
+    dbpool.stats.publish()
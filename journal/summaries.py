@@ -0,0 +1,187 @@
+from django.contrib.auth.models import User
+from django.db.models import (
+    BigIntegerField, Case, Count, F, IntegerField, Max, Min, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import DescentSession, Entry, UserSummary
+
+
+def _entry_aggregate(aggregate):
+    """Correlated subquery computing ``aggregate`` over a session's entries."""
+    return Subquery(
+        Entry.objects.filter(session=OuterRef('pk'))
+        .order_by()
+        .values('session')
+        .annotate(value=aggregate)
+        .values('value')[:1]
+    )
+
+
+def summary_expressions():
+    """
+    UPDATE expressions that recompute every summary column from the Entry
+    table. Used both for a single session and for batched rebuilds.
+    """
+    latest = Entry.objects.filter(session=OuterRef('pk')).order_by(
+        '-timestamp', '-pk'
+    )
+    return {
+        'entry_count': Coalesce(
+            _entry_aggregate(Count('pk')), Value(0),
+            output_field=IntegerField(),
+        ),
+        'emotion_sum': Coalesce(
+            _entry_aggregate(Sum('emotion_level')), Value(0),
+            output_field=IntegerField(),
+        ),
+        'emotion_min': _entry_aggregate(Min('emotion_level')),
+        'emotion_max': _entry_aggregate(Max('emotion_level')),
+        'last_entry_at': Subquery(latest.values('timestamp')[:1]),
+        'latest_entry': Subquery(latest.values('pk')[:1]),
+    }
+
+
+def refresh_sessions(session_ids):
+    """
+    Recompute the summary columns of the given sessions in one UPDATE.
+    Archived sessions keep the summary they were archived with, as their
+    entries are no longer in the Entry table.
+    """
+    session_ids = {pk for pk in session_ids if pk is not None}
+    if not session_ids:
+        return 0
+    return DescentSession.objects.filter(
+        pk__in=session_ids, archived_at__isnull=True
+    ).update(
+        **summary_expressions()
+    )
+
+
+def record_entry_added(entry):
+    """Fold a newly created entry into its session's summary."""
+    level = Value(entry.emotion_level)
+    is_latest = Q(last_entry_at__isnull=True) | Q(
+        last_entry_at__lte=entry.timestamp
+    )
+    DescentSession.objects.filter(pk=entry.session_id).update(
+        entry_count=F('entry_count') + 1,
+        emotion_sum=F('emotion_sum') + entry.emotion_level,
+        emotion_min=Least(Coalesce(F('emotion_min'), level), level),
+        emotion_max=Greatest(Coalesce(F('emotion_max'), level), level),
+        latest_entry=Case(
+            When(is_latest, then=Value(entry.pk)),
+            default=F('latest_entry'),
+            output_field=BigIntegerField(),
+        ),
+        last_entry_at=Case(
+            When(is_latest, then=Value(entry.timestamp)),
+            default=F('last_entry_at'),
+        ),
+    )
+
+
+def record_entries_changed(entries):
+    """
+    Refresh the summaries affected by edited entries, including those saved
+    with ``bulk_update`` which bypasses the post_save signal.
+    """
+    affected = set()
+    for entry in entries:
+        loaded = getattr(entry, '_loaded_values', {})
+        previous_session = loaded.get('session_id', entry.session_id)
+        previous_level = loaded.get('emotion_level')
+        # Content edits don't move counts, timestamps or emotion bounds
+        if (
+            previous_session != entry.session_id
+            or previous_level != entry.emotion_level
+        ):
+            affected.update([previous_session, entry.session_id])
+    refresh_sessions(affected)
+
+
+def record_entry_changed(entry):
+    """Refresh the summaries affected by an edited entry."""
+    record_entries_changed([entry])
+
+
+def record_entry_removed(entry):
+    """Refresh the summary of the session an entry was deleted from."""
+    refresh_sessions([entry.session_id])
+
+
+def _session_aggregate(aggregate):
+    """Correlated subquery computing ``aggregate`` over a user's sessions."""
+    return Subquery(
+        DescentSession.objects.filter(user=OuterRef('user'))
+        .order_by()
+        .values('user')
+        .annotate(value=aggregate)
+        .values('value')[:1]
+    )
+
+
+def user_summary_expressions():
+    """UPDATE expressions that recompute every UserSummary column."""
+    date_joined = Subquery(
+        User.objects.filter(pk=OuterRef('user')).values('date_joined')[:1]
+    )
+    return {
+        'session_count': Coalesce(
+            _session_aggregate(Count('pk')), Value(0),
+            output_field=IntegerField(),
+        ),
+        'entry_count': Coalesce(
+            _session_aggregate(Sum('entry_count')), Value(0),
+            output_field=IntegerField(),
+        ),
+        'last_active_at': Greatest(
+            date_joined,
+            Coalesce(
+                _session_aggregate(
+                    Max(Coalesce('last_entry_at', 'started_at'))
+                ),
+                date_joined,
+            ),
+        ),
+    }
+
+
+def refresh_users(user_ids=None):
+    """
+    Recompute the summaries of the given users (every user if None) in one
+    UPDATE, first creating any that are missing, e.g. for users added with
+    ``bulk_create``.
+    """
+    users = User.objects.filter(summary__isnull=True)
+    summaries = UserSummary.objects.all()
+    if user_ids is not None:
+        user_ids = {pk for pk in user_ids if pk is not None}
+        if not user_ids:
+            return 0
+        users = users.filter(pk__in=user_ids)
+        summaries = summaries.filter(user_id__in=user_ids)
+    UserSummary.objects.bulk_create(
+        (UserSummary(user_id=pk) for pk in users.values_list('pk', flat=True)),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return summaries.update(**user_summary_expressions())
+
+
+def _record_user_activity(user_id, at, **counts):
+    UserSummary.objects.filter(user_id=user_id).update(
+        last_active_at=Greatest(F('last_active_at'), Value(at)),
+        **{name: F(name) + delta for name, delta in counts.items()},
+    )
+
+
+def record_session_added(session):
+    """Count a new session towards its user's summary."""
+    _record_user_activity(session.user_id, session.started_at, session_count=1)
+
+
+def record_user_entry_added(entry, user_id):
+    """Count a new entry towards the summary of the user who wrote it."""
+    _record_user_activity(user_id, entry.timestamp, entry_count=1)
@@ -1,7 +1,7 @@
 from django import template
-from journal.models import DescentType, DescentSession, Entry
-from django.utils import timezone
-from django.contrib.auth.models import User
+from journal import activity
+from journal.counters import get_dashboard_stats
+from journal.models import ActivityEvent, DescentType, DescentSession
 
 register = template.Library()
 
@@ -12,25 +12,21 @@ def render_descent_type_list():
 
 
 @register.inclusion_tag('journal/includes/session_list.html')
-def render_session_list():
-    sessions = DescentSession.objects.all().order_by('-started_at')
+def render_session_list(limit=10):
+    sessions = DescentSession.objects.select_related(
+        'user', 'descent_type'
+    ).order_by('-started_at')[:limit]
     return {'sessions': sessions}
 
-@register.inclusion_tag('journal/includes/stats.html')
-def render_dashboard_stats():
-    stats = {
-        'total_users': User.objects.count(),
-        'total_sessions': DescentSession.objects.count(),
-        'active_sessions': DescentSession.objects.filter(status__in=['STARTED', 'IN_PROGRESS']).count(),
-        'total_entries': Entry.objects.count(),
-        'total_descent_types': DescentType.objects.count()
-    }
+@register.inclusion_tag('journal/includes/stats.html', takes_context=True)
+def render_dashboard_stats(context):
+    stats = context.get('stats') or get_dashboard_stats()
     return {'stats': stats}
 
 @register.inclusion_tag('journal/includes/recent_activity.html')
 def render_recent_activity():
-    recent_sessions = DescentSession.objects.order_by('-started_at')[:5]
-    recent_entries = Entry.objects.order_by('-timestamp')[:5]
+    recent_sessions = activity.feed.recent(5, kinds=ActivityEvent.SESSION_KINDS)
+    recent_entries = activity.feed.recent(5, kinds=(ActivityEvent.ENTRY_ADDED,))
     return {
         'recent_sessions': recent_sessions,
         'recent_entries': recent_entries
@@ -0,0 +1,50 @@
+from urllib.parse import quote, urljoin
+
+from django import template
+from django.templatetags.static import PrefixNode, static
+from django.utils.html import format_html_join
+
+from journal import assets
+
+register = template.Library()
+
+TAGS = {
+    '.css': '<link rel="stylesheet" href="{}">',
+    '.js': '<script src="{}"></script>',
+}
+
+
+def _extension(name):
+    return name[name.rindex('.'):]
+
+
+def _built_url(path):
+    # Bundles are written after collectstatic, so they are not in the
+    # staticfiles manifest and static() would refuse them
+    return urljoin(PrefixNode.handle_simple('STATIC_URL'), quote(path))
+
+
+@register.simple_tag
+def asset(name):
+    """
+    Load bundle ``name``: the built file when build_assets has run, or else
+    each of its source files.
+    """
+    built = assets.load_manifest().get(name)
+    urls = [_built_url(built)] if built else [
+        static(path) for path in assets.BUNDLES[name]
+    ]
+    return format_html_join('\n', TAGS[_extension(name)], ((url,) for url in urls))
+
+
+@register.simple_tag
+def asset_preloads():
+    """
+    Preload hints for the built script bundles, which load at the end of
+    the body. Stylesheets are linked in <head> already and gain nothing.
+    """
+    return format_html_join('\n', '<link rel="preload" href="{}" as="script">', (
+        (_built_url(built),)
+        for name, built in assets.load_manifest().items()
+        if _extension(name) == '.js'
+    ))
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from ..models import DescentType, DescentSession, Entry
+
+User = get_user_model()
+
+
+class JournalTestCase(TestCase):
+    """A user and a descent type to write sessions in, and an empty cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.descent_type = DescentType.objects.create(
+            name='Test Descent',
+            description='A test descent type',
+            type='EMOTIONAL',
+            is_active=True
+        )
+
+    def add_session(self, status='STARTED', levels=(), days_ago=None, user=None):
+        """
+        A session of ``self.descent_type`` for ``user`` (``self.user`` by
+        default) with an entry per emotion level in ``levels``, optionally
+        started ``days_ago`` days back.
+        """
+        session = DescentSession.objects.create(
+            user=user or self.user, descent_type=self.descent_type, status=status
+        )
+        for level in levels:
+            Entry.objects.create(
+                session=session, content=f"Level {level}", emotion_level=level
+            )
+        if days_ago is not None:
+            DescentSession.objects.filter(pk=session.pk).update(
+                started_at=timezone.now() - timedelta(days=days_ago)
+            )
+        if levels or days_ago is not None:
+            # Picks up the summary columns the entries wrote
+            session.refresh_from_db()
+        return session
@@ -0,0 +1,60 @@
+from .. import activity
+from .base import JournalTestCase
+from ..models import ActivityEvent, DescentSession, Entry
+
+
+class TestActivityEvents(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        activity.feed.clear()
+
+    def test_events_logged_for_session_lifecycle(self):
+        """Test starting, writing in and completing a session log events"""
+        with self.captureOnCommitCallbacks(execute=True):
+            session = self.add_session()
+            Entry.objects.create(session=session, content="Test Content")
+            session.status = 'COMPLETED'
+            session.save()
+            # Saving again without a status change logs nothing new
+            session.save()
+
+        kinds = list(
+            ActivityEvent.objects.order_by('pk').values_list('kind', flat=True)
+        )
+        self.assertEqual(kinds, [
+            ActivityEvent.SESSION_STARTED,
+            ActivityEvent.ENTRY_ADDED,
+            ActivityEvent.SESSION_COMPLETED,
+        ])
+        event = ActivityEvent.objects.get(kind=ActivityEvent.ENTRY_ADDED)
+        self.assertEqual(event.username, 'testuser')
+        self.assertEqual(event.descent_type_name, 'Test Descent')
+
+    def test_record_uses_loaded_user_and_descent_type(self):
+        """Test logging an event reads nothing the session already holds"""
+        session = self.add_session()
+        with self.assertNumQueries(1):
+            activity.record(ActivityEvent.SESSION_STARTED, session)
+        session = DescentSession.objects.get(pk=session.pk)
+        with self.assertNumQueries(2):
+            event = activity.record(ActivityEvent.SESSION_STARTED, session)
+        self.assertEqual(event.username, 'testuser')
+        self.assertEqual(event.descent_type_name, 'Test Descent')
+
+    def test_deleting_user_removes_their_events(self):
+        """Test a deleted account leaves no username behind in the log"""
+        session = self.add_session()
+        Entry.objects.create(session=session, content="Test Content")
+        self.user.delete()
+        self.assertFalse(ActivityEvent.objects.filter(username='testuser'))
+
+    def test_feed_serves_newest_events_from_buffer(self):
+        """Test the feed returns the newest events without requerying"""
+        session = self.add_session()
+        activity.feed.recent(5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(session=session, content="Test Content")
+        with self.assertNumQueries(0):
+            recent = activity.feed.recent(5)
+        self.assertEqual(recent[0].kind, ActivityEvent.ENTRY_ADDED)
+        self.assertEqual(recent[1].kind, ActivityEvent.SESSION_STARTED)
@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.core.management import call_command
+from .. import archive, rollups
+from .base import JournalTestCase
+from ..counters import reconcile
+from ..models import ArchivedSession, EmotionRollup, Entry, UserSummary
+
+
+class TestArchive(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.old = self.add_session('COMPLETED', [3, 7], days_ago=400)
+        self.other_old = self.add_session('ABANDONED', [5], days_ago=500)
+        self.recent = self.add_session('COMPLETED', [4], days_ago=10)
+        self.unfinished = self.add_session('IN_PROGRESS', [2], days_ago=400)
+
+    def rollup_values(self):
+        return list(EmotionRollup.objects.order_by('day').values_list(
+            'day', 'entry_count', 'emotion_sum', 'emotion_min', 'emotion_max'
+        ))
+
+    def test_archive_and_restore(self):
+        """Test archiving moves old entries out without changing any totals"""
+        entry_ids = list(self.old.entries.order_by('timestamp').values_list('pk', flat=True))
+        rollup_values = self.rollup_values()
+        output = StringIO()
+        call_command('archive_sessions', batch_size=1, stdout=output)
+        self.assertIn('Archived 2 sessions and 3 entries', output.getvalue())
+
+        self.assertFalse(Entry.objects.filter(session__in=[self.old, self.other_old]).exists())
+        self.assertEqual(Entry.objects.count(), 2)
+        self.old.refresh_from_db()
+        self.assertIsNotNone(self.old.archived_at)
+        self.assertEqual((self.old.entry_count, self.old.emotion_sum), (2, 10))
+        self.assertEqual(UserSummary.objects.get(user=self.user).entry_count, 5)
+        self.assertEqual(reconcile(), {})
+        rollups.rebuild()
+        self.assertEqual(self.rollup_values(), rollup_values)
+
+        entries = archive.session_entries(self.old)
+        self.assertEqual([entry.pk for entry in entries], entry_ids)
+        self.assertEqual([entry.content for entry in entries], ['Level 3', 'Level 7'])
+
+        # Recomputing a day keeps the archived sessions still on it
+        self.other_old.delete()
+        incremental = self.rollup_values()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.rollup_values())
+        self.assertEqual(sum(row[1] for row in incremental), 4)
+
+        self.assertTrue(archive.restore(self.old))
+        self.assertIsNone(self.old.archived_at)
+        self.assertEqual(list(self.old.entries.order_by('timestamp').values_list('pk', flat=True)), entry_ids)
+        self.assertEqual(self.old.latest_entry_id, entry_ids[-1])
+        self.assertFalse(ArchivedSession.objects.exists())
+        self.assertEqual(reconcile(), {})
+        self.assertFalse(archive.restore(self.old))
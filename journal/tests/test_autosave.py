@@ -0,0 +1,34 @@
+from asgiref.sync import async_to_sync
+from .. import autosave
+from .base import JournalTestCase
+from ..models import EntryDraft
+
+
+class TestAutosave(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sessions = [self.add_session() for _ in range(2)]
+
+    def test_updates_are_coalesced(self):
+        """Test only the newest update per session is written on flush"""
+        coalescer = autosave.DraftCoalescer(interval=3600)
+
+        async def type_drafts():
+            coalescer.start()
+            for revision in range(1, 6):
+                for session in self.sessions:
+                    written = await coalescer.update(self.user.pk, session.pk, {
+                        'content': f'Draft {revision}', 'reflection': '',
+                        'emotion_level': None, 'revision': revision,
+                    })
+                    self.assertFalse(written)
+            await coalescer.stop()
+
+        async_to_sync(type_drafts)()
+        self.assertEqual(
+            set(EntryDraft.objects.values_list('content', flat=True)), {'Draft 5'}
+        )
+        self.assertEqual(EntryDraft.objects.count(), 2)
+        self.assertEqual(
+            autosave.stats(), {'received': 10, 'written': 2, 'coalesced': 8}
+        )
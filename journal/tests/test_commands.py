@@ -0,0 +1,241 @@
+import copy
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from .. import catalog, export
+from .base import JournalTestCase
+from ..counters import get_dashboard_stats
+from ..management.commands.import_journal import (
+    Command as ImportCommand, import_marker,
+)
+from ..models import Counter, DescentType, DescentSession, Entry
+
+User = get_user_model()
+
+
+class TestImportJournal(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.target = User.objects.create_user(
+            username='target',
+            password='testpass123'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'journal.jsonl')
+
+    def write_export(self, extra_lines=()):
+        with open(self.path, 'w') as output:
+            for chunk in export.jsonl_chunks(self.user):
+                output.write(chunk)
+            for line in extra_lines:
+                output.write(line + '\n')
+
+    def test_import_round_trips_export(self):
+        """Test an export imports with timestamps, summaries and counters"""
+        session = self.add_session()
+        first = Entry.objects.create(session=session, content="First entry text", emotion_level=2)
+        Entry.objects.create(session=session, content="Second entry text", emotion_level=4)
+        self.write_export([
+            '{"type": "entry", "session_id": %d, "timestamp": "2024-01-01T00:00:00+00:00",'
+            ' "content": "", "emotion_level": 3}' % session.pk,
+            'not json',
+        ])
+
+        output = StringIO()
+        call_command('import_journal', self.path, 'target', batch_size=1, stdout=output)
+
+        imported = DescentSession.objects.get(user=self.target)
+        self.assertEqual(imported.started_at, session.started_at)
+        self.assertEqual(imported.entry_count, 2)
+        self.assertEqual(imported.emotion_min, 2)
+        self.assertEqual(
+            imported.entries.order_by('timestamp').first().timestamp,
+            first.timestamp,
+        )
+        self.assertEqual(get_dashboard_stats()['total_entries'], 4)
+        self.assertIn('Imported 1 sessions and 2 entries', output.getvalue())
+        self.assertIn('Skipped 2 invalid rows', output.getvalue())
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test lines before the checkpoint are not imported again"""
+        session = self.add_session()
+        Entry.objects.create(session=session, content="Already imported")
+        Entry.objects.create(session=session, content="Still to import")
+        self.write_export()
+        checkpoint_path = self.path + '.checkpoint'
+        with open(checkpoint_path, 'w') as checkpoint:
+            checkpoint.write(json.dumps(
+                {'line': 2, 'sessions': {str(session.pk): session.pk}}
+            ) + '\n')
+            # Written by a batch whose transaction never committed
+            checkpoint.write(json.dumps({'line': 3, 'sessions': {}}) + '\n')
+        marker = Counter.objects.create(name=import_marker(checkpoint_path), value=2)
+
+        with self.assertRaises(CommandError):
+            call_command('import_journal', self.path, 'target', stdout=StringIO())
+        call_command('import_journal', self.path, 'target', resume=True, stdout=StringIO())
+
+        self.assertEqual(
+            list(session.entries.order_by('pk').values_list('content', flat=True)),
+            ['Already imported', 'Still to import', 'Still to import'],
+        )
+        self.assertFalse(DescentSession.objects.filter(user=self.target).exists())
+        self.assertFalse(os.path.exists(checkpoint_path))
+        self.assertFalse(Counter.objects.filter(pk=marker.pk).exists())
+
+    def test_import_checkpoint_appends_inside_batches(self):
+        """Test each batch appends its record and commits the import marker"""
+        session = self.add_session()
+        Entry.objects.create(session=session, content="First entry text")
+        Entry.objects.create(session=session, content="Second entry text")
+        self.write_export()
+        records = []
+        save_checkpoint = ImportCommand.save_checkpoint
+
+        def recording_save(command, sessions):
+            save_checkpoint(command, sessions)
+            with open(command.checkpoint_path) as checkpoint:
+                records.append([json.loads(line) for line in checkpoint])
+            if len(records) == 2:
+                raise RuntimeError('interrupted')
+
+        with mock.patch.object(ImportCommand, 'save_checkpoint', recording_save):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'import_journal', self.path, 'target', batch_size=1,
+                    stdout=StringIO(),
+                )
+        self.assertEqual([len(batch) for batch in records], [1, 2])
+        # The second batch rolled back along with its marker
+        marker = Counter.objects.get(name=import_marker(self.path + '.checkpoint'))
+        self.assertEqual(marker.value, records[0][0]['line'])
+
+    def test_import_accepts_entries_written_before_form_rules(self):
+        """Test export_journal output imports whole, short entries included"""
+        session = self.add_session()
+        Entry.objects.create(session=session, content="Calm", emotion_level=1)
+        Entry.objects.create(session=session, content="A longer entry", emotion_level=7)
+        call_command('export_journal', 'testuser', output=self.path, stderr=StringIO())
+
+        output = StringIO()
+        call_command('import_journal', self.path, 'target', stdout=output)
+
+        imported = DescentSession.objects.get(user=self.target)
+        self.assertEqual(
+            list(imported.entries.order_by('timestamp').values_list(
+                'content', 'emotion_level'
+            )),
+            [('Calm', 1), ('A longer entry', 7)],
+        )
+        self.assertNotIn('invalid', output.getvalue())
+
+    def test_interrupted_import_creates_no_descent_types(self):
+        """Test descent types created for a batch roll back with it"""
+        with open(self.path, 'w') as source:
+            source.write(json.dumps({
+                'type': 'session', 'id': 1, 'descent_type': 'Brand New',
+                'started_at': '2024-01-01T00:00:00+00:00',
+            }) + '\n')
+
+        with mock.patch.object(
+            ImportCommand, 'save_checkpoint', side_effect=RuntimeError('interrupted')
+        ):
+            with self.assertRaises(RuntimeError):
+                call_command('import_journal', self.path, 'target', stdout=StringIO())
+        self.assertFalse(DescentType.objects.filter(name='Brand New').exists())
+
+        call_command('import_journal', self.path, 'target', stdout=StringIO())
+        self.assertEqual(DescentType.objects.filter(name='Brand New').count(), 1)
+
+
+class TestClearExpiredSessions(TestCase):
+    def test_expired_sessions_deleted_in_batches(self):
+        """Test only expired sessions are deleted, whatever the batch size"""
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}', session_data='',
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key='current', session_data='',
+            expire_date=now + timedelta(days=1),
+        )
+        output = StringIO()
+        call_command('clear_expired_sessions', batch_size=2, stdout=output)
+        self.assertIn('Deleted 5 expired sessions', output.getvalue())
+        self.assertEqual(list(Session.objects.values_list('pk', flat=True)), ['current'])
+
+
+class TestTemplateTooling(TestCase):
+    def test_compile_templates(self):
+        """Test every template compiles, and a syntax error fails the command"""
+        output = StringIO()
+        call_command('compile_templates', stdout=output)
+        self.assertIn('Compiled', output.getvalue())
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'broken.html'), 'w') as template:
+                template.write('{% block content %}Never closed')
+            templates = copy.deepcopy(settings.TEMPLATES)
+            templates[0]['DIRS'] = [directory, *templates[0]['DIRS']]
+            with override_settings(TEMPLATES=templates):
+                with self.assertRaisesMessage(CommandError, 'broken.html'):
+                    call_command('compile_templates', stdout=StringIO())
+
+    def test_bench_templates(self):
+        """Test templates are benchmarked with plain and cached loaders"""
+        User.objects.create_user(username='writer', password='testpass123')
+        output = StringIO()
+        call_command('bench_templates', user='writer', iterations=2, stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[2].startswith('journal/journal_history.html'))
+        self.assertIn('cached', lines[2])
+
+
+class TestLoadTooling(TestCase):
+    def test_seed_load_and_bench_views(self):
+        """Test seeded data is consistent and every route can be benchmarked"""
+        cache.clear()
+        catalog.descent_types.clear()
+        self.assertEqual(catalog.descent_types.active(), ())
+        call_command(
+            'seed_load', users=5, descent_types=2, sessions=4, entries=3,
+            seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(
+            len(catalog.descent_types.active()),
+            DescentType.objects.filter(is_active=True).count(),
+        )
+        self.assertEqual(
+            get_dashboard_stats()['total_entries'], Entry.objects.count()
+        )
+        sessions = DescentSession.objects.all()
+        self.assertEqual(
+            sum(session.entry_count for session in sessions),
+            Entry.objects.count(),
+        )
+
+        output = StringIO()
+        call_command('bench_views', iterations=2, warmup=0, json='-', stdout=output)
+        report = json.loads(output.getvalue())
+        names = [view['name'] for view in report['views']]
+        self.assertIn('journal:journal_history', names)
+        self.assertIn('accounts:login', names)
+        self.assertEqual(DescentType.objects.count(), 2)
+        self.assertEqual(User.objects.count(), 5)
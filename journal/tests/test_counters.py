@@ -0,0 +1,98 @@
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from .base import JournalTestCase
+from ..counters import get_dashboard_stats, reconcile
+from ..models import Counter, DescentType, DescentSession, Entry
+
+User = get_user_model()
+
+
+class TestCounters(JournalTestCase):
+    def test_counters_follow_writes(self):
+        """Test counters track creates, status changes and deletes"""
+        with self.captureOnCommitCallbacks(execute=True):
+            session = self.add_session()
+            Entry.objects.create(session=session, content="Test Content")
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_users'], 1)
+        self.assertEqual(stats['total_descent_types'], 1)
+        self.assertEqual(stats['total_sessions'], 1)
+        self.assertEqual(stats['active_sessions'], 1)
+        self.assertEqual(stats['total_entries'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session = DescentSession.objects.get(pk=session.pk)
+            session.status = 'COMPLETED'
+            session.save()
+        self.assertEqual(get_dashboard_stats()['active_sessions'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session.delete()
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_sessions'], 0)
+        self.assertEqual(stats['total_entries'], 0)
+
+    def test_stats_cached_only_in_shared_cache(self):
+        """Test stats skip a per-process cache other workers cannot invalidate"""
+        get_dashboard_stats()
+        # Another worker's write invalidates only its own cache
+        Counter.objects.filter(name='total_users').update(value=F('value') + 1)
+        self.assertEqual(get_dashboard_stats()['total_users'], 2)
+
+        with override_settings(SHARED_CACHE=True):
+            get_dashboard_stats()
+            Counter.objects.filter(name='total_users').update(value=F('value') + 1)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_dashboard_stats()['total_users'], 2)
+
+    def test_cascading_deletes_settle_counters_in_bulk(self):
+        """Test deleting a descent type or user keeps every counter exact"""
+        for user in (self.user, User.objects.create_user(username='other')):
+            self.add_session(levels=[5], user=user)
+        other_type = DescentType.objects.create(name='Other', description="Other")
+        DescentSession.objects.create(user=self.user, descent_type=other_type)
+
+        self.descent_type.delete()
+        self.assertEqual(reconcile(), {})
+        self.user.delete()
+        self.assertEqual(reconcile(), {})
+        self.assertEqual(Counter.objects.get(name='total_sessions').value, 0)
+
+    def test_cascading_deletes_skip_loading_entries(self):
+        """Test a cascade removes entries with DELETEs, never reading them"""
+        session = self.add_session()
+        for _ in range(3):
+            Entry.objects.create(session=session, content="Test Content")
+        with CaptureQueriesContext(connection) as queries:
+            self.user.delete()
+        entry_queries = [
+            query['sql'] for query in queries.captured_queries
+            if '"journal_entry"' in query['sql']
+        ]
+        self.assertTrue(entry_queries)
+        self.assertTrue(all(sql.startswith('DELETE') for sql in entry_queries))
+        self.assertEqual(reconcile(), {})
+
+    def test_sharded_counter_sums_its_rows(self):
+        """Test entry writes spread over counter shards that reads add up"""
+        session = self.add_session()
+        reconcile()
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(20):
+                Entry.objects.create(session=session, content="Test Content")
+        shards = Counter.objects.filter(name__startswith='total_entries')
+        self.assertEqual(shards.count(), 8)
+        self.assertGreater(shards.filter(value__gt=0).count(), 1)
+        self.assertEqual(get_dashboard_stats()['total_entries'], 20)
+        self.assertEqual(reconcile(), {})
+        self.assertEqual(shards.get(name='total_entries').value, 20)
+
+    def test_reconcile_corrects_drift(self):
+        """Test reconciliation resets drifted counters"""
+        Counter.objects.filter(name='total_users').update(value=42)
+        drifted = reconcile()
+        self.assertEqual(drifted, {'total_users': (42, 1)})
+        self.assertEqual(Counter.objects.get(name='total_users').value, 1)
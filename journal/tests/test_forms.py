@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from ..catalog import DescentTypeCatalog, descent_types
 from ..forms import DescentSessionForm, EntryForm
 from ..models import DescentType, DescentSession
 
@@ -50,6 +51,46 @@ class TestDescentSessionForm(TestCase):
         self.assertIn('descent_type', form.errors)
 
 
+class TestDescentTypeCatalog(TestCase):
+    def setUp(self):
+        self.descent_type = DescentType.objects.create(
+            name='Test Descent',
+            type='EMOTIONAL',
+            is_active=True
+        )
+        DescentType.objects.create(
+            name='Inactive Descent',
+            type='EMOTIONAL',
+            is_active=False
+        )
+
+    def test_form_renders_and_validates_from_catalog(self):
+        """Test the descent type choices render without queries once cached"""
+        descent_types.active()
+        with self.assertNumQueries(0):
+            html = str(DescentSessionForm()['descent_type'])
+        form = DescentSessionForm(data={'descent_type': self.descent_type.pk})
+        self.assertTrue(form.is_valid())
+        self.assertIn('Test Descent', html)
+        self.assertNotIn('Inactive Descent', html)
+        self.assertEqual(form.cleaned_data['descent_type'], self.descent_type)
+
+    def test_changes_reach_other_workers(self):
+        """Test a change reaches other processes once they recheck the version"""
+        other_worker = DescentTypeCatalog(max_age=60)
+        self.assertEqual(len(other_worker.active()), 1)
+
+        DescentType.objects.create(name='New Descent', is_active=True)
+        # Still within max_age: served from memory without checking
+        with self.assertNumQueries(0):
+            self.assertEqual(len(other_worker.active()), 1)
+        other_worker.max_age = 0
+        self.assertEqual(
+            [descent_type.name for descent_type in other_worker.active()],
+            ['New Descent', 'Test Descent'],
+        )
+
+
 class TestEntryForm(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -1,6 +1,10 @@
+from io import StringIO
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from ..models import DescentType, DescentSession, Entry
+from django.core.management import call_command
+from .base import JournalTestCase
+from ..models import DescentType, DescentSession, Entry, UserSummary
 
 User = get_user_model()
 
@@ -16,6 +20,7 @@ class TestDescentType(TestCase):
         self.assertEqual(descent_type.description, "A test descent type")
         self.assertEqual(descent_type.is_active, True)
 
+
 class TestDescentSession(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -40,6 +45,7 @@ class TestDescentSession(TestCase):
         self.assertEqual(session.status, 'STARTED')
         self.assertIsNotNone(session.started_at)
 
+
 class TestEntry(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -69,4 +75,90 @@ class TestEntry(TestCase):
         self.assertEqual(entry.content, "Test Content")
         self.assertEqual(entry.emotion_level, 3)
         self.assertEqual(entry.reflection, "Test reflection")
-        self.assertEqual(entry.session, self.session)
\ No newline at end of file
+        self.assertEqual(entry.session, self.session)
+
+
+class TestSessionSummary(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = self.add_session()
+
+    def add_entry(self, level):
+        return Entry.objects.create(
+            session=self.session,
+            content="Test Content",
+            emotion_level=level,
+        )
+
+    def test_summary_follows_entry_writes(self):
+        """Test the summary columns track creates, edits and deletes"""
+        first = self.add_entry(4)
+        latest = self.add_entry(2)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.entry_count, 2)
+        self.assertEqual(self.session.emotion_sum, 6)
+        self.assertEqual(self.session.emotion_min, 2)
+        self.assertEqual(self.session.emotion_max, 4)
+        self.assertEqual(self.session.latest_entry, latest)
+        self.assertEqual(self.session.last_entry_at, latest.timestamp)
+        self.assertEqual(self.session.average_emotion, 3)
+
+        first.emotion_level = 9
+        first.save()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.emotion_sum, 11)
+        self.assertEqual(self.session.emotion_max, 9)
+
+        latest.delete()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.entry_count, 1)
+        self.assertEqual(self.session.latest_entry, first)
+        self.assertEqual(self.session.emotion_min, 9)
+
+    def test_session_save_keeps_summary(self):
+        """Test saving a stale session instance leaves the summary intact"""
+        stale = DescentSession.objects.get(pk=self.session.pk)
+        self.add_entry(3)
+        stale.status = 'COMPLETED'
+        stale.save()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'COMPLETED')
+        self.assertEqual(self.session.entry_count, 1)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command repairs drifted summaries"""
+        self.add_entry(5)
+        DescentSession.objects.update(entry_count=0, emotion_sum=0)
+        call_command('rebuild_session_summaries', stdout=StringIO())
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.entry_count, 1)
+        self.assertEqual(self.session.emotion_sum, 5)
+
+    def test_user_summary_follows_writes(self):
+        """Test the user summary tracks sessions, entries and activity"""
+        summary = self.user.summary
+        summary.refresh_from_db()
+        self.assertEqual(summary.session_count, 1)
+        self.assertEqual(summary.last_active_at, self.session.started_at)
+
+        entry = self.add_entry(3)
+        self.add_entry(4)
+        summary.refresh_from_db()
+        self.assertEqual(summary.entry_count, 2)
+        self.assertEqual(summary.last_active_at, self.session.entries.latest('timestamp').timestamp)
+
+        entry.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.entry_count, 1)
+
+        self.session.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.session_count, summary.entry_count), (0, 0))
+
+    def test_rebuild_command_repairs_user_summaries(self):
+        """Test the rebuild command recomputes drifted user summaries"""
+        self.add_entry(2)
+        UserSummary.objects.all().delete()
+        call_command('rebuild_session_summaries', stdout=StringIO())
+        summary = UserSummary.objects.get(user=self.user)
+        self.assertEqual((summary.session_count, summary.entry_count), (1, 1))
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.db import connection
+from .base import JournalTestCase
+from ..models import DescentSession
+from ..pagination import EstimatedCountPaginator
+
+
+@mock.patch.object(connection, 'vendor', 'postgresql')
+@mock.patch.object(EstimatedCountPaginator, '_estimate', return_value=50000)
+class TestEstimatedCountPaginator(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        for status in ('STARTED', 'COMPLETED', 'COMPLETED'):
+            self.add_session(status)
+
+    def test_unfiltered_uses_estimate(self, estimate):
+        """Test an unfiltered changelist trusts the table's row estimate"""
+        paginator = EstimatedCountPaginator(DescentSession.objects.all(), 20)
+        self.assertEqual(paginator.count, 50000)
+
+    def test_filtered_estimate_checked_by_capped_count(self, estimate):
+        """Test a filtered overestimate falls back to the capped count"""
+        sessions = DescentSession.objects.filter(status='COMPLETED')
+        self.assertEqual(EstimatedCountPaginator(sessions, 20).count, 2)
+
+        with mock.patch('journal.pagination.ESTIMATE_THRESHOLD', 2):
+            self.assertEqual(EstimatedCountPaginator(sessions, 20).count, 50000)
@@ -0,0 +1,150 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from .. import activity
+from ..models import DescentType, DescentSession, Entry
+
+User = get_user_model()
+
+# Session counts every view and tag is measured at; query counts must not
+# change between them.
+SIZES = (1, 10, 100)
+
+
+class TestQueryBudgets(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_superuser(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.descent_type = DescentType.objects.create(
+            name='Test Descent',
+            description='A test descent type',
+            type='EMOTIONAL',
+        )
+        self.client.force_login(self.user)
+
+    def add_sessions(self, count):
+        for _ in range(count):
+            session = DescentSession.objects.create(
+                user=self.user,
+                descent_type=self.descent_type,
+                status='IN_PROGRESS',
+            )
+            for level in (2, 3, 4):
+                Entry.objects.create(
+                    session=session,
+                    content='Budget entry content',
+                    reflection='Budget reflection',
+                    emotion_level=level,
+                )
+
+    def cases(self):
+        """
+        (label, callable) pairs; each callable makes one request or render.
+        """
+        session = DescentSession.objects.filter(user=self.user).latest('started_at')
+        entry = session.entries.earliest('timestamp')
+        get = self.client.get
+        post = self.client.post
+
+        def url(name, *args):
+            return reverse(f'journal:{name}', args=args)
+
+        def render_tag(tag):
+            return lambda: Template(
+                '{% load admin_tags %}{% ' + tag + ' %}'
+            ).render(Context({}))
+
+        def export():
+            response = get(url('export_data'))
+            return b''.join(response.streaming_content)
+
+        return [
+            ('home', lambda: get(url('home'))),
+            ('about', lambda: get(url('about'))),
+            ('privacy', lambda: get(url('privacy'))),
+            ('terms', lambda: get(url('terms'))),
+            ('admin_dashboard', lambda: get(url('admin_dashboard'))),
+            ('start_descent', lambda: get(url('start_descent'))),
+            ('continue_descent', lambda: get(url('continue_descent', session.pk))),
+            ('edit_session', lambda: get(url('edit_session', session.pk))),
+            ('complete_descent', lambda: get(url('complete_descent', session.pk))),
+            ('abandon_descent', lambda: get(url('abandon_descent', session.pk))),
+            ('add_entry', lambda: post(url('add_entry', session.pk), {
+                'content': 'Another budget entry', 'emotion_level': 3,
+            })),
+            ('edit_entry', lambda: get(url('edit_entry', entry.pk))),
+            ('delete_entry', lambda: post(url('delete_entry', entry.pk))),
+            ('journal_history', lambda: get(url('journal_history'))),
+            ('insights', lambda: get(url('insights'))),
+            ('search_entries', lambda: get(url('search_entries'), {'q': 'budget'})),
+            ('export_data', export),
+            ('descent_type_list', lambda: get(url('descent_type_list'))),
+            ('descent_type_add', lambda: get(url('descent_type_add'))),
+            ('descent_type_edit', lambda: get(url('descent_type_edit', self.descent_type.pk))),
+            ('descent_type_delete', lambda: get(url('descent_type_delete', self.descent_type.pk))),
+            ('user_list', lambda: get(url('user_list'))),
+            ('user_edit', lambda: get(url('user_edit', self.user.pk))),
+            ('user_delete', lambda: post(url('user_delete', self.user.pk))),
+            ('session_list', lambda: get(url('session_list'))),
+            ('session_list_filtered', lambda: get(url('session_list'), {
+                'status': 'IN_PROGRESS',
+                'descent_type': self.descent_type.pk,
+                'user': self.user.username,
+                'date_from': '2000-01-01',
+                'page_size': 5,
+            })),
+            ('session_detail', lambda: get(url('session_detail', session.pk))),
+            ('session_delete', lambda: get(url('session_delete', session.pk))),
+            ('admin_session_changelist', lambda: get(
+                reverse('admin:journal_descentsession_changelist')
+            )),
+            ('admin_entry_changelist', lambda: get(
+                reverse('admin:journal_entry_changelist')
+            )),
+            ('render_descent_type_list', render_tag('render_descent_type_list')),
+            ('render_session_list', render_tag('render_session_list')),
+            ('render_dashboard_stats', render_tag('render_dashboard_stats')),
+            ('render_recent_activity', render_tag('render_recent_activity')),
+        ]
+
+    def measure(self, action):
+        """Run ``action`` from cold caches, rolling back anything it writes."""
+        cache.clear()
+        activity.feed.clear()
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                action()
+            transaction.set_rollback(True)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def test_query_counts_do_not_grow_with_data(self):
+        """Test every view and admin tag runs a constant number of queries"""
+        measured = {}
+        seeded = 0
+        for size in SIZES:
+            self.add_sessions(size - seeded)
+            seeded = size
+            for label, action in self.cases():
+                measured.setdefault(label, {})[size] = self.measure(action)
+
+        for label, runs in measured.items():
+            counts = {size: len(queries) for size, queries in runs.items()}
+            with self.subTest(view=label):
+                if len(set(counts.values())) > 1:
+                    largest = runs[SIZES[-1]]
+                    self.fail(
+                        f'{label} ran {counts} queries for {SIZES} sessions. '
+                        f'Queries with {SIZES[-1]} sessions:\n'
+                        + '\n'.join(
+                            f'{number}. {sql}'
+                            for number, sql in enumerate(largest, start=1)
+                        )
+                    )
@@ -0,0 +1,55 @@
+from .. import rollups
+from .base import JournalTestCase
+from ..models import DescentType, DescentSession, EmotionRollup, Entry
+
+
+class TestEmotionRollups(JournalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.session = self.add_session()
+
+    def rollup_values(self):
+        return list(EmotionRollup.objects.order_by('descent_type', 'day').values_list(
+            'descent_type', 'day', 'entry_count', 'emotion_sum', 'emotion_min', 'emotion_max'
+        ))
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollup_values()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.rollup_values())
+
+    def test_rollups_follow_entry_writes(self):
+        """Test rollups stay equal to a rebuild through entry writes"""
+        first = Entry.objects.create(session=self.session, content="First", emotion_level=3)
+        second = Entry.objects.create(session=self.session, content="Second", emotion_level=8)
+        rollup = EmotionRollup.objects.get()
+        self.assertEqual(
+            (rollup.entry_count, rollup.emotion_sum, rollup.emotion_min, rollup.emotion_max),
+            (2, 11, 3, 8),
+        )
+
+        second.emotion_level = 6
+        second.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(EmotionRollup.objects.get().emotion_max, 6)
+
+        first.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(EmotionRollup.objects.get().emotion_min, 6)
+
+    def test_rollups_follow_session_changes(self):
+        """Test retyping or deleting a session moves its rollups"""
+        Entry.objects.create(session=self.session, content="First", emotion_level=4)
+        other_type = DescentType.objects.create(name='Other', description="Other")
+
+        session = DescentSession.objects.get(pk=self.session.pk)
+        session.descent_type = other_type
+        session.save()
+        self.assertEqual(
+            list(EmotionRollup.objects.values_list('descent_type', flat=True)),
+            [other_type.pk],
+        )
+        self.assertMatchesRebuild()
+
+        session.delete()
+        self.assertFalse(EmotionRollup.objects.exists())
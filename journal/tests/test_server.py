@@ -0,0 +1,130 @@
+import json
+import os
+import runpy
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from .. import catalog, dbpool, warmup
+from .base import JournalTestCase
+from ..models import DescentType, EntryDraft
+
+User = get_user_model()
+
+
+class TestServerConfig(JournalTestCase):
+    def test_autosave_coalesced_under_default_server(self):
+        """Test rapid autosaves under the default gunicorn config write once"""
+        with mock.patch.dict(os.environ, {'GUNICORN_WARMUP': 'false'}):
+            config = runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+        self.assertEqual(config['wsgi_app'], 'downward.wsgi:application')
+        worker = mock.Mock()
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('journal:autosave_draft', args=[self.add_session().pk])
+
+        with override_settings(AUTOSAVE_INTERVAL=3600):
+            config['post_worker_init'](worker)
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    for revision in range(1, 11):
+                        response = self.client.post(url, json.dumps({
+                            'content': f'Draft {revision}', 'revision': revision,
+                        }), content_type='application/json')
+                        self.assertEqual(response.json()['saved'], False)
+            finally:
+                config['worker_exit'](mock.Mock(), worker)
+        writes = [q for q in queries if 'journal_entrydraft' in q['sql']]
+        self.assertEqual(writes, [])
+        self.assertEqual(EntryDraft.objects.get().content, 'Draft 10')
+
+    def test_default_server_pools_fit_connection_limit(self):
+        """Test default workers get a connection per thread within the limit"""
+        environ = {'DATABASE_URL': 'postgres://db/downward', 'GUNICORN_WARMUP': 'false'}
+        with mock.patch.dict(os.environ, environ), \
+                mock.patch('multiprocessing.cpu_count', return_value=4):
+            config = runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+        pool_size = config['threads'] + 1
+        self.assertLessEqual(config['workers'] * pool_size, config['connection_budget'])
+
+        log = mock.Mock()
+        config['check_pool'](log, {'max_size': pool_size})
+        log.warning.assert_not_called()
+        config['check_pool'](log, {'max_size': 1})
+        self.assertIn('below the', log.warning.call_args[0][0])
+
+
+@override_settings(SHARED_CACHE=True)
+class TestConnectionStats(TestCase):
+    def test_worker_stats_published_and_collected(self):
+        """Test each worker's connection figures reach the stats command"""
+        cache.clear()
+        dbpool.stats._slot = None
+        checkouts = dbpool.stats.checkouts
+        self.client.get('/')
+        # No query ran, so no connection was checked out
+        self.assertEqual(dbpool.stats.checkouts, checkouts)
+        User.objects.create_user(username='reader', password='testpass123')
+        self.client.login(username='reader', password='testpass123')
+        self.client.get('/')
+        self.assertEqual(dbpool.stats.checkouts, checkouts + 1)
+        dbpool.stats.publish(force=True)
+        dbpool.stats.publish(force=True)
+
+        output = StringIO()
+        call_command('db_pool_stats', json=True, stdout=output)
+        report = json.loads(output.getvalue())
+        self.assertEqual(
+            [worker['worker'] for worker in report['workers']], [dbpool.worker_id()]
+        )
+        self.assertEqual(report['totals']['checkouts'], checkouts + 1)
+
+        # Workers that stop publishing drop out
+        cache.delete(dbpool.slot_key(dbpool.stats._slot))
+        self.assertEqual(dbpool.collect(), [])
+
+    def test_workers_claim_separate_slots(self):
+        """Test a worker never takes over a slot another worker holds"""
+        cache.clear()
+        dbpool.stats._slot = None
+        cache.set(dbpool.slot_key(0), {'worker': 'elsewhere:1', 'checkouts': 5})
+        dbpool.stats.publish(force=True)
+        self.assertEqual(dbpool.stats._slot, 1)
+        self.assertEqual(
+            sorted(row['worker'] for row in dbpool.collect()),
+            sorted(['elsewhere:1', dbpool.worker_id()]),
+        )
+
+    @override_settings(SHARED_CACHE=False)
+    def test_without_shared_cache_only_this_worker_is_reported(self):
+        """Test stats stay out of a per-process cache"""
+        cache.clear()
+        dbpool.stats.publish(force=True)
+        self.assertFalse(cache.get(dbpool.slot_key(0)))
+        self.assertEqual(
+            [row['worker'] for row in dbpool.collect()], [dbpool.worker_id()]
+        )
+
+
+class TestWarmup(TestCase):
+    def test_warm_up(self):
+        """Test warmup resolves every route and loads the catalog"""
+        cache.clear()
+        DescentType.objects.create(name='Grief', type='EMOTIONAL')
+        names = [name for name, _ in warmup.iter_route_names()]
+        self.assertIn('journal:continue_descent', names)
+        self.assertIn('accounts:login', names)
+
+        done = warmup.warm_up()
+        # Admin routes restricted to installed app labels won't take '1'
+        journal_routes = [name for name in names if name.startswith('journal:')]
+        self.assertGreaterEqual(done['routes'], len(journal_routes))
+        self.assertEqual(done['descent_types'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(catalog.descent_types.active()), 1)
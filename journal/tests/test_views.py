@@ -1,25 +1,41 @@
-from django.test import TestCase, Client, override_settings
+import csv
+import io
+import json
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from ..models import DescentType, DescentSession, Entry
+from .. import archive, assets
+from .base import JournalTestCase
+from ..models import DescentType, DescentSession, Entry, EntryDraft
 from django.utils import timezone
 
 User = get_user_model()
+
+# What settings switch on when REDIS_URL is set; the test process's single
+# LocMemCache stands in for the shared cache
+shared_cache_auth = override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=[
+        'journal.backends.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ],
+)
+
+
 @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
-class TestViews(TestCase):
+class TestViews(JournalTestCase):
     def setUp(self):
+        super().setUp()
         self.client = Client()
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.descent_type = DescentType.objects.create(
-            name='Test Descent', 
-            description='A test descent type',
-            type='EMOTIONAL',
-            is_active=True
-        )
         self.session = DescentSession.objects.create(
             user=self.user,
             descent_type=self.descent_type,
@@ -45,6 +61,25 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'journal/start_descent.html')
 
+    def test_started_session_accepts_autosave(self):
+        """Test a session started from the form is active for autosave"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(
+            reverse('journal:start_descent'),
+            {'descent_type': self.descent_type.pk},
+        )
+        session = DescentSession.objects.latest('pk')
+        self.assertRedirects(
+            response, reverse('journal:continue_descent', args=[session.pk])
+        )
+        self.assertEqual(session.status, 'STARTED')
+        response = self.client.post(
+            reverse('journal:autosave_draft', args=[session.pk]),
+            json.dumps({'content': 'Half a thought', 'revision': 1}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'saved': True, 'revision': 1})
+
     def test_start_descent_inauthenticated(self):
         """Test redirect when unauthenticated user tries to start descent"""
         response = self.client.get(reverse('journal:start_descent'))
@@ -61,6 +96,81 @@ class TestViews(TestCase):
         self.assertTemplateUsed(response, 'journal/continue_descent.html')
         self.assertEqual(response.context['session'], self.session)
 
+    def test_autosave_draft(self):
+        """Test drafts are saved, restored, and dropped once submitted"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('journal:autosave_draft', args=[self.session.id])
+        for revision, content in enumerate(['Half a thought', 'Half a thought, now whole'], 1):
+            response = self.client.post(url, json.dumps({
+                'content': content, 'emotion_level': '2', 'revision': revision,
+            }), content_type='application/json')
+            self.assertEqual(response.json(), {'saved': True, 'revision': revision})
+        # An older edit arriving late does not overwrite the newer one
+        self.client.post(url, json.dumps({
+            'content': 'Stale', 'revision': 1,
+        }), content_type='application/json')
+
+        response = self.client.get(reverse('journal:continue_descent', args=[self.session.id]))
+        self.assertContains(response, 'Half a thought, now whole</textarea>')
+        self.assertContains(response, '<option value="2" selected>')
+
+        self.client.post(reverse('journal:continue_descent', args=[self.session.id]), {
+            'content': 'Half a thought, now whole', 'emotion_level': 2, 'reflection': '',
+        })
+        self.assertFalse(EntryDraft.objects.exists())
+
+    def test_autosave_draft_rejects_invalid_requests(self):
+        """Test autosave only accepts valid drafts for the user's own sessions"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.login(username='other', password='testpass123')
+        url = reverse('journal:autosave_draft', args=[self.session.id])
+        draft = json.dumps({'content': 'Not mine', 'revision': 1})
+        self.assertEqual(
+            self.client.post(url, draft, content_type='application/json').status_code, 404
+        )
+        self.assertEqual(
+            self.client.post(url, 'not json', content_type='application/json').status_code, 400
+        )
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertFalse(EntryDraft.objects.filter(user=other).exists())
+
+    @shared_cache_auth
+    def test_unchanged_session_costs_no_queries(self):
+        """Test session and user come from the cache once warmed up"""
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('journal:home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('journal:home'))
+        self.assertEqual(response.context['user'], self.user)
+
+    @shared_cache_auth
+    def test_cached_user_dropped_on_change(self):
+        """Test a password change logs out sessions using the cached user"""
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('journal:home'))
+        self.user.set_password('newpass456')
+        self.user.save()
+        response = self.client.get(reverse('journal:home'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    @shared_cache_auth
+    def test_model_backend_sessions_survive_cached_backend(self):
+        """Test sessions logged in before the cached backend stay logged in"""
+        self.client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = self.client.get(reverse('journal:home'))
+        self.assertEqual(response.context['user'], self.user)
+        # A wrong password is checked once, by the cached backend only
+        with mock.patch(
+            'django.contrib.auth.backends.ModelBackend.authenticate',
+            autospec=True, return_value=None,
+        ) as authenticate:
+            self.assertFalse(
+                self.client.login(username='testuser', password='wrong')
+            )
+        self.assertEqual(authenticate.call_count, 1)
+
     def test_journal_history_view(self):
         """Test the journal history view"""
         self.client.login(username='testuser', password='testpass123')
@@ -106,3 +216,513 @@ class TestViews(TestCase):
             reverse('journal:continue_descent', args=[session_id])
         )
         self.assertFalse(Entry.objects.filter(id=entry_id).exists())
+
+    def test_journal_history_keyset_pagination(self):
+        """Test history pages follow the cursor without gaps or repeats"""
+        self.client.login(username='testuser', password='testpass123')
+        for _ in range(4):
+            DescentSession.objects.create(
+                user=self.user,
+                descent_type=self.descent_type,
+            )
+        url = reverse('journal:journal_history')
+
+        first = self.client.get(url, {'page_size': 3})
+        self.assertTrue(first.context['page'].has_next)
+        first_ids = [session.pk for session in first.context['sessions']]
+        self.assertEqual(len(first_ids), 3)
+
+        # A session started between page loads must not shift later pages
+        DescentSession.objects.create(
+            user=self.user,
+            descent_type=self.descent_type,
+        )
+        second = self.client.get(url, {
+            'page_size': 3,
+            'cursor': first.context['page'].next_cursor,
+        })
+        second_ids = [session.pk for session in second.context['sessions']]
+        self.assertEqual(len(second_ids), 2)
+        self.assertFalse(second.context['page'].has_next)
+        self.assertFalse(set(first_ids) & set(second_ids))
+
+    def test_journal_history_partial(self):
+        """Test the load more request renders only the session cards"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(
+            reverse('journal:journal_history'), {'partial': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'journal/includes/history_cards.html')
+        self.assertTemplateNotUsed(response, 'journal/journal_history.html')
+        self.assertContains(response, 'Test content')
+
+    def test_entry_reads_leave_out_search_vector(self):
+        """Test history and entry reads never fetch the tsvector column"""
+        self.client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('journal:journal_history'))
+            list(Entry.objects.filter(session=self.session))
+        self.assertFalse([
+            query['sql'] for query in queries.captured_queries
+            if 'search_vector' in query['sql']
+        ])
+
+    def test_search_entries_view(self):
+        """Test searching returns only the user's matching entries, highlighted"""
+        other = User.objects.create_user(username='other', password='testpass123')
+        other_session = DescentSession.objects.create(
+            user=other, descent_type=self.descent_type
+        )
+        Entry.objects.create(session=other_session, content='Walking in the rain')
+        Entry.objects.create(
+            session=self.session,
+            content='A long walk in the <b>rain</b> helped',
+            reflection='Rain always does',
+        )
+
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:search_entries'), {'q': 'rain'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'journal/search.html')
+        hits = response.context['results'].hits
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(hits[0].entry.session, self.session)
+        self.assertIn('<mark>rain</mark>', hits[0].content)
+        # Entry text is escaped before matches are highlighted
+        self.assertIn('&lt;b&gt;', hits[0].content)
+
+    def test_search_follows_entry_edits(self):
+        """Test the search index is kept in sync when entries change"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('journal:search_entries')
+        self.entry.content = 'Thunderstorms overnight'
+        self.entry.save()
+        response = self.client.get(url, {'q': 'thunderstorms'})
+        self.assertEqual(len(response.context['results'].hits), 1)
+
+        self.entry.delete()
+        response = self.client.get(url, {'q': 'thunderstorms'})
+        self.assertEqual(len(response.context['results'].hits), 0)
+
+    def test_admin_entry_search_uses_index(self):
+        """Test the Entry admin search goes through the full-text index"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        Entry.objects.create(session=self.session, content='Quiet mountains today')
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get(
+            reverse('admin:journal_entry_changelist'), {'q': 'mountains'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_user_list_search_sort_and_pages(self):
+        """Test the user list filters, sorts by activity and pages by keyset"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        for number in range(3):
+            User.objects.create_user(username=f'reader{number}', password='x')
+        self.client.login(username='admin', password='testpass123')
+        url = reverse('journal:user_list')
+
+        response = self.client.get(url, {'sort': '-sessions', 'page_size': 1})
+        first = response.context['summaries'][0]
+        self.assertEqual(first.user, self.user)
+        self.assertEqual((first.session_count, first.entry_count), (1, 1))
+
+        seen = []
+        params = {'sort': 'username', 'page_size': 2}
+        while True:
+            response = self.client.get(url, params)
+            seen.extend(summary.user.username for summary in response.context['summaries'])
+            if not response.context['page'].has_next:
+                break
+            params['cursor'] = response.context['page'].next_cursor
+        self.assertEqual(seen, sorted(User.objects.values_list('username', flat=True)))
+
+        response = self.client.get(url, {'q': 'READER1'})
+        self.assertEqual(
+            [summary.user.username for summary in response.context['summaries']],
+            ['reader1'],
+        )
+        reader = User.objects.get(username='reader1')
+        self.assertContains(
+            response, f'action="{reverse("journal:user_delete", args=[reader.pk])}"'
+        )
+
+    def test_user_list_requires_superuser(self):
+        """Test regular users are turned away from user management"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:user_list'))
+        self.assertRedirects(response, reverse('journal:home'))
+
+    def test_user_delete_keeps_last_superuser(self):
+        """Test the last superuser can't be deleted, but other users can"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.client.login(username='admin', password='testpass123')
+        self.client.post(reverse('journal:user_delete', args=[admin.pk]))
+        self.assertTrue(User.objects.filter(pk=admin.pk).exists())
+
+        response = self.client.post(reverse('journal:user_delete', args=[self.user.pk]))
+        self.assertRedirects(response, reverse('journal:user_list'))
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+
+    def test_admin_dashboard_server_stats_staff_only(self):
+        """Test connection and autosave stats are only shown to staff"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:admin_dashboard'))
+        self.assertNotIn('db_pool', response.context)
+        self.assertNotIn('autosave', response.context)
+        self.assertNotContains(response, 'Database Connections')
+        self.assertNotContains(response, 'Draft Updates')
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('journal:admin_dashboard'))
+        self.assertContains(response, 'Database Connections')
+        self.assertContains(response, 'Draft Updates')
+
+    def test_session_list_filters_facets_and_pages(self):
+        """Test the staff session list filters, counts facets and pages"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        other_type = DescentType.objects.create(name='Other', type='EMOTIONAL')
+        for status in ('COMPLETED', 'COMPLETED', 'ABANDONED'):
+            DescentSession.objects.create(
+                user=self.user, descent_type=other_type, status=status
+            )
+        self.client.login(username='admin', password='testpass123')
+        url = reverse('journal:session_list')
+
+        response = self.client.get(url, {'status': 'COMPLETED'})
+        self.assertEqual(response.context['total'], 2)
+        self.assertEqual(len(response.context['sessions']), 2)
+        statuses = {value: count for value, _, count in response.context['status_facets']}
+        self.assertEqual(statuses, {
+            'STARTED': 1, 'IN_PROGRESS': 0, 'COMPLETED': 2, 'ABANDONED': 1,
+        })
+        types = {
+            descent_type.pk: count
+            for descent_type, count in response.context['descent_type_facets']
+        }
+        self.assertEqual(types, {self.descent_type.pk: 0, other_type.pk: 2})
+
+        response = self.client.get(url, {'descent_type': other_type.pk, 'page_size': 2})
+        self.assertEqual(response.context['total'], 3)
+        self.assertEqual(len(response.context['sessions']), 2)
+        cursor = response.context['page'].next_cursor
+        response = self.client.get(
+            url, {'descent_type': other_type.pk, 'page_size': 2, 'cursor': cursor}
+        )
+        self.assertEqual(len(response.context['sessions']), 1)
+        self.assertFalse(response.context['page'].has_next)
+
+        today = timezone.localdate()
+        response = self.client.get(url, {
+            'user': 'nobody', 'date_from': today.isoformat(),
+        })
+        self.assertEqual(response.context['total'], 0)
+        response = self.client.get(url, {
+            'user': 'testuser', 'date_to': (today - timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.context['total'], 0)
+        response = self.client.get(url, {'date_from': today.isoformat(), 'date_to': today.isoformat()})
+        self.assertEqual(response.context['total'], 4)
+
+    def test_session_list_caches_unfiltered_facets(self):
+        """Test only session list loads without date or user filters reuse facet counts"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        self.client.login(username='admin', password='testpass123')
+        url = reverse('journal:session_list')
+        self.client.get(url)
+
+        def grouped_queries(params):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            grouped = [q for q in queries if 'GROUP BY' in q['sql']]
+            return response, grouped
+
+        response, grouped = grouped_queries({'status': 'COMPLETED'})
+        self.assertEqual(grouped, [])
+        self.assertEqual(response.context['total'], 0)
+
+        response, grouped = grouped_queries({'user': self.user.username})
+        self.assertEqual(len(grouped), 1)
+        self.assertEqual(response.context['total'], 1)
+
+    def test_admin_session_changelist_sorts_by_duration(self):
+        """Test the session admin computes duration in the database"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        finished = DescentSession.objects.create(
+            user=self.user, descent_type=self.descent_type, status='COMPLETED'
+        )
+        DescentSession.objects.filter(pk=finished.pk).update(
+            completed_at=finished.started_at + timedelta(hours=2)
+        )
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.get(
+            reverse('admin:journal_descentsession_changelist'), {'o': '-5'}
+        )
+        self.assertEqual(response.status_code, 200)
+        results = list(response.context['cl'].result_list)
+        self.assertEqual(results[0], finished)
+        self.assertEqual(results[0].elapsed, timedelta(hours=2))
+        self.assertIsNone(results[1].elapsed)
+
+    def test_archived_session_read_and_restored_on_edit(self):
+        """Test archived entries are still shown and exported, and come back once an edit is saved"""
+        self.session.status = 'COMPLETED'
+        self.session.save()
+        archive.archive_sessions([self.session.pk])
+        self.assertFalse(Entry.objects.exists())
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(reverse('journal:session_detail', args=[self.session.pk]))
+        self.assertContains(response, 'Test content')
+        response = self.client.get(reverse('journal:journal_history'))
+        self.assertContains(response, '1 archived entry')
+        response = self.client.get(reverse('journal:export_data'), {'format': 'jsonl'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(
+            [record['id'] for record in records if record['type'] == 'entry'],
+            [self.entry.pk],
+        )
+
+        url = reverse('journal:edit_session', args=[self.session.pk])
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['formset'].forms), 1)
+        self.client.get(reverse('journal:continue_descent', args=[self.session.pk]))
+        self.assertFalse(Entry.objects.exists())
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.archived_at)
+
+        self.client.post(url, self.edit_session_data(
+            [self.entry], **{'entries-0-content': 'Edited content'}
+        ))
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.content, 'Edited content')
+        self.session.refresh_from_db()
+        self.assertIsNone(self.session.archived_at)
+
+    def edit_session_data(self, entries, **changes):
+        """Build edit_session POST data for ``entries``, overriding some values"""
+        data = {
+            'entries-TOTAL_FORMS': len(entries),
+            'entries-INITIAL_FORMS': len(entries),
+            'entries-MIN_NUM_FORMS': 0,
+            'entries-MAX_NUM_FORMS': 1000,
+        }
+        for index, entry in enumerate(entries):
+            prefix = f'entries-{index}-'
+            data[prefix + 'id'] = entry.pk
+            data[prefix + 'content'] = entry.content
+            data[prefix + 'emotion_level'] = entry.emotion_level
+            data[prefix + 'reflection'] = entry.reflection
+        data.update(changes)
+        return data
+
+    def test_edit_session_view(self):
+        """Test editing a session renders a formset of its entries"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:edit_session', args=[self.session.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'journal/edit_session.html')
+        self.assertEqual(len(response.context['formset'].forms), 1)
+
+    def test_edit_session_updates_only_changed_entries(self):
+        """Test edit_session bulk-saves just the entries that changed"""
+        second = Entry.objects.create(
+            session=self.session, content='Second entry content', emotion_level=2
+        )
+        self.client.login(username='testuser', password='testpass123')
+        data = self.edit_session_data(
+            [self.entry, second], **{'entries-1-emotion_level': 5}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('journal:edit_session', args=[self.session.id]), data
+            )
+        updates = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "journal_entry"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(
+            response, reverse('journal:session_detail', args=[self.session.id])
+        )
+        second.refresh_from_db()
+        self.assertEqual(second.emotion_level, 5)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.emotion_max, 5)
+
+    def test_edit_session_invalid_saves_nothing(self):
+        """Test one invalid entry keeps the whole session unchanged"""
+        second = Entry.objects.create(
+            session=self.session, content='Second entry content', emotion_level=2
+        )
+        self.client.login(username='testuser', password='testpass123')
+        data = self.edit_session_data(
+            [self.entry, second],
+            **{'entries-0-content': 'Edited first entry', 'entries-1-content': 'short'}
+        )
+        response = self.client.post(
+            reverse('journal:edit_session', args=[self.session.id]), data
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].errors[1])
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.content, 'Test content')
+
+    def test_edit_session_ignores_unchanged_legacy_entries(self):
+        """Test an untouched entry that breaks today's rules doesn't block saving"""
+        legacy = Entry.objects.create(
+            session=self.session, content='Short', emotion_level=3
+        )
+        self.client.login(username='testuser', password='testpass123')
+        data = self.edit_session_data(
+            [self.entry, legacy], **{'entries-0-content': 'Edited first entry'}
+        )
+        response = self.client.post(
+            reverse('journal:edit_session', args=[self.session.id]), data
+        )
+        self.assertRedirects(
+            response, reverse('journal:session_detail', args=[self.session.id])
+        )
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.content, 'Edited first entry')
+
+    @shared_cache_auth
+    def test_insights_view(self):
+        """Test insights are charted from the rollups alone"""
+        self.client.login(username='testuser', password='testpass123')
+        for level in (2, 6):
+            Entry.objects.create(
+                session=self.session, content="Test content", emotion_level=level
+            )
+        # The user (reloaded once after login) and the two rollup queries
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('journal:insights'), {'period': 'day'})
+            trend = list(response.context['trend'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(trend), 1)
+        self.assertEqual(trend[0]['entries'], 3)
+        self.assertEqual(trend[0]['lowest'], 2)
+        self.assertContains(response, 'By Descent Type')
+
+    def test_server_timing_header(self):
+        """Test staff responses report their database, template and total time"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:journal_history'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('journal:journal_history'))
+        timings = response['Server-Timing']
+        self.assertRegex(timings, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timings, r'tpl;dur=[\d.]+')
+        self.assertRegex(timings, r'total;dur=[\d.]+')
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        """Test slow requests log the view, user and slowest queries"""
+        self.client.login(username='testuser', password='testpass123')
+        with self.assertLogs('journal.performance', 'WARNING') as logs:
+            self.client.get(reverse('journal:journal_history'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'journal:journal_history')
+        self.assertEqual(record['user_id'], self.user.pk)
+        self.assertGreater(record['queries'], 0)
+        self.assertTrue(record['top_queries'])
+
+    def test_export_jsonl(self):
+        """Test the JSON Lines export streams each session followed by its entries"""
+        empty = DescentSession.objects.create(user=self.user, descent_type=self.descent_type)
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:export_data'), {'format': 'jsonl'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(record['type'], record['id']) for record in records],
+            [('session', self.session.pk), ('entry', self.entry.pk), ('session', empty.pk)],
+        )
+        self.assertEqual(records[0]['descent_type'], 'Test Descent')
+        self.assertEqual(records[1]['content'], 'Test content')
+
+    def test_export_zip(self):
+        """Test the zip export holds both the JSON Lines and CSV files"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('journal:export_data'), {'format': 'zip'})
+        self.assertIn('attachment;', response['Content-Disposition'])
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), ['journal.csv', 'journal.jsonl'])
+        rows = list(csv.reader(io.StringIO(archive.read('journal.csv').decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][0], str(self.session.pk))
+        self.assertIn('Test content', rows[1])
+
+    def test_prerendered_pages_served_to_anonymous_visitors(self):
+        """Test anonymous visitors get the prerendered file, members the view"""
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(PRERENDER_ROOT=root):
+                call_command('prerender_pages', stdout=io.StringIO())
+
+                response = Client().get(reverse('journal:about'))
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.context)
+                self.assertIn('max-age=', response['Cache-Control'])
+                self.assertIn('Cookie', response['Vary'])
+                self.assertTrue(response.has_header('ETag'))
+                self.assertEqual(response['X-Frame-Options'], 'DENY')
+                self.assertIn(b'Our Purpose', b''.join(response.streaming_content))
+
+                self.client.login(username='testuser', password='testpass123')
+                response = self.client.get(reverse('journal:about'))
+                self.assertEqual(response.status_code, 200)
+                self.assertTemplateUsed(response, 'journal/about.html')
+
+    def test_pages_load_built_asset_bundles(self):
+        """Test pages use fingerprinted bundles once build_assets has run"""
+        response = self.client.get(reverse('journal:about'))
+        self.assertContains(response, 'css/base.css')
+        self.assertNotContains(response, 'css/reset.css')
+        self.assertContains(response, 'js/main.js')
+
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(STATIC_ROOT=root):
+                try:
+                    call_command('build_assets', stdout=io.StringIO())
+                    manifest = assets.load_manifest()
+                    response = self.client.get(reverse('journal:about'))
+                finally:
+                    assets.reset_manifest()
+
+                self.assertRegex(manifest['site.css'], r'^bundles/site\.[0-9a-f]{12}\.css$')
+                with open(f"{root}/{manifest['site.css']}") as bundle:
+                    css = bundle.read()
+                self.assertTrue(css.startswith('@import'))
+                self.assertNotIn('/* Dark Theme Color Palette */', css)
+                self.assertTrue(os.path.exists(f"{root}/{manifest['site.js']}.gz"))
+
+        self.assertContains(
+            response, f'<link rel="preload" href="/static/{manifest["site.js"]}" as="script">'
+        )
+        self.assertContains(
+            response, f'<link rel="stylesheet" href="/static/{manifest["site.css"]}">'
+        )
+        self.assertNotContains(response, 'as="style"')
+        self.assertNotContains(response, 'js/main.js')
@@ -0,0 +1,85 @@
+"""
+Per-request performance measurements.
+
+``RequestTimings`` collects database and template time for the request
+being served; ``current()`` returns it (or None outside a measured
+request) so the template backend and the database wrapper can add to it
+without being handed the request.
+"""
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+
+_current = ContextVar('journal_request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = []
+        self.template_time = 0.0
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def top_queries(self, limit=5):
+        """The slowest queries as ``(milliseconds, sql)``, slowest first."""
+        ranked = sorted(self.queries, key=lambda query: query[0], reverse=True)
+        return [(round(seconds * 1000, 2), sql) for seconds, sql in ranked[:limit]]
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query on the connection."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.db_time += duration
+            self.queries.append((duration, sql))
+
+
+def current():
+    return _current.get()
+
+
+def start():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing every top-level render into the
+    current request's measurements. Includes and inclusion tags are part of
+    the render that pulls them in, so nothing is counted twice.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -13,9 +13,13 @@ urlpatterns = [
     # Descent functionality
     path('start/', views.start_descent, name='start_descent'),
     path('continue/<int:pk>/', views.continue_descent, name='continue_descent'),
+    path('continue/<int:pk>/autosave/', views.autosave_draft, name='autosave_draft'),
     path('abandon/<int:pk>/', views.abandon_descent, name='abandon_descent'),
     path('complete/<int:pk>/', views.complete_descent, name='complete_descent'),
     path('history/', views.journal_history, name='journal_history'),
+    path('insights/', views.insights, name='insights'),
+    path('search/', views.search_entries, name='search_entries'),
+    path('export/', views.export_data, name='export_data'),
 
     # Admin functionality
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
@@ -26,7 +30,13 @@ urlpatterns = [
     path('dashboard/descent-type/<int:pk>/edit/', views.descent_type_edit, name='descent_type_edit'),
     path('dashboard/descent-type/<int:pk>/delete/', views.descent_type_delete, name='descent_type_delete'),
 
+    # User Management
+    path('dashboard/users/', views.user_list, name='user_list'),
+    path('dashboard/users/<int:pk>/edit/', views.user_edit, name='user_edit'),
+    path('dashboard/users/<int:pk>/delete/', views.user_delete, name='user_delete'),
+
     # Session functionality
+    path('dashboard/sessions/', views.session_list, name='session_list'),
     path('session/<int:pk>/', views.session_detail, name='session_detail'),
     path('edit-session/<int:pk>/', views.edit_session, name='edit_session'),
     path('session/<int:pk>/delete/', views.session_delete, name='session_delete'),  
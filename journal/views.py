@@ -1,15 +1,33 @@
+import json
+from datetime import datetime, time, timedelta
+
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm, UserChangeForm
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 
-from .forms import DescentTypeForm, DescentSessionForm, EntryForm
-from .models import DescentSession, DescentType, Entry
+from . import archive, autosave, dbpool, export, rollups, search, summaries
+from .counters import get_dashboard_stats
+from .forms import DescentTypeForm, DescentSessionForm, EntryForm, EntryFormSet
+from .models import (
+    ACTIVE_STATUSES, DescentSession, DescentType, EmotionRollup, Entry, EntryDraft,
+    UserSummary,
+)
+from .pagination import clamp_page_size, paginate_keyset
+
+
+# How far back the day-by-day insights chart reaches
+DAILY_INSIGHT_DAYS = 90
 
 
 def home(request):
@@ -150,15 +168,16 @@ def terms(request):
 @login_required
 def admin_dashboard(request):
     """Custom admin dashboard with statistics and quick actions."""
-    context = {
-        'total_users': User.objects.count(),
-        'total_sessions': DescentSession.objects.count(),
-        'active_sessions': DescentSession.objects.filter(
-            status__in=['STARTED', 'IN_PROGRESS']
-        ).count(),
-        'total_entries': Entry.objects.count(),
-        'total_descent_types': DescentType.objects.count(),
-    }
+    stats = get_dashboard_stats()
+    context = dict(stats, stats=stats)
+    # Server internals are for staff only
+    if request.user.is_staff:
+        db_pool = dbpool.collect()
+        context.update(
+            autosave=autosave.stats(),
+            db_pool=db_pool,
+            db_pool_totals=dbpool.totals(db_pool),
+        )
     return render(request, 'journal/admin_dashboard.html', context)
 
 
@@ -170,7 +189,7 @@ def start_descent(request):
         if form.is_valid():
             session = form.save(commit=False)
             session.user = request.user
-            session.status = 'Started'
+            session.status = 'STARTED'
             session.save()
             messages.success(request, 
                             'Descent session started successfully!'
@@ -179,9 +198,6 @@ def start_descent(request):
         messages.error(request, 'Please correct the errors below.')
     else:
         form = DescentSessionForm(user=request.user)
-        form.fields['descent_type'].queryset = DescentType.objects.filter(
-            is_active=True
-        )
 
     return render(request, 'journal/start_descent.html', {'form': form})
 
@@ -200,10 +216,13 @@ def descent_start(request, pk):
 
 @login_required
 def continue_descent(request, pk):
-    session = get_object_or_404(DescentSession, pk=pk, user=request.user)
-    entries = Entry.objects.filter(session=session).order_by('timestamp')
+    session = get_object_or_404(
+        DescentSession.objects.select_related('user', 'descent_type'),
+        pk=pk, user=request.user,
+    )
 
     if request.method == 'POST':
+        archive.restore(session)
         content = request.POST.get('content')
         emotion_level = request.POST.get('emotion_level')
         reflection = request.POST.get('reflection')
@@ -218,24 +237,28 @@ def continue_descent(request, pk):
             if emotion_level < 1 or emotion_level > 5:
                 raise ValueError('Invalid emotion level')
 
-            Entry.objects.create(
-                session=session,
-                content=content,
-                emotion_level=emotion_level,
-                reflection=reflection,
-            )
+            with transaction.atomic():
+                Entry.objects.create(
+                    session=session,
+                    content=content,
+                    emotion_level=emotion_level,
+                    reflection=reflection,
+                )
+                autosave.discard_draft(request.user.pk, session.pk)
+
+                if action == 'complete':
+                    session.status = 'COMPLETED'
+                    session.completed_at = timezone.now()
+                    session.save()
+                elif action == 'save_progress' and session.status != 'IN_PROGRESS':
+                    session.status = 'IN_PROGRESS'
+                    session.save()
 
             if action == 'complete':
-                session.status = 'COMPLETED'
-                session.completed_at = timezone.now()
-                session.save()
                 messages.success(request, 'Session completed successfully!')
                 return redirect('journal:complete_descent', pk=pk)
 
             if action == 'save_progress':
-                if session.status != 'IN_PROGRESS':
-                    session.status = 'IN_PROGRESS'
-                    session.save()
                 messages.success(
                     request,
                     'Entry added successfully. Continue your descent.',
@@ -252,21 +275,65 @@ def continue_descent(request, pk):
             )
             return redirect('journal:continue_descent', pk=pk)
 
+    draft = EntryDraft.objects.filter(user=request.user, session=session).first()
     return render(
         request,
         'journal/continue_descent.html',
-        {'session': session, 'entries': entries},
+        {
+            'session': session,
+            'entries': archive.session_entries(session),
+            'draft': draft,
+        },
     )
 
 
+@login_required
+@require_POST
+async def autosave_draft(request, pk):
+    """
+    Accept the entry being typed into session ``pk`` as JSON and hand it to
+    the draft coalescer; see journal.autosave.
+    """
+    user = await request.auser()
+    try:
+        payload = json.loads(request.body)
+        emotion_level = payload.get('emotion_level') or None
+        if emotion_level is not None:
+            emotion_level = int(emotion_level)
+            if emotion_level < 1 or emotion_level > 5:
+                raise ValueError('Invalid emotion level')
+        fields = {
+            'content': str(payload.get('content', '')),
+            'reflection': str(payload.get('reflection', '')),
+            'emotion_level': emotion_level,
+            'revision': int(payload['revision']),
+        }
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid draft.'}, status=400)
+
+    # Only the first update after each flush pays for the ownership check
+    if not autosave.drafts.is_pending(user.pk, pk):
+        owned = await DescentSession.objects.filter(
+            pk=pk, user=user, status__in=ACTIVE_STATUSES
+        ).aexists()
+        if not owned:
+            raise Http404('No open session found.')
+
+    saved = await autosave.drafts.update(
+        user.pk, pk, fields, final=bool(payload.get('final'))
+    )
+    return JsonResponse({'saved': saved, 'revision': fields['revision']})
+
+
 @login_required
 def edit_session(request, pk):
     session = get_object_or_404(DescentSession, pk=pk, user=request.user)
-    entries = Entry.objects.filter(session=session).order_by('timestamp')
 
     if request.method == 'POST':
+        archive.restore(session)
+        entries = Entry.objects.filter(session=session).order_by('timestamp')
         if 'complete_session' in request.POST:
-            session.status = 'Completed'
+            session.status = 'COMPLETED'
             session.completed_at = timezone.now()
             session.save()
             messages.success(
@@ -274,30 +341,38 @@ def edit_session(request, pk):
             )
             return redirect('journal:journal_history')
 
-        for entry in entries:
-            content_key = f'content_{entry.id}'
-            emotion_key = f'emotion_level_{entry.id}'
-            reflection_key = f'reflection_{entry.id}'
-
-            if content_key in request.POST:
-                entry.content = request.POST[content_key]
-                entry.emotion_level = request.POST[emotion_key]
-                entry.reflection = request.POST[reflection_key]
-                entry.save()
-
-        messages.success(request, 'Session updated successfully!')
-        return redirect('journal:session_detail', pk=pk)
+        formset = EntryFormSet(request.POST, queryset=entries, prefix='entries')
+        if formset.is_valid():
+            changed = formset.changed_entries()
+            if changed:
+                with transaction.atomic():
+                    Entry.objects.bulk_update(
+                        changed, formset.fields_to_update
+                    )
+                    summaries.record_entries_changed(changed)
+                    rollups.record_entries_changed(changed)
+            messages.success(request, 'Session updated successfully!')
+            return redirect('journal:session_detail', pk=pk)
+        messages.error(request, 'Please correct the errors below.')
+    else:
+        # An archived session is only restored once the edit is submitted
+        formset = EntryFormSet(
+            queryset=archive.session_entries(session), prefix='entries'
+        )
 
     return render(
         request,
         'journal/edit_session.html',
-        {'session': session, 'entries': entries},
+        {'session': session, 'formset': formset},
     )
 
 
 @login_required
 def complete_descent(request, pk):
-    session = get_object_or_404(DescentSession, pk=pk, user=request.user)
+    session = get_object_or_404(
+        DescentSession.objects.select_related('user', 'descent_type'),
+        pk=pk, user=request.user,
+    )
     session.status = 'COMPLETED'
     session.completed_at = timezone.now()
     session.save()
@@ -307,7 +382,10 @@ def complete_descent(request, pk):
 
 @login_required
 def abandon_descent(request, pk):
-    session = get_object_or_404(DescentSession, pk=pk, user=request.user)
+    session = get_object_or_404(
+        DescentSession.objects.select_related('user', 'descent_type'),
+        pk=pk, user=request.user,
+    )
     session.status = 'ABANDONED'
     session.completed_at = timezone.now()
     session.save()
@@ -317,14 +395,20 @@ def abandon_descent(request, pk):
 @login_required
 @require_POST
 def add_entry(request, pk):
-    session = get_object_or_404(DescentSession, pk=pk, user=request.user)
+    session = get_object_or_404(
+        DescentSession.objects.select_related('user', 'descent_type'),
+        pk=pk, user=request.user,
+    )
 
     if request.method == 'POST':
+        archive.restore(session)
         form = EntryForm(request.POST)
         if form.is_valid():
             entry = form.save(commit=False)
             entry.session = session
-            entry.save()
+            with transaction.atomic():
+                entry.save()
+                autosave.discard_draft(request.user.pk, session.pk)
             messages.success(request, 'Entry added successfully!')
             return redirect('journal:continue_descent', pk=session.pk)
         messages.error(request, 'Please correct the errors below.')
@@ -341,7 +425,8 @@ def edit_entry(request, entry_id):
     if request.method == 'POST':
         form = EntryForm(request.POST, instance=entry)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
             messages.success(request, 'Entry updated successfully!')
             return redirect('journal:continue_descent', pk=entry.session.pk)
         messages.error(request, 'Please correct the errors below.')
@@ -358,7 +443,8 @@ def delete_entry(request, entry_id):
     session_pk = entry.session.pk
 
     if request.method == 'POST':
-        entry.delete()
+        with transaction.atomic():
+            entry.delete()
         messages.success(request, 'Entry deleted successfully.')
         return redirect('journal:continue_descent', pk=session_pk)
 
@@ -377,15 +463,100 @@ def delete_entry(request, entry_id):
 
 @login_required
 def journal_history(request):
-    """Display User's descent history."""
-    sessions = (
-        DescentSession.objects.prefetch_related('entries')
-        .filter(user=request.user)
-        .order_by('-started_at')
+    """Display User's descent history, one keyset page at a time."""
+    sessions = DescentSession.objects.filter(
+        user=request.user
+    ).select_related('descent_type', 'latest_entry').defer(
+        'latest_entry__search_vector'
+    )
+
+    descent_type = request.GET.get('descent_type', '')
+    if descent_type.isdigit():
+        sessions = sessions.filter(descent_type_id=descent_type)
+
+    page = paginate_keyset(
+        sessions,
+        'started_at',
+        cursor=request.GET.get('cursor'),
+        page_size=clamp_page_size(request.GET.get('page_size')),
     )
+
+    next_query = request.GET.copy()
+    next_query.pop('partial', None)
+    if page.has_next:
+        next_query['cursor'] = page.next_cursor
+
+    context = {
+        'sessions': page.items,
+        'page': page,
+        'next_query': next_query.urlencode(),
+        'descent_types': DescentType.objects.all(),
+    }
+    if request.GET.get('partial'):
+        return render(request, 'journal/includes/history_cards.html', context)
+    return render(request, 'journal/journal_history.html', context)
+
+
+@login_required
+def insights(request):
+    """Chart how the user's emotion levels trend, from daily rollups."""
+    period = request.GET.get('period', 'week')
+    if period not in rollups.PERIODS:
+        period = 'week'
+    user_rollups = EmotionRollup.objects.filter(user=request.user)
+
+    descent_type = request.GET.get('descent_type', '')
+    trend_rollups = user_rollups
+    if descent_type.isdigit():
+        trend_rollups = trend_rollups.filter(descent_type_id=descent_type)
+    if period == 'day':
+        trend_rollups = trend_rollups.filter(
+            day__gte=timezone.localdate() - timedelta(days=DAILY_INSIGHT_DAYS)
+        )
+
+    context = {
+        'period': period,
+        'periods': list(rollups.PERIODS),
+        'descent_type': descent_type,
+        'trend': rollups.trend(trend_rollups, period),
+        'by_descent_type': rollups.by_descent_type(user_rollups),
+    }
+    return render(request, 'journal/insights.html', context)
+
+
+@login_required
+def search_entries(request):
+    """Search the user's own entries and reflections."""
+    query = request.GET.get('q', '')
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        page = 1
+    results = search.search_entries(request.user, query, page=page)
     return render(
-        request, 'journal/journal_history.html', {'sessions': sessions}
+        request, 'journal/search.html', {'query': query, 'results': results}
+    )
+
+
+@login_required
+def export_data(request):
+    """Stream a complete export of the user's sessions and entries."""
+    export_format = request.GET.get('format', 'jsonl')
+    if export_format not in export.FORMATS:
+        messages.error(request, 'Unknown export format.')
+        return redirect('journal:journal_history')
+
+    content_type, extension = export.FORMATS[export_format]
+    response = StreamingHttpResponse(
+        export.export_chunks(request.user, export_format),
+        content_type=content_type,
+    )
+    filename = (
+        f'downward-{request.user.username}-'
+        f'{timezone.now():%Y%m%d}.{extension}'
     )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
 @login_required
@@ -469,13 +640,128 @@ def descent_type_delete(request, pk):
     return redirect('journal:admin_dashboard')
 
 
+def _day_start(value):
+    """The aware datetime at which the YYYY-MM-DD ``value`` begins, or None."""
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# The unfiltered facet counts group the whole session table, so they are
+# cached for a short while instead of recounted on every page load
+FACETS_CACHE_KEY = 'journal:session-facets'
+FACETS_CACHE_TIMEOUT = 60
+
+
+def session_facets(sessions, status, descent_type_id, cache_key=None):
+    """
+    Count ``sessions`` by status and by descent type in one grouped query.
+    Each facet honours the other one's filter but not its own, so its
+    counts show what picking a different value would return. With
+    ``cache_key``, the grouped rows are read through the cache.
+    """
+    by_status = dict.fromkeys(
+        (value for value, _ in DescentSession.STATUS_CHOICES), 0
+    )
+    by_type = {}
+    total = 0
+    rows = cache.get(cache_key) if cache_key else None
+    if rows is None:
+        rows = list(
+            sessions.order_by()
+            .values_list('status', 'descent_type_id')
+            .annotate(count=Count('pk'))
+        )
+        if cache_key:
+            cache.set(cache_key, rows, FACETS_CACHE_TIMEOUT)
+    for row_status, row_type, count in rows:
+        type_matches = descent_type_id is None or row_type == descent_type_id
+        status_matches = not status or row_status == status
+        if type_matches:
+            by_status[row_status] = by_status.get(row_status, 0) + count
+        if status_matches:
+            by_type[row_type] = by_type.get(row_type, 0) + count
+        if type_matches and status_matches:
+            total += count
+    return {'status': by_status, 'descent_type': by_type, 'total': total}
+
+
 @login_required
 def session_list(request):
+    """Every user's sessions, filtered and paged by keyset, with facet counts."""
     if not request.user.is_superuser:
-        return redirect('home')
+        messages.error(request, "You don't have permission to view sessions.")
+        return redirect('journal:home')
+
+    sessions = DescentSession.objects.all()
+    started_from = _day_start(request.GET.get('date_from'))
+    if started_from is not None:
+        sessions = sessions.filter(started_at__gte=started_from)
+    started_before = _day_start(request.GET.get('date_to'))
+    if started_before is not None:
+        # date_to is inclusive
+        sessions = sessions.filter(
+            started_at__lt=started_before + timedelta(days=1)
+        )
+    username = request.GET.get('user', '').strip()
+    if username:
+        sessions = sessions.filter(user__username=username)
+
+    status = request.GET.get('status', '')
+    if status not in dict(DescentSession.STATUS_CHOICES):
+        status = ''
+    descent_type = request.GET.get('descent_type', '')
+    descent_type_id = int(descent_type) if descent_type.isdigit() else None
+
+    # Date and user filters narrow the grouped query enough to count live
+    narrowed = started_from or started_before or username
+    facets = session_facets(
+        sessions, status, descent_type_id,
+        cache_key=None if narrowed else FACETS_CACHE_KEY,
+    )
+    if status:
+        sessions = sessions.filter(status=status)
+    if descent_type_id is not None:
+        sessions = sessions.filter(descent_type_id=descent_type_id)
+
+    page = paginate_keyset(
+        sessions.select_related('user', 'descent_type'),
+        'started_at',
+        cursor=request.GET.get('cursor'),
+        page_size=clamp_page_size(request.GET.get('page_size')),
+    )
 
-    sessions = DescentSession.objects.all().order_by('-started_at')
-    return render(request, 'journal/session_list.html', {'sessions': sessions})
+    next_query = request.GET.copy()
+    if page.has_next:
+        next_query['cursor'] = page.next_cursor
+
+    descent_types = [
+        (descent_type, facets['descent_type'].get(descent_type.pk, 0))
+        for descent_type in DescentType.objects.order_by('name')
+    ]
+    context = {
+        'sessions': page.items,
+        'page': page,
+        'next_query': next_query.urlencode(),
+        'total': facets['total'],
+        'status_facets': [
+            (value, label, facets['status'][value])
+            for value, label in DescentSession.STATUS_CHOICES
+        ],
+        'descent_type_facets': descent_types,
+        'filters': {
+            'status': status,
+            'descent_type': descent_type_id,
+            'user': username,
+            'date_from': request.GET.get('date_from', ''),
+            'date_to': request.GET.get('date_to', ''),
+        },
+    }
+    return render(request, 'journal/session_list.html', context)
 
 
 @login_required
@@ -494,7 +780,7 @@ def session_detail(request, pk):
         messages.warning(request, 'This session is already completed.')
         return redirect('journal:journal_history')
 
-    entries = Entry.objects.filter(session=session).order_by('timestamp')
+    entries = archive.session_entries(session)
     context = {'session': session, 'entries': entries}
     return render(request, 'journal/session_detail.html', context)
 
@@ -536,21 +822,66 @@ def session_delete(request, pk):
     return render(request, 'journal/session_confirm_delete.html', context)
 
 
+# ``sort`` parameter -> (UserSummary field, column heading). Every ordering
+# is backed by an index: the UserSummary ones end in user_id, the keyset
+# tiebreaker, and usernames are unique
+USER_SORTS = {
+    'username': ('user__username', 'User'),
+    'sessions': ('session_count', 'Sessions'),
+    'entries': ('entry_count', 'Entries'),
+    'last_active': ('last_active_at', 'Last active'),
+}
+
+
 @login_required
 def user_list(request):
+    """Searchable list of accounts with their activity, a keyset page at a time."""
     if not request.user.is_superuser:
-        messages.error(request, "You don't have permission to edit sessions.")
-        return redirect('home')
+        messages.error(request, "You don't have permission to manage users.")
+        return redirect('journal:home')
 
-    users = User.objects.all()
-    return render(request, 'journal/user_list.html', {'users': users})
+    accounts = UserSummary.objects.select_related('user')
+    query = request.GET.get('q', '').strip()
+    if query:
+        accounts = accounts.filter(
+            Q(user__username__icontains=query) | Q(user__email__icontains=query)
+        )
+
+    sort = request.GET.get('sort', '-last_active')
+    if sort.lstrip('-') not in USER_SORTS:
+        sort = '-last_active'
+    page = paginate_keyset(
+        accounts,
+        USER_SORTS[sort.lstrip('-')][0],
+        cursor=request.GET.get('cursor'),
+        page_size=clamp_page_size(request.GET.get('page_size')),
+        descending=sort.startswith('-'),
+    )
+
+    next_query = request.GET.copy()
+    if page.has_next:
+        next_query['cursor'] = page.next_cursor
+    sort_query = request.GET.copy()
+    sort_query.pop('cursor', None)
+    sort_query.pop('sort', None)
+
+    context = {
+        'summaries': page.items,
+        'page': page,
+        'query': query,
+        'sort': sort,
+        'next_query': next_query.urlencode(),
+        'sort_query': sort_query.urlencode(),
+        'sort_columns': [(key, label) for key, (_, label) in USER_SORTS.items()],
+    }
+    return render(request, 'journal/user_list.html', context)
 
 
 @login_required
 def user_edit(request, pk):
     if not request.user.is_superuser:
         messages.error(request, "You don't have permission to edit users.")
-        return redirect('home')
+        return redirect('journal:home')
 
     user = get_object_or_404(User, pk=pk)
 
@@ -569,7 +900,7 @@ def user_edit(request, pk):
                 update_session_auth_hash(request, user)
                 messages.success(request, 'Password updated Successfully.')
 
-            return redirect('user_list')
+            return redirect('journal:user_list')
     else:
         user_form = UserChangeForm(instance=user)
         password_form = PasswordChangeForm(user)
@@ -582,17 +913,20 @@ def user_edit(request, pk):
 
 
 @login_required
+@require_POST
 def user_delete(request, pk):
     if not request.user.is_superuser:
         messages.error(request, "You don't have permission to delete users.")
-        return redirect('home')
+        return redirect('journal:home')
 
     user = get_object_or_404(User, pk=pk)
 
-    if User.objects.filter(is_superuser=True).count() == 1 and user.is_superuser:
-        messages.error(request, 'Cannot delete the last superuser')
-        return redirect('user_list')
+    if user.is_superuser and not User.objects.filter(
+        is_superuser=True
+    ).exclude(pk=user.pk).exists():
+        messages.error(request, 'Cannot delete the last superuser.')
+        return redirect('journal:user_list')
 
     user.delete()
     messages.success(request, 'User deleted successfully.')
-    return redirect('user_list')
+    return redirect('journal:user_list')
@@ -0,0 +1,123 @@
+"""
+Work a fresh process would otherwise do on its first requests: importing
+every view and building the URL resolver, compiling the project's
+templates into the cached loader, and loading the descent type catalog.
+Run by gunicorn before a worker accepts traffic (see gunicorn.conf.py).
+"""
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import (
+    NoReverseMatch, URLPattern, URLResolver, get_resolver, resolve, reverse,
+)
+
+from . import catalog
+
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def iter_route_names(patterns=None, namespace=None):
+    """Yield the namespaced name and converters of every named route."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            child = pattern.namespace
+            if namespace and child:
+                child = f'{namespace}:{child}'
+            yield from iter_route_names(pattern.url_patterns, child or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, pattern.pattern.converters
+
+
+def resolve_urls():
+    """Reverse and resolve every named route; returns how many resolved."""
+    resolved = 0
+    for name, converters in iter_route_names():
+        try:
+            url = reverse(name, kwargs={argument: '1' for argument in converters})
+        except NoReverseMatch:
+            # A converter that won't take '1' (uuid, custom); the view
+            # module is imported by the resolver all the same
+            continue
+        resolve(url)
+        resolved += 1
+    return resolved
+
+
+def project_template_dirs():
+    """Template directories of the project itself, not of Django or packages."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    dirs = []
+    for backend in engines.all():
+        dirs.extend(Path(path) for path in backend.engine.dirs)
+    for app_config in apps.get_app_configs():
+        path = Path(app_config.path).resolve()
+        if path.is_relative_to(base_dir) and (path / 'templates').is_dir():
+            dirs.append(path / 'templates')
+    return dirs
+
+
+def iter_template_names():
+    """Yield ``(name, path)`` for every template under the project's dirs."""
+    seen = set()
+    for directory in project_template_dirs():
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if not filename.endswith(TEMPLATE_SUFFIXES):
+                    continue
+                path = Path(root) / filename
+                name = path.relative_to(directory).as_posix()
+                if name not in seen:
+                    seen.add(name)
+                    yield name, path
+
+
+def compile_templates():
+    """
+    Compile every project template with each engine; returns a list of
+    ``(name, error)`` for the ones that failed.
+    """
+    failures = []
+    for backend in engines.all():
+        for name, _ in iter_template_names():
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError as error:
+                failures.append((name, error))
+    return failures
+
+
+def warm_up(database=True):
+    """
+    Run every warmup step and return what was done. ``database=False``
+    skips the steps that query, for processes that must not open
+    connections (the gunicorn master when preloading).
+    """
+    started = time.perf_counter()
+    routes = resolve_urls()
+    failures = compile_templates()
+    for name, error in failures:
+        logger.warning('Template %s failed to compile: %s', name, error)
+    descent_types = None
+    if database:
+        descent_types = len(catalog.descent_types.active())
+        # Hand the connection back (to the pool, if there is one) rather
+        # than keep it in a thread that serves no requests
+        connections.close_all()
+    return {
+        'ms': (time.perf_counter() - started) * 1000,
+        'routes': routes,
+        'template_errors': len(failures),
+        'descent_types': descent_types,
+    }
@@ -8,6 +8,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initalizeFormValidation();
     initializeAccessibilityFeatures();
     initializeTooltips();
+    initializeAutosave();
 })
 
 /**
@@ -275,6 +276,47 @@ function debounce(func, wait) {
     };
 }
 
+/**
+ * Autosave the entry being written on forms with data-autosave-url.
+ * Updates are debounced here and coalesced again on the server; hiding or
+ * closing the tab sends a final update that is written straight away.
+ */
+function initializeAutosave() {
+    const form = document.querySelector('form[data-autosave-url]');
+    if (!form) return;
+
+    const url = form.dataset.autosaveUrl;
+    const csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+    let dirty = false;
+    let submitting = false;
+
+    function send(final) {
+        if (!dirty || submitting) return;
+        dirty = false;
+        fetch(url, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken},
+            body: JSON.stringify({
+                content: form.elements.content.value,
+                reflection: form.elements.reflection.value,
+                emotion_level: form.elements.emotion_level.value,
+                revision: Date.now(),
+                final: final
+            }),
+            credentials: 'same-origin',
+            keepalive: final
+        }).catch(() => { dirty = true; });
+    }
+
+    const save = debounce(() => send(false), 1000);
+    form.addEventListener('input', () => { dirty = true; save(); });
+    form.addEventListener('submit', () => { submitting = true; });
+    document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') send(true);
+    });
+    window.addEventListener('pagehide', () => send(true));
+}
+
 // Export functions for use in other modules if needed
 if (typeof module !== 'undefined' && module.exports) {
     module.exports = {
@@ -282,6 +324,7 @@ if (typeof module !== 'undefined' && module.exports) {
         initalizeFormValidation,
         initializeAccessibilityFeatures,
         initializeTooltips,
+        initializeAutosave,
         debounce
     };
 }